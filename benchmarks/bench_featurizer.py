@@ -0,0 +1,72 @@
+"""
+Benchmark hashed n-gram featurizer (src/Model/featurizer.py): thông lượng transform (comment/s) trên 1 process
+và với nhiều worker, thời gian fit idf (1 lượt streaming) và kích thước ma trận CSR.
+
+Corpus: comment giả lập (generator.py), lower + gộp khoảng trắng thay cho bước NLP.
+
+Chạy:  python benchmarks/bench_featurizer.py --rows 200000 --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src", "Model"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generator import generate_comments  # noqa: E402
+from featurizer import HashingFeaturizer  # noqa: E402
+
+
+def make_chunks(rows: int, chunksize: int, seed: int):
+    chunks = []
+    for start in range(0, rows, chunksize):
+        n = min(chunksize, rows - start)
+        chunks.append([" ".join(t.lower().split()) for t in generate_comments(n, seed + start) if isinstance(t, str)])
+    return chunks
+
+
+def run_transform(featurizer: HashingFeaturizer, chunks, workers: int):
+    start = time.perf_counter()
+    n_rows, nnz = 0, 0
+    for matrix in featurizer.transform_stream(chunks, workers=workers):
+        n_rows += matrix.shape[0]
+        nnz += matrix.nnz
+    return time.perf_counter() - start, n_rows, nnz
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hashed n-gram featurizer")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--chunksize", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.rows, args.chunksize, args.seed)
+    featurizer = HashingFeaturizer(use_idf=True)
+
+    start = time.perf_counter()
+    featurizer.fit(chunks)
+    fit_s = time.perf_counter() - start
+
+    seq_s, n_rows, nnz = run_transform(featurizer, chunks, workers=1)
+    print(f"{n_rows:,} comment, {featurizer.n_features:,} cột, từ 1-2 + ký tự 2-4, TF-IDF")
+    print(f"Fit idf (1 lượt):  {fit_s:8.2f}s ({n_rows / fit_s:,.0f} comment/s)")
+    print(f"Transform 1 worker: {seq_s:8.2f}s ({n_rows / seq_s:,.0f} comment/s)")
+    if args.workers > 1:
+        par_s, par_rows, par_nnz = run_transform(featurizer, chunks, workers=args.workers)
+        assert (par_rows, par_nnz) == (n_rows, nnz)
+        print(f"Transform {args.workers} worker: {par_s:8.2f}s ({n_rows / par_s:,.0f} comment/s, "
+              f"x{seq_s / par_s:.1f})")
+    # CSR: data float64 + indices int32 + indptr
+    csr_mb = (nnz * (8 + 4) + (n_rows + len(chunks)) * 4) / 1e6
+    print(f"Ma trận: {nnz:,} phần tử khác 0 ({nnz / max(n_rows, 1):.0f}/comment), CSR ~{csr_mb:,.0f} MB")
+    assert np.isfinite(featurizer.idf).all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark định dạng output của pipeline: CSV (utf-8-sig) so với Parquet / Arrow IPC (columnar_io.py).
+Đo kích thước file, thời gian ghi, thời gian đọc lại cả bảng và đọc riêng cột processed_text.
+
+Corpus: comment giả lập (generator.py) qua TextPreprocessor với segmenter giả (như run_benchmarks.py),
+output gồm index gốc + processed_text + text + cluster_id.
+
+Chạy:  python benchmarks/bench_output_formats.py --rows 200000 --compression zstd
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src", "Preprocess"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from columnar_io import read_table, write_table  # noqa: E402
+from data_preprocess import Config, TextPreprocessor  # noqa: E402
+from generator import generate_comments  # noqa: E402
+from run_benchmarks import StubSegmenter  # noqa: E402
+
+
+def timed(func, repeat: int):
+    """(kết quả, số giây nhanh nhất trong `repeat` lần)."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def make_output(rows: int, seed: int) -> pd.DataFrame:
+    texts = [t for t in generate_comments(rows, seed) if isinstance(t, str)]
+    preprocessor = TextPreprocessor(Config.VNCORENLP_DIR, Config.TEENCODE_FILE, nlp=StubSegmenter())
+    df = pd.DataFrame({'processed_text': preprocessor.process_many(texts), 'text': texts})
+    # Như pipeline: bỏ dòng rỗng sau xử lý
+    df = df[df['processed_text'].str.strip().astype(bool)]
+    # Index gốc không liên tục như sau filter_noise
+    df.index = pd.RangeIndex(0, 2 * len(df), 2)
+    df['cluster_id'] = df.index
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark định dạng output")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--compression", default=Config.OUTPUT_COMPRESSION,
+                        help="Codec cho Parquet/Arrow: zstd, lz4, snappy (chỉ Parquet), none")
+    parser.add_argument("--output", help="Ghi kết quả JSON")
+    args = parser.parse_args()
+    compression = None if args.compression == "none" else args.compression
+
+    df = make_output(args.rows, args.seed)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in ("csv", "parquet", "arrow"):
+            path = os.path.join(tmp, f"output.{fmt}")
+            if fmt == "csv":
+                write = lambda: df.to_csv(path, index=True, encoding='utf-8-sig')  # noqa: E731
+                read_all = lambda: pd.read_csv(path, index_col=0, encoding='utf-8-sig')  # noqa: E731
+                read_text = lambda: pd.read_csv(path, index_col=0, usecols=[0, 1], encoding='utf-8-sig')  # noqa: E731
+            else:
+                write = lambda: write_table(df, path, fmt, compression=compression)  # noqa: E731
+                read_all = lambda: read_table(path, fmt=fmt)  # noqa: E731
+                read_text = lambda: read_table(path, columns=['processed_text'], fmt=fmt)  # noqa: E731
+
+            _, write_s = timed(write, args.repeat)
+            loaded, read_s = timed(read_all, args.repeat)
+            projected, read_text_s = timed(read_text, args.repeat)
+            assert loaded.index.equals(df.index) and projected['processed_text'].equals(df['processed_text'])
+            results[fmt] = {'bytes': os.path.getsize(path), 'write_seconds': round(write_s, 4),
+                            'read_seconds': round(read_s, 4), 'read_processed_text_seconds': round(read_text_s, 4)}
+
+    csv = results["csv"]
+    print(f"{len(df):,} dòng, nén {args.compression}")
+    print(f"{'':<8} {'MB':>8} {'ghi (s)':>9} {'đọc (s)':>9} {'đọc 1 cột (s)':>14}  so với CSV (kích thước / đọc)")
+    for fmt, r in results.items():
+        print(f"{fmt:<8} {r['bytes'] / 1e6:8.2f} {r['write_seconds']:9.3f} {r['read_seconds']:9.3f} "
+              f"{r['read_processed_text_seconds']:14.3f}  x{csv['bytes'] / r['bytes']:.1f} / "
+              f"x{csv['read_seconds'] / max(r['read_seconds'], 1e-9):.1f}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'rows': len(df), 'compression': args.compression, 'results': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark thời gian khởi tạo TeencodeConverter / SpamChecker: dựng từ JSON so với nạp artifact nhị phân.
+
+Chạy:  python benchmarks/bench_resource_load.py --teencode 50000 --keywords 100000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src", "Preprocess"))
+
+from data_preprocess import TeencodeConverter as PipelineTeencodeConverter  # noqa: E402
+from resource_compiler import artifact_path  # noqa: E402
+from spam_checker import SpamChecker  # noqa: E402
+from teencode_converter import TeencodeConverter  # noqa: E402
+
+LETTERS = "abcdeghiklmnopqrstuvxyđăâêôơư"
+
+
+def random_word(rng: random.Random) -> str:
+    return "".join(rng.choice(LETTERS) for _ in range(rng.randint(2, 7)))
+
+
+def make_resources(tmp: str, teencode_size: int, keyword_size: int, seed: int):
+    rng = random.Random(seed)
+    teencode = {}
+    for i in range(teencode_size):
+        words = [random_word(rng) for _ in range(rng.choice([1, 1, 1, 2, 3]))]
+        teencode.setdefault(f"chuẩn{i % (teencode_size // 3 + 1)}", []).append(" ".join(words) + str(i))
+    keywords = {f"category{c}": [] for c in range(4)}
+    for i in range(keyword_size):
+        keywords[f"category{i % 4}"].append(" ".join(random_word(rng) for _ in range(rng.randint(1, 3))) + str(i))
+
+    teencode_path = os.path.join(tmp, "teencode.json")
+    spam_path = os.path.join(tmp, "spamkeyword.json")
+    for path, data in [(teencode_path, teencode), (spam_path, keywords)]:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+    return teencode_path, spam_path
+
+
+def timed(factory, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        factory()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark nạp tài nguyên")
+    parser.add_argument("--teencode", type=int, default=50000, help="Số variant teencode")
+    parser.add_argument("--keywords", type=int, default=100000, help="Số từ khóa spam")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        teencode_path, spam_path = make_resources(tmp, args.teencode, args.keywords, args.seed)
+        cases = [
+            ("TeencodeConverter (pipeline)", PipelineTeencodeConverter, teencode_path),
+            ("TeencodeConverter", TeencodeConverter, teencode_path),
+            ("SpamChecker", SpamChecker, spam_path),
+        ]
+        for name, cls, path in cases:
+            artifact = artifact_path(path, cls.ARTIFACT_KIND)
+
+            def from_json():
+                if os.path.exists(artifact):
+                    os.remove(artifact)
+                cls(path)
+
+            json_s = timed(from_json, args.repeat)
+            artifact_s = timed(lambda: cls(path), args.repeat)
+            print(f"{name:<30} | JSON + dựng {json_s:7.3f}s | artifact {artifact_s:7.3f}s "
+                  f"| x{json_s / max(artifact_s, 1e-9):.1f} | {os.path.getsize(artifact) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark SpamChecker so với cách cũ (duyệt từng từ khóa, `keyword in text`).
+SpamChecker chọn bộ dò theo số từ khóa (AHO_CORASICK_MIN_KEYWORDS): KeywordScan cho danh sách nhỏ
+như spamkeyword.json (~20 từ khóa), Aho–Corasick khi danh sách lớn.
+
+Chạy:  python benchmarks/bench_spam_checker.py --sizes 20 100 1000 10000 100000 --comments 2000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src", "Preprocess"))
+
+from spam_checker import SpamChecker  # noqa: E402
+
+SYLLABLES = ["mua", "bán", "giá", "rẻ", "inbox", "check", "ib", "link", "sale", "free", "tặng", "quà",
+             "đăng", "ký", "kênh", "sub", "like", "share", "zalo", "shop", "ship", "cod", "hàng", "xịn"]
+WORDS = ["hay", "quá", "video", "ko", "hiểu", "gì", "luôn", "cảm", "ơn", "bạn", "nhiều", "😂", "đỉnh",
+         "anh", "em", "xem", "lần", "thứ", "n", "rồi", "vẫn", "khóc", "first", "!!!", "?", "haha"]
+CATEGORIES = ["quang_cao", "lua_dao", "tuong_tac", "lien_ket"]
+
+
+def make_keywords(count: int, rng: random.Random) -> dict:
+    """Sinh `count` từ khóa 1-3 âm tiết (có hậu tố số để không trùng), chia đều cho các category."""
+    keywords = {category: [] for category in CATEGORIES}
+    for i in range(count):
+        words = [rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3))]
+        keyword = " ".join(words) if i < len(SYLLABLES) * 4 else f"{' '.join(words)}{i}"
+        keywords[CATEGORIES[i % len(CATEGORIES)]].append(keyword)
+    return keywords
+
+
+def make_comments(count: int, keywords: dict, rng: random.Random) -> list:
+    """Comment giả dài 5-40 từ, ~20% chèn 1-2 từ khóa spam."""
+    flat = [kw for kws in keywords.values() for kw in kws]
+    comments = []
+    for _ in range(count):
+        words = [rng.choice(WORDS + SYLLABLES) for _ in range(rng.randint(5, 40))]
+        if rng.random() < 0.2:
+            for _ in range(rng.randint(1, 2)):
+                words.insert(rng.randrange(len(words) + 1), rng.choice(flat).upper())
+        comments.append(" ".join(words))
+    return comments
+
+
+def check_text_reference(spam_keywords: dict, text: str) -> dict:
+    """Cách cũ: O(số từ khóa × độ dài văn bản)."""
+    if not text or not isinstance(text, str):
+        return {}
+    text_lower = text.lower()
+    found_spam = {}
+    for category, keywords in spam_keywords.items():
+        matched_keywords = [keyword for keyword in keywords if keyword.lower() in text_lower]
+        if matched_keywords:
+            found_spam[category] = matched_keywords
+    return found_spam
+
+
+def bench(size: int, comments_count: int, seed: int):
+    rng = random.Random(seed)
+    keywords = make_keywords(size, rng)
+    comments = make_comments(comments_count, keywords, rng)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "spamkeyword.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(keywords, f, ensure_ascii=False)
+
+        start = time.perf_counter()
+        checker = SpamChecker(path)
+        build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new = [checker.check_text(text) for text in comments]
+    new_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    old = [check_text_reference(keywords, text) for text in comments]
+    old_s = time.perf_counter() - start
+
+    assert new == old, "Kết quả SpamChecker khác cách cũ"
+    print(f"{size:>7} từ khóa | {type(checker.matcher).__name__:<11} | build {build_s:6.3f}s | cũ {old_s:7.3f}s | mới {new_s:6.3f}s "
+          f"| x{old_s / max(new_s, 1e-9):.1f} | {comments_count} comment")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SpamChecker")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 100, 1000, 10000, 100000])
+    parser.add_argument("--comments", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        bench(size, args.comments, args.seed)
+
+
+if __name__ == "__main__":
+    main()
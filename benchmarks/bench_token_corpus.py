@@ -0,0 +1,93 @@
+"""
+Benchmark corpus token memory-map (token_corpus.py) so với giữ processed_text dạng chuỗi:
+thời gian dựng corpus, thời gian mở, bộ nhớ (chuỗi Python + list token so với mảng id) và
+thời gian duyệt toàn bộ comment.
+
+Corpus: comment giả lập (generator.py), lower + tách khoảng trắng thay cho bước NLP (chỉ cần
+phân bố token gần thật). Các comment được lặp lại theo seed khác nhau tới đủ --rows.
+
+Chạy:  python benchmarks/bench_token_corpus.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src", "Preprocess"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generator import generate_comments  # noqa: E402
+from token_corpus import TokenCorpus, TokenCorpusWriter  # noqa: E402
+
+CHUNK = 100000
+
+
+def processed_chunks(rows: int, seed: int):
+    for start in range(0, rows, CHUNK):
+        n = min(CHUNK, rows - start)
+        texts = [" ".join(t.lower().split()) for t in generate_comments(n, seed + start) if isinstance(t, str)]
+        yield pd.Series(texts, index=pd.RangeIndex(start, start + len(texts)))
+
+
+def string_memory(texts) -> int:
+    """Bộ nhớ ước lượng khi giữ processed_text dạng chuỗi và dạng list token (như khi huấn luyện tách lại)."""
+    total = sys.getsizeof(texts)
+    for text in texts:
+        tokens = text.split()
+        total += sys.getsizeof(text) + sys.getsizeof(tokens) + sum(sys.getsizeof(t) for t in tokens)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark corpus token memory-map")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--min-freq", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Chỉ tính thời gian của writer, không tính thời gian sinh comment
+        build_s = 0.0
+        writer = TokenCorpusWriter(tmp)
+        sample = None
+        for chunk in processed_chunks(args.rows, args.seed):
+            if sample is None:
+                sample = chunk.tolist()
+            start = time.perf_counter()
+            writer.add(chunk)
+            build_s += time.perf_counter() - start
+        start = time.perf_counter()
+        meta = writer.close()
+        build_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        corpus = TokenCorpus(tmp, min_freq=args.min_freq)
+        open_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        n_tokens = sum(len(flat) for flat, _ in corpus.iter_batches(CHUNK))
+        scan_s = time.perf_counter() - start
+
+        # Bộ nhớ chuỗi đo trên chunk đầu rồi nhân theo tỉ lệ số comment
+        strings_mb = string_memory(sample) * meta["n_docs"] / len(sample) / 1e6
+        arrays_mb = (corpus.tokens.nbytes + corpus.offsets.nbytes + corpus.index.nbytes) / 1e6
+        disk_mb = sum(os.path.getsize(os.path.join(tmp, name)) for name in os.listdir(tmp)) / 1e6
+
+    print(f"{meta['n_docs']:,} comment, {meta['n_tokens']:,} token, từ vựng {meta['vocab_size']:,} "
+          f"({corpus.vocab_size:,} với min_freq={args.min_freq})")
+    print(f"Dựng corpus:       {build_s:8.2f}s ({meta['n_docs'] / build_s:,.0f} comment/s)")
+    print(f"Mở corpus:         {open_s * 1000:8.2f} ms")
+    print(f"Duyệt {n_tokens:,} token: {scan_s:8.3f}s")
+    print(f"Bộ nhớ: chuỗi + list token ~{strings_mb:,.0f} MB | mảng id {arrays_mb:,.0f} MB "
+          f"(x{strings_mb / max(arrays_mb, 1e-9):.1f} nhỏ hơn, chỉ phần được đọc mới nằm trong RAM) | "
+          f"trên đĩa {disk_mb:,.0f} MB")
+    assert n_tokens == meta["n_tokens"] and np.all(corpus.lengths() >= 0)
+
+
+if __name__ == "__main__":
+    main()
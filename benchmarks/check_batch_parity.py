@@ -0,0 +1,108 @@
+"""
+Kiểm tra parity của xử lý theo lô: process_many() (annotate + word_segment gom nhiều comment, ngăn cách
+bằng câu sentinel "BATCHSEPTOKEN .") phải cho kết quả giống hệt process() từng comment.
+
+Chạy:
+    # VnCoreNLP thật (cần Java), trên file crawl hoặc corpus giả lập
+    python benchmarks/check_batch_parity.py --input data.csv --sample 2000 --vncorenlp-dir path/to/vncorenlp
+    # Không cần Java: giả lập đúng định dạng output của py_vncorenlp
+    python benchmarks/check_batch_parity.py --offline --rows 5000
+
+--offline thay model JVM bằng PyVnCoreNLPFormat: annotate_text trả {0: [{'index', 'wordForm', 'posTag',
+'nerLabel', 'head', 'depLabel'}, ...], 1: [...]} và word_segment trả list câu như py_vncorenlp, rồi đi qua
+đúng adapter VnCoreNLPSegmenter mà pipeline dùng. Tách từ dựa trên từ điển vi_words.txt, câu sau dấu kết
+câu được nối vào câu trước nếu bắt đầu bằng chữ thường/số/dấu đóng (giống Tokenizer.joinSentences).
+Thoát với mã 1 nếu có comment khác kết quả.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from typing import Dict, List
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src", "Preprocess"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from data_preprocess import Config, TextPreprocessor  # noqa: E402
+from generator import generate_comments  # noqa: E402
+from segmenters import LongestMatchSegmenter, VnCoreNLPSegmenter  # noqa: E402
+
+
+class PyVnCoreNLPFormat:
+    """Model giả có cùng API và định dạng output với py_vncorenlp.VnCoreNLP (annotators wseg, pos)."""
+
+    _JOIN_FIRST_CHARS = ('”', "'", ')', '}', ']', ',')
+
+    def __init__(self, dict_path: str):
+        self._segmenter = LongestMatchSegmenter(dict_path)
+
+    def _sentences(self, text: str) -> List[List[Dict]]:
+        sentences = []
+        for sentence in self._segmenter.annotate_text(text)['sentences']:
+            first = sentence[0]['form'] if sentence else ''
+            if sentences and first and (first[0].islower() or first[0].isdigit()
+                                        or first[0] in self._JOIN_FIRST_CHARS):
+                sentences[-1].extend(sentence)
+            else:
+                sentences.append(list(sentence))
+        return sentences
+
+    def annotate_text(self, text: str) -> Dict[int, List[Dict]]:
+        return {
+            i: [{'index': k + 1, 'wordForm': token['form'], 'posTag': token['posTag'],
+                 'nerLabel': 'O', 'head': k, 'depLabel': 'dep'}
+                for k, token in enumerate(sentence)]
+            for i, sentence in enumerate(self._sentences(text))
+        }
+
+    def word_segment(self, text: str) -> List[str]:
+        return [' '.join(token['form'] for token in sentence) for sentence in self._sentences(text)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kiểm tra parity xử lý theo lô")
+    parser.add_argument("--input", help="File CSV có cột text (mặc định: corpus giả lập)")
+    parser.add_argument("--column", default="text")
+    parser.add_argument("--sample", type=int, default=2000, help="Số comment lấy ngẫu nhiên từ --input")
+    parser.add_argument("--rows", type=int, default=2000, help="Số comment giả lập khi không có --input")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=Config.NLP_BATCH_SIZE)
+    parser.add_argument("--offline", action="store_true", help="Giả lập định dạng py_vncorenlp, không cần Java")
+    parser.add_argument("--vncorenlp-dir", default=Config.VNCORENLP_DIR)
+    parser.add_argument("--dict", default=Config.SEGMENTER_DICT_FILE, help="Từ điển cho --offline")
+    parser.add_argument("--output", help="Ghi các comment khác kết quả ra file JSON")
+    args = parser.parse_args()
+
+    if args.input:
+        texts = pd.read_csv(args.input, usecols=[args.column])[args.column].tolist()
+        texts = random.Random(args.seed).sample(texts, min(args.sample, len(texts)))
+    else:
+        texts = generate_comments(args.rows, args.seed)
+
+    nlp = (VnCoreNLPSegmenter.wrap(PyVnCoreNLPFormat(args.dict)) if args.offline
+           else VnCoreNLPSegmenter(args.vncorenlp_dir))
+    failed = False
+    for single_pass in (False, True):
+        preprocessor = TextPreprocessor(args.vncorenlp_dir, Config.TEENCODE_FILE, single_pass=single_pass, nlp=nlp)
+        mismatches = preprocessor.compare_batch_modes(texts, batch_size=args.batch_size)
+        counters = preprocessor.pop_counters()
+        mode = "single-pass" if single_pass else "2 lượt"
+        print(f"{mode}: {len(mismatches)}/{len(texts)} comment khác kết quả, bộ đếm NLP: {counters}")
+        for item in mismatches[:5]:
+            print(f"  [{item['index']}] {item['text']!r}\n    từng comment: {item['single']!r}\n"
+                  f"    theo lô:      {item['batch']!r}")
+        if mismatches and args.output:
+            base, ext = os.path.splitext(args.output)
+            with open(f"{base}.{'single' if single_pass else 'two'}_pass{ext}", 'w', encoding='utf-8') as f:
+                json.dump(mismatches, f, ensure_ascii=False, indent=2)
+        failed = failed or bool(mismatches)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
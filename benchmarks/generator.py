@@ -0,0 +1,107 @@
+"""
+Sinh comment YouTube tiếng Việt giả lập (có seed) cho benchmark.
+
+Phân bố gần với dữ liệu crawl thật: đa số comment ngắn, một phần dài; có teencode (lấy từ
+teencode.json), ký tự lặp ("quáaaa"), chuỗi dấu câu ("!!!"), URL, emoji, từ khóa spam (lấy từ
+spamkeyword.json), tên riêng viết hoa, số, dòng rỗng và comment trùng lặp (copy/paste, "first").
+
+Chạy:  python benchmarks/generator.py --rows 20 --seed 1
+"""
+import argparse
+import json
+import os
+import random
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESOURCE_DIR = os.path.join(ROOT, "src", "Preprocess")
+
+WORDS = [
+    "video", "hay", "quá", "cảm", "ơn", "bạn", "nhiều", "xem", "lần", "thứ", "mấy", "rồi", "vẫn", "thấy",
+    "đỉnh", "thật", "sự", "anh", "em", "chị", "mình", "nghe", "bài", "này", "mỗi", "ngày", "luôn", "ạ",
+    "hát", "giọng", "ấm", "cute", "xỉu", "cười", "đau", "bụng", "khóc", "buồn", "vui", "thích", "ghét",
+    "tại", "sao", "lại", "như", "vậy", "được", "không", "có", "ai", "đây", "nữa", "đi", "học", "làm",
+    "năm", "sau", "nhớ", "kênh", "ra", "clip", "mới", "nhé", "đừng", "bỏ", "cuộc", "tuyệt", "vời",
+]
+NAMES = ["Hà Nội", "Sài Gòn", "Sơn Tùng", "Việt Nam", "Đà Nẵng", "Mỹ Tâm", "Jack", "YouTube", "TikTok"]
+EMOJIS = ["😂", "🤣", "❤️", "👍", "🔥", "🥰", "😭", "🙏", "😍", "💯", "👏", "😡", "🤡", "🇻🇳", "👍🏻"]
+URLS = ["https://youtu.be/dQw4w9WgXcQ", "http://bit.ly/abc123", "www.shopee.vn/sale", "https://fb.com/groups/123"]
+PUNCT = ["!", "!!!", "?", "??", "...", ".", ",", " :))", " =))", " :v"]
+POPULAR = ["first", "Ai nghe năm 2025 điểm danh", "hay quá", "❤️❤️❤️", "Đỉnh", "Nghe hoài không chán"]
+LENGTHS = [1, 2, 3, 4, 5, 6, 8, 10, 12, 15, 20, 30, 50, 80]
+
+
+def _load_json(name: str) -> Dict[str, List[str]]:
+    path = os.path.join(RESOURCE_DIR, name)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class CommentGenerator:
+    """Sinh comment giả lập, cùng seed => cùng corpus."""
+
+    def __init__(self, seed: int = 42, teencode: Optional[Dict[str, List[str]]] = None,
+                 spam_keywords: Optional[Dict[str, List[str]]] = None):
+        self.rng = random.Random(seed)
+        teencode = _load_json("teencode.json") if teencode is None else teencode
+        spam_keywords = _load_json("spamkeyword.json") if spam_keywords is None else spam_keywords
+        self.teencode_variants = [variant for variants in teencode.values() for variant in variants] or ["ko"]
+        self.spam_keywords = [kw for kws in spam_keywords.values() for kw in kws] or ["mua ngay"]
+
+    def _word(self) -> str:
+        rng = self.rng
+        r = rng.random()
+        if r < 0.18:
+            return rng.choice(self.teencode_variants)
+        if r < 0.22:
+            return rng.choice(NAMES)
+        if r < 0.25:
+            return str(rng.randint(1, 2025))
+        word = rng.choice(WORDS)
+        if rng.random() < 0.05:
+            # Ký tự lặp kiểu "quáaaaa"
+            word += word[-1] * rng.randint(2, 6)
+        if rng.random() < 0.08:
+            word = word.capitalize() if rng.random() < 0.7 else word.upper()
+        return word
+
+    def comment(self) -> Optional[str]:
+        rng = self.rng
+        r = rng.random()
+        if r < 0.01:
+            return rng.choice(["", "   ", None])
+        if r < 0.06:
+            return rng.choice(POPULAR)
+
+        parts = [self._word() for _ in range(rng.choice(LENGTHS))]
+        if rng.random() < 0.35:
+            for _ in range(rng.randint(1, 4)):
+                parts.insert(rng.randrange(len(parts) + 1), rng.choice(EMOJIS) * rng.choice([1, 1, 2, 3]))
+        if rng.random() < 0.04:
+            parts.insert(rng.randrange(len(parts) + 1), rng.choice(self.spam_keywords))
+        if rng.random() < 0.03:
+            parts.append(rng.choice(URLS))
+        if rng.random() < 0.01:
+            parts.append("k" * rng.randint(16, 30))   # Từ dài bất thường
+        text = " ".join(parts)
+        if rng.random() < 0.5:
+            text += rng.choice(PUNCT)
+        return text[0].upper() + text[1:] if rng.random() < 0.4 and text else text
+
+    def generate(self, rows: int) -> List[Optional[str]]:
+        return [self.comment() for _ in range(rows)]
+
+
+def generate_comments(rows: int, seed: int = 42) -> List[Optional[str]]:
+    return CommentGenerator(seed).generate(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sinh comment giả lập")
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    for text in generate_comments(args.rows, args.seed):
+        print(repr(text))
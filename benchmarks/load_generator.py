@@ -0,0 +1,129 @@
+"""
+Tạo tải cho preprocess_service.py: gửi comment giả lập (generator.py) tới POST /preprocess,
+in p50/p95/p99 độ trễ, thông lượng và số request bị từ chối (503) / quá hạn (504).
+
+Chạy:
+    python benchmarks/load_generator.py --url http://localhost:8080 --concurrency 64 --requests 20000
+    python benchmarks/load_generator.py --rate 500 --duration 30     # tải mở: 500 request/s cố định
+
+--concurrency: số client gửi liên tục (tải đóng, request sau đi ngay khi request trước xong).
+--rate: gửi đều theo tốc độ cố định bất kể service trả lời nhanh hay chậm (tải mở), thấy rõ backpressure.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generator import generate_comments  # noqa: E402
+
+
+def percentile(ordered: List[float], q: float) -> Optional[float]:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else None
+
+
+class LoadGenerator:
+    def __init__(self, url: str, texts: List, timeout: float):
+        from tornado.httpclient import AsyncHTTPClient
+
+        self.url = url.rstrip("/") + "/preprocess"
+        self.texts = [t if isinstance(t, str) else "" for t in texts]
+        self.timeout = timeout
+        self.client = AsyncHTTPClient(force_instance=True, max_clients=1000)
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+        self.filtered: Counter = Counter()
+
+    async def _send(self, i: int):
+        body = json.dumps({"text": self.texts[i % len(self.texts)]}, ensure_ascii=False)
+        start = time.perf_counter()
+        try:
+            response = await self.client.fetch(self.url, method="POST", body=body, raise_error=False,
+                                               request_timeout=self.timeout,
+                                               headers={"Content-Type": "application/json"})
+            status = response.code
+            if status == 200:
+                self.filtered[json.loads(response.body).get("filtered") or "ok"] += 1
+        except Exception:
+            status = "error"
+        self.statuses[status] += 1
+        if status == 200:
+            self.latencies.append(time.perf_counter() - start)
+
+    async def run_closed(self, concurrency: int, total: int):
+        counter = iter(range(total))
+
+        async def client():
+            for i in counter:
+                await self._send(i)
+
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+
+    async def run_open(self, rate: float, duration: float):
+        tasks = []
+        start = time.perf_counter()
+        i = 0
+        while time.perf_counter() - start < duration:
+            tasks.append(asyncio.ensure_future(self._send(i)))
+            i += 1
+            # Lịch gửi cố định theo thời gian, không phụ thuộc response
+            await asyncio.sleep(max(0.0, start + i / rate - time.perf_counter()))
+        await asyncio.gather(*tasks)
+
+    def report(self, elapsed: float) -> Dict:
+        ordered = sorted(self.latencies)
+        ms = lambda q: round(percentile(ordered, q) * 1000, 2) if ordered else None  # noqa: E731
+        total = sum(self.statuses.values())
+        return {
+            "requests": total,
+            "ok": len(ordered),
+            "elapsed_seconds": round(elapsed, 3),
+            "throughput_rps": round(len(ordered) / elapsed, 1) if elapsed > 0 else None,
+            "latency_ms": {"p50": ms(0.50), "p95": ms(0.95), "p99": ms(0.99),
+                           "max": round(ordered[-1] * 1000, 2) if ordered else None},
+            "status": {str(k): v for k, v in self.statuses.items()},
+            "filtered": dict(self.filtered),
+        }
+
+
+async def main_async(args) -> Dict:
+    generator = LoadGenerator(args.url, generate_comments(args.corpus_size, args.seed), args.timeout)
+    start = time.perf_counter()
+    if args.rate:
+        await generator.run_open(args.rate, args.duration)
+    else:
+        await generator.run_closed(args.concurrency, args.requests)
+    return generator.report(time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tạo tải cho preprocess service")
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--rate", type=float, help="Request/giây (tải mở); bỏ trống = tải đóng theo --concurrency")
+    parser.add_argument("--duration", type=float, default=30.0, help="Số giây chạy khi dùng --rate")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--corpus-size", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Ghi kết quả JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    lat = report["latency_ms"]
+    print(f"{report['ok']}/{report['requests']} request OK trong {report['elapsed_seconds']}s "
+          f"({report['throughput_rps']} req/s)")
+    print(f"Độ trễ: p50 {lat['p50']}ms, p95 {lat['p95']}ms, p99 {lat['p99']}ms, max {lat['max']}ms")
+    print(f"Mã trả về: {report['status']}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Bộ benchmark tiền xử lý: đo filter_noise, từng bước trong process, SpamChecker, TeencodeConverter
+trên corpus giả lập (benchmarks/generator.py) ở nhiều kích thước, ghi kết quả ra JSON và so với baseline.
+
+Chạy:
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 100000 --output results.json
+    python benchmarks/run_benchmarks.py --baseline baseline.json          # báo chậm đi > 15%
+    python benchmarks/run_benchmarks.py --segmenter vncorenlp --vncorenlp-dir path/to/vncorenlp
+    python benchmarks/run_benchmarks.py --segmenter longest_match
+
+--segmenter stub (mặc định) thay VnCoreNLP bằng segmenter giả tách theo khoảng trắng: không cần JVM,
+đo được toàn bộ phần Python quanh NLP. --segmenter vncorenlp / longest_match dùng bộ tách từ thật
+(segmenters.py).
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src", "Preprocess"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from data_preprocess import Config, DataPipeline, TextPreprocessor  # noqa: E402
+from generator import generate_comments  # noqa: E402
+from segmenters import SEGMENTERS, create_segmenter  # noqa: E402
+from spam_checker import SpamChecker  # noqa: E402
+from teencode_converter import TeencodeConverter as StandaloneTeencodeConverter  # noqa: E402
+
+
+class BenchConfig(Config):
+    USE_CACHE = False
+    HOT_RELOAD = False
+
+
+class StubSegmenter:
+    """Thay VnCoreNLP: tách câu theo . ! ?, tách từ theo khoảng trắng, từ viết hoa gán nhãn Np."""
+
+    _EOS = {'.', '!', '?'}
+
+    def annotate_text(self, text: str) -> Dict:
+        sentences, current = [], []
+        for token in text.split():
+            current.append({'index': len(current) + 1, 'form': token,
+                            'posTag': 'Np' if token[:1].isupper() else 'N'})
+            if token in self._EOS:
+                sentences.append(current)
+                current = []
+        if current:
+            sentences.append(current)
+        return {'sentences': sentences}
+
+    def word_segment(self, text: str) -> str:
+        return text
+
+
+def best_of(func: Callable[[], Dict[str, float]], repeat: int) -> Dict[str, float]:
+    """Chạy func `repeat` lần, giữ lần có tổng thời gian ('total') nhỏ nhất."""
+    best = None
+    for _ in range(repeat):
+        result = func()
+        if best is None or result['total'] < best['total']:
+            best = result
+    return best
+
+
+def timed(func: Callable[[], object]) -> Dict[str, float]:
+    start = time.perf_counter()
+    func()
+    return {'total': time.perf_counter() - start}
+
+
+def bench_size(texts: List, pipeline: DataPipeline, preprocessor: TextPreprocessor,
+               spam_checker: SpamChecker, standalone_teencode: StandaloneTeencodeConverter,
+               repeat: int, batch_size: int) -> Dict[str, float]:
+    """Trả về {tên phép đo: số giây} cho 1 corpus."""
+    df = pd.DataFrame({'text': texts})
+    valid = [t for t in texts if isinstance(t, str)]
+    pipeline_teencode = preprocessor.teencode_converter
+
+    def process_steps():
+        timings = {}
+        start = time.perf_counter()
+        preprocessor.process_many(texts, batch_size=batch_size, timings=timings)
+        timings['total'] = time.perf_counter() - start
+        return timings
+
+    measurements = {
+        'filter_noise': best_of(lambda: timed(lambda: pipeline.filter_noise(df)), repeat),
+        'spam_checker.check_text': best_of(lambda: timed(lambda: [spam_checker.check_text(t) for t in valid]), repeat),
+        'spam_checker.score_many': best_of(lambda: timed(lambda: spam_checker.score_many(texts)), repeat),
+        'teencode.pipeline': best_of(lambda: timed(lambda: [pipeline_teencode.replace(t) for t in valid]), repeat),
+        'teencode.standalone': best_of(lambda: timed(lambda: [standalone_teencode.replace(t) for t in valid]), repeat),
+        'process': best_of(lambda: timed(lambda: [preprocessor.process(t) for t in texts]), repeat),
+    }
+    steps = best_of(process_steps, repeat)
+    measurements['process_many'] = {'total': steps.pop('total')}
+    for name, sec in steps.items():
+        measurements[f'process_many.{name}'] = {'total': sec}
+    return {name: m['total'] for name, m in measurements.items()}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float, min_seconds: float) -> List[str]:
+    """
+    In bảng so sánh với baseline, trả về danh sách phép đo chậm đi quá tolerance.
+    Phép đo baseline ngắn hơn min_seconds chỉ in ra, không tính là chậm đi (nhiễu đo quá lớn).
+    """
+    regressions = []
+    print(f"\nSo với baseline ({baseline['meta'].get('commit', '?')}, ngưỡng +{tolerance:.0%}):")
+    for size, metrics in results['results'].items():
+        base_metrics = baseline['results'].get(size, {})
+        for name, current in metrics.items():
+            base = base_metrics.get(name)
+            if not base:
+                continue
+            ratio = current['seconds'] / base['seconds']
+            flag = ""
+            if ratio > 1 + tolerance and base['seconds'] >= min_seconds:
+                flag = "  <-- CHẬM HƠN"
+                regressions.append(f"{size}/{name}")
+            print(f"  {size:>8} {name:<32} {base['seconds']:9.4f}s -> {current['seconds']:9.4f}s  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tiền xử lý")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3, help="Số lần chạy mỗi phép đo (lấy nhanh nhất)")
+    parser.add_argument("--segmenter", choices=["stub", *SEGMENTERS], default="stub")
+    parser.add_argument("--vncorenlp-dir", default=Config.VNCORENLP_DIR)
+    parser.add_argument("--batch-size", type=int, default=Config.NLP_BATCH_SIZE)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="File JSON kết quả cũ để so sánh")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Chậm hơn baseline bao nhiêu thì báo lỗi")
+    parser.add_argument("--min-seconds", type=float, default=0.01,
+                        help="Bỏ qua phép đo baseline ngắn hơn mức này khi xét chậm đi")
+    args = parser.parse_args()
+
+    nlp = (StubSegmenter() if args.segmenter == "stub"
+           else create_segmenter(args.segmenter, args.vncorenlp_dir, BenchConfig.SEGMENTER_DICT_FILE,
+                                 BenchConfig.SEGMENTER_ADDRESS))
+    preprocessor = TextPreprocessor(args.vncorenlp_dir, BenchConfig.TEENCODE_FILE, nlp=nlp)
+    pipeline = DataPipeline(BenchConfig)
+    spam_checker = SpamChecker(BenchConfig.SPAM_KEYWORDS_FILE)
+    standalone_teencode = StandaloneTeencodeConverter(BenchConfig.TEENCODE_FILE)
+
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'segmenter': args.segmenter,
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'batch_size': args.batch_size,
+        },
+        'results': {},
+    }
+    for size in args.sizes:
+        texts = generate_comments(size, args.seed)
+        seconds = bench_size(texts, pipeline, preprocessor, spam_checker, standalone_teencode,
+                             args.repeat, args.batch_size)
+        results['results'][str(size)] = {
+            name: {'seconds': round(sec, 6), 'rows_per_sec': round(size / sec, 1) if sec > 0 else None}
+            for name, sec in seconds.items()
+        }
+        print(f"\n== {size:,} comment ==")
+        for name, metric in results['results'][str(size)].items():
+            print(f"  {name:<32} {metric['seconds']:9.4f}s  {metric['rows_per_sec'] or 0:>14,.0f} dòng/s")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\nĐã ghi kết quả: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.min_seconds)
+        if regressions:
+            print(f"\n{len(regressions)} phép đo chậm hơn baseline: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,527 @@
+"""
+Huấn luyện baseline phân loại comment độc hại trên CPU, chỉ dùng NumPy/SciPy: Multinomial Naive Bayes và
+Logistic Regression (softmax, mini-batch AdaGrad) trên đặc trưng hashed n-gram của featurizer.py.
+
+Luồng:
+1. `build_feature_cache`: đọc file output của DataPipeline (processed_text + cột nhãn) theo chunk, featurize
+   song song (HashingFeaturizer.transform_stream) và ghi ma trận CSR nối liền ra đĩa (.npy, float32/int32).
+2. `FeatureCache` mở cache bằng memory-map: các process cross-validation dùng chung page cache, không
+   process nào phải copy toàn bộ ma trận.
+3. `cross_validate`: k fold chạy song song trên process pool (mỗi fold 1 process), mỗi fold train NB + LR
+   và trả về metric validation, thời gian fit NB và thời gian từng epoch LR.
+4. Train NB + LR trên toàn bộ dữ liệu và lưu vào models/ (featurizer.json, idf.npy, nb.npz, lr.npz, model.json).
+
+Nhãn lấy từ 1 cột của file input (vd thêm cột nhãn qua Config.OUTPUT_EXTRA_COLUMNS); dòng thiếu nhãn bị bỏ.
+Nhãn được đọc dạng chuỗi và sắp xếp để làm danh sách lớp (classes).
+
+Thời gian (benchmarks/bench_baseline_classifier.py, ~1M comment giả lập có nhãn, 1 core CPU): featurize + dựng
+cache ~106s (2 lượt đọc CSV: idf + transform), fit NB ~3s, LR ~13s/epoch (~60k comment/s); tổng ~2.5 phút.
+
+Chạy:
+    python src/Model/baseline_classifier.py --input labeled_preprocess.csv --label-column label \
+        --output models/baseline --folds 5 --workers 4 --epochs 3
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Preprocess"))
+
+from columnar_io import detect_format, iter_table  # noqa: E402
+from encoding_detector import detect_encoding  # noqa: E402
+from featurizer import HashingFeaturizer  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MODELS_DIR = os.path.join(ROOT, "models")
+# Số dòng mỗi lần duyệt ma trận khi fit NB / dự đoán (giới hạn bộ nhớ tạm)
+_BLOCK_ROWS = 100000
+
+
+# --- Đọc dữ liệu có nhãn ---
+
+def iter_labeled_text(path: str, label_column: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """
+    Đọc processed_text + cột nhãn của file output CSV / Parquet / Arrow theo chunk. Nhãn được chuyển thành
+    chuỗi; dòng thiếu nhãn (NaN / rỗng) bị bỏ.
+    """
+    columns = ["processed_text", label_column]
+    fmt = detect_format(path)
+    if fmt != "csv":
+        chunks = iter_table(path, chunksize, columns=columns, fmt=fmt)
+    else:
+        encoding = detect_encoding(path).encoding
+        reader = pd.read_csv(path, encoding=encoding, index_col=0, chunksize=chunksize,
+                             dtype={"processed_text": str, label_column: str}, keep_default_na=False)
+        chunks = (chunk for chunk in reader)
+    for chunk in chunks:
+        if label_column not in chunk.columns:
+            raise ValueError(f"Không có cột nhãn '{label_column}' trong {path}")
+        labels = chunk[label_column]
+        labels = labels.where(labels.isna(), labels.astype(str).str.strip())
+        keep = labels.notna() & (labels != "")
+        yield pd.DataFrame({"processed_text": chunk["processed_text"].fillna("").astype(str)[keep],
+                            "label": labels[keep]})
+
+
+# --- Cache đặc trưng trên đĩa ---
+
+def _raw_to_npy(raw_path: str, npy_path: str, dtype, length: int, block: int = 1 << 24):
+    """Chép file nhị phân thô (ghi nối bằng tofile) sang .npy theo từng khối, rồi xoá file thô."""
+    out = np.lib.format.open_memmap(npy_path, mode="w+", dtype=dtype, shape=(length,))
+    if length:
+        raw = np.memmap(raw_path, dtype=dtype, mode="r")
+        for start in range(0, length, block):
+            out[start:start + block] = raw[start:start + block]
+        del raw
+    out.flush()
+    del out
+    os.remove(raw_path)
+
+
+class FeatureCacheWriter:
+    """Ghi nối các chunk CSR (data float32, indices int32) ra file tạm; `close()` đổi sang .npy + meta.json."""
+
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+        os.makedirs(out_dir, exist_ok=True)
+        self._data = open(os.path.join(out_dir, "data.raw"), "wb")
+        self._indices = open(os.path.join(out_dir, "indices.raw"), "wb")
+        self._row_nnz: List[np.ndarray] = []
+        self._labels: List[np.ndarray] = []
+        self.n_rows = 0
+        self.nnz = 0
+
+    def add(self, matrix: sp.csr_matrix, labels: np.ndarray):
+        matrix.data.astype(np.float32).tofile(self._data)
+        matrix.indices.astype(np.int32).tofile(self._indices)
+        self._row_nnz.append(np.diff(matrix.indptr))
+        self._labels.append(np.asarray(labels, dtype=object))
+        self.n_rows += matrix.shape[0]
+        self.nnz += matrix.nnz
+
+    def close(self, meta: Dict) -> Dict:
+        self._data.close()
+        self._indices.close()
+        _raw_to_npy(self._data.name, os.path.join(self.out_dir, "data.npy"), np.float32, self.nnz)
+        _raw_to_npy(self._indices.name, os.path.join(self.out_dir, "indices.npy"), np.int32, self.nnz)
+        indptr = np.zeros(self.n_rows + 1, dtype=np.int64)
+        if self._row_nnz:
+            np.cumsum(np.concatenate(self._row_nnz), out=indptr[1:])
+        np.save(os.path.join(self.out_dir, "indptr.npy"), indptr)
+
+        raw_labels = np.concatenate(self._labels) if self._labels else np.zeros(0, dtype=object)
+        codes, classes = pd.factorize(raw_labels, sort=True)
+        np.save(os.path.join(self.out_dir, "labels.npy"), codes.astype(np.int64))
+        meta = {**meta, "n_rows": self.n_rows, "nnz": self.nnz, "classes": [str(c) for c in classes],
+                "class_counts": np.bincount(codes, minlength=len(classes)).tolist()}
+        with open(os.path.join(self.out_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        return meta
+
+
+def _source_stamp(path: str) -> Dict:
+    stat = os.stat(path)
+    return {"source": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def build_feature_cache(source: str, label_column: str, featurizer: HashingFeaturizer, cache_dir: str,
+                        chunksize: int = 20000, workers: int = 1) -> Dict:
+    """
+    Featurize file output có nhãn và ghi cache CSR vào cache_dir. Nếu featurizer dùng idf thì fit idf trước
+    (thêm 1 lượt đọc; idf tính trên cả corpus, không dùng nhãn).
+
+    Returns:
+        meta của cache
+    """
+    start = time.perf_counter()
+    if featurizer.use_idf:
+        featurizer.fit(chunk["processed_text"].tolist()
+                       for chunk in iter_labeled_text(source, label_column, chunksize))
+        logging.info(f"Đã tính idf trên {featurizer.n_docs_fitted} comment ({time.perf_counter() - start:.1f}s)")
+
+    # transform_stream đọc trước vài chunk; nhãn xếp hàng theo đúng thứ tự chunk được gửi đi
+    pending_labels = deque()
+
+    def texts():
+        for chunk in iter_labeled_text(source, label_column, chunksize):
+            pending_labels.append(chunk["label"].to_numpy())
+            yield chunk["processed_text"].tolist()
+
+    writer = FeatureCacheWriter(cache_dir)
+    for matrix in featurizer.transform_stream(texts(), workers=workers):
+        writer.add(matrix, pending_labels.popleft())
+    featurizer.save(cache_dir)
+    meta = writer.close({**_source_stamp(source), "label_column": label_column,
+                         "featurizer": {**featurizer.params(), "n_docs_fitted": featurizer.n_docs_fitted}})
+    elapsed = time.perf_counter() - start
+    logging.info(f"Đã dựng cache đặc trưng: {meta['n_rows']} comment, {meta['nnz']} phần tử khác 0, "
+                 f"{len(meta['classes'])} lớp -> {cache_dir} ({elapsed:.1f}s, "
+                 f"{meta['n_rows'] / max(elapsed, 1e-9):,.0f} comment/s)")
+    return meta
+
+
+def cache_is_current(cache_dir: str, source: str, label_column: str, featurizer: HashingFeaturizer) -> bool:
+    """Cache đã dựng từ đúng file nguồn (cùng kích thước, mtime), cột nhãn và tham số featurizer."""
+    meta_path = os.path.join(cache_dir, "meta.json")
+    if not os.path.exists(meta_path):
+        return False
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    params = json.loads(json.dumps(featurizer.params()))    # tuple -> list như trong JSON
+    cached = {key: value for key, value in meta.get("featurizer", {}).items() if key != "n_docs_fitted"}
+    stamp = _source_stamp(source)
+    return (all(meta.get(key) == value for key, value in stamp.items())
+            and meta.get("label_column") == label_column and cached == params)
+
+
+class FeatureCache:
+    """Cache CSR mở bằng memory-map; `X` là csr_matrix trỏ thẳng vào file, không copy data/indices."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        data = np.load(os.path.join(path, "data.npy"), mmap_mode="r")
+        indices = np.load(os.path.join(path, "indices.npy"), mmap_mode="r")
+        indptr = np.load(os.path.join(path, "indptr.npy"))
+        # scipy ép indices và indptr về cùng dtype: giữ int32 (nếu vừa) để indices không bị copy
+        if self.meta["nnz"] < np.iinfo(np.int32).max:
+            indptr = indptr.astype(np.int32)
+        self.X = sp.csr_matrix((data, indices, indptr), shape=(self.meta["n_rows"],
+                                                               self.meta["featurizer"]["n_features"]), copy=False)
+        self.y = np.load(os.path.join(path, "labels.npy"))
+        self.classes: List[str] = self.meta["classes"]
+
+    @property
+    def n_classes(self) -> int:
+        return len(self.classes)
+
+    def featurizer(self) -> HashingFeaturizer:
+        return HashingFeaturizer.load(self.path)
+
+
+# --- Model ---
+
+class MultinomialNB:
+    """Multinomial Naive Bayes: 1 lượt cộng đặc trưng theo lớp (ma trận one-hot thưa nhân CSR)."""
+
+    def __init__(self, alpha: float = 0.01):
+        self.alpha = alpha
+        self.feature_log_prob: Optional[np.ndarray] = None    # (lớp, n_features)
+        self.class_log_prior: Optional[np.ndarray] = None
+
+    def fit(self, X: sp.csr_matrix, y: np.ndarray, n_classes: int,
+            rows: Optional[np.ndarray] = None) -> "MultinomialNB":
+        rows = np.arange(X.shape[0]) if rows is None else rows
+        feature_count = np.zeros((n_classes, X.shape[1]), dtype=np.float64)
+        class_count = np.zeros(n_classes, dtype=np.float64)
+        for start in range(0, len(rows), _BLOCK_ROWS):
+            block = rows[start:start + _BLOCK_ROWS]
+            labels = y[block]
+            onehot = sp.csr_matrix((np.ones(len(block)), (labels, np.arange(len(block)))),
+                                   shape=(n_classes, len(block)))
+            feature_count += (onehot @ X[block]).toarray()
+            class_count += np.bincount(labels, minlength=n_classes)
+        smoothed = feature_count + self.alpha
+        self.feature_log_prob = np.log(smoothed) - np.log(smoothed.sum(axis=1, keepdims=True))
+        with np.errstate(divide="ignore"):
+            self.class_log_prior = np.log(class_count / max(class_count.sum(), 1.0))
+        return self
+
+    def decision_function(self, X: sp.csr_matrix) -> np.ndarray:
+        return np.asarray(X @ self.feature_log_prob.T) + self.class_log_prior
+
+
+class LogisticRegressionSGD:
+    """
+    Logistic regression softmax, mini-batch AdaGrad (bước học riêng cho từng trọng số, hợp với đặc trưng
+    thưa). Mỗi batch chỉ cập nhật các cột đặc trưng xuất hiện trong batch; L2 cũng chỉ áp lên các cột đó.
+
+    initial_accumulator: giá trị khởi tạo của tổng bình phương gradient. Với 0, bước đầu tiên của mọi trọng số
+    đều dài đúng learning_rate bất kể gradient lớn nhỏ, nên n-gram hiếm (phần lớn cột hash) học thuộc ngay
+    các comment nhãn nhiễu; khởi tạo > 0 làm bước đầu tỉ lệ với gradient.
+    """
+
+    def __init__(self, n_epochs: int = 3, batch_size: int = 1024, learning_rate: float = 2.0,
+                 alpha: float = 1e-6, initial_accumulator: float = 1e-4, seed: int = 42):
+        self.n_epochs = n_epochs
+        self.batch_size = batch_size
+        self.learning_rate = learning_rate
+        self.alpha = alpha
+        self.initial_accumulator = initial_accumulator
+        self.seed = seed
+        self.coef: Optional[np.ndarray] = None         # (n_features, lớp)
+        self.intercept: Optional[np.ndarray] = None
+        self.history: List[Dict] = []
+
+    def _step(self, Xb: sp.csr_matrix, yb: np.ndarray, mark: np.ndarray, position: np.ndarray,
+              grad_sq: np.ndarray, intercept_sq: np.ndarray) -> float:
+        # Đánh lại số các cột có mặt trong batch về 0..m-1 (đánh dấu + flatnonzero, không cần sort)
+        mark[Xb.indices] = True
+        cols = np.flatnonzero(mark)
+        mark[cols] = False
+        position[cols] = np.arange(len(cols), dtype=np.int32)
+        Xc = sp.csr_matrix((Xb.data, position[Xb.indices], Xb.indptr), shape=(Xb.shape[0], len(cols)))
+
+        weights = self.coef[cols]
+        z = np.asarray(Xc @ weights) + self.intercept
+        z -= z.max(axis=1, keepdims=True)
+        prob = np.exp(z)
+        prob /= prob.sum(axis=1, keepdims=True)
+        rows = np.arange(len(yb))
+        loss = -np.log(np.maximum(prob[rows, yb], 1e-12)).sum()
+
+        prob[rows, yb] -= 1.0
+        prob /= len(yb)
+        grad = np.asarray(Xc.T @ prob) + self.alpha * weights
+        grad_b = prob.sum(axis=0)
+        grad_sq[cols] += grad * grad
+        intercept_sq += grad_b * grad_b
+        self.coef[cols] = weights - self.learning_rate * grad / (np.sqrt(grad_sq[cols]) + 1e-12)
+        self.intercept -= self.learning_rate * grad_b / (np.sqrt(intercept_sq) + 1e-12)
+        return float(loss)
+
+    def fit(self, X: sp.csr_matrix, y: np.ndarray, n_classes: int, rows: Optional[np.ndarray] = None,
+            val_rows: Optional[np.ndarray] = None) -> "LogisticRegressionSGD":
+        """
+        Args:
+            X, y: Toàn bộ ma trận đặc trưng và nhãn (mã lớp)
+            n_classes: Số lớp
+            rows: Các dòng dùng để train (mặc định: tất cả)
+            val_rows: Các dòng validation, đánh giá sau mỗi epoch (không tính vào thời gian epoch)
+        """
+        rows = np.arange(X.shape[0]) if rows is None else rows
+        n_features = X.shape[1]
+        rng = np.random.default_rng(self.seed)
+        self.coef = np.zeros((n_features, n_classes), dtype=np.float64)
+        self.intercept = np.zeros(n_classes, dtype=np.float64)
+        grad_sq = np.full_like(self.coef, self.initial_accumulator)
+        intercept_sq = np.full(n_classes, self.initial_accumulator)
+        mark = np.zeros(n_features, dtype=bool)
+        position = np.zeros(n_features, dtype=np.int32)
+        self.history = []
+
+        for epoch in range(1, self.n_epochs + 1):
+            start = time.perf_counter()
+            order = rng.permutation(rows)
+            total_loss = 0.0
+            for batch_start in range(0, len(order), self.batch_size):
+                batch = np.sort(order[batch_start:batch_start + self.batch_size])
+                total_loss += self._step(X[batch], y[batch], mark, position, grad_sq, intercept_sq)
+            record = {"epoch": epoch, "seconds": time.perf_counter() - start,
+                      "train_loss": total_loss / max(len(rows), 1)}
+            if val_rows is not None and len(val_rows):
+                record.update(classification_metrics(y[val_rows], predict(self, X, val_rows), n_classes))
+            self.history.append(record)
+            logging.info(f"  LR epoch {epoch}/{self.n_epochs}: {record['seconds']:.1f}s, "
+                         f"loss={record['train_loss']:.4f}"
+                         + (f", val macro_f1={record['macro_f1']:.4f}" if "macro_f1" in record else ""))
+        return self
+
+    def decision_function(self, X: sp.csr_matrix) -> np.ndarray:
+        return np.asarray(X @ self.coef) + self.intercept
+
+
+def predict(model, X: sp.csr_matrix, rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """Mã lớp dự đoán của các dòng `rows` (mặc định: tất cả), tính theo khối."""
+    rows = np.arange(X.shape[0]) if rows is None else rows
+    out = np.empty(len(rows), dtype=np.int64)
+    for start in range(0, len(rows), _BLOCK_ROWS):
+        block = rows[start:start + _BLOCK_ROWS]
+        out[start:start + len(block)] = model.decision_function(X[block]).argmax(axis=1)
+    return out
+
+
+def classification_metrics(y_true: np.ndarray, y_pred: np.ndarray, n_classes: int) -> Dict:
+    """accuracy, macro F1 và F1 từng lớp (từ ma trận nhầm lẫn)."""
+    confusion = np.bincount(y_true * n_classes + y_pred, minlength=n_classes * n_classes).reshape(n_classes, n_classes)
+    tp = np.diag(confusion).astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.nan_to_num(tp / confusion.sum(axis=0))
+        recall = np.nan_to_num(tp / confusion.sum(axis=1))
+        f1 = np.nan_to_num(2 * precision * recall / (precision + recall))
+    return {"accuracy": float(tp.sum() / max(len(y_true), 1)), "macro_f1": float(f1.mean()), "f1": f1.tolist()}
+
+
+# --- Cross-validation song song ---
+
+def fold_indices(n_rows: int, n_folds: int, seed: int = 42) -> List[np.ndarray]:
+    """Chia ngẫu nhiên (có seed) các dòng thành n_folds phần, mỗi phần đã sort."""
+    perm = np.random.default_rng(seed).permutation(n_rows)
+    return [np.sort(fold) for fold in np.array_split(perm, n_folds)]
+
+
+def _run_fold(cache_dir: str, fold: int, n_folds: int, seed: int, nb_params: Dict, lr_params: Dict) -> Dict:
+    """Train + đánh giá 1 fold (chạy trong process con, tự mở cache bằng memory-map)."""
+    cache = FeatureCache(cache_dir)
+    folds = fold_indices(len(cache.y), n_folds, seed)
+    val = folds[fold]
+    train = np.sort(np.concatenate([rows for i, rows in enumerate(folds) if i != fold]))
+
+    start = time.perf_counter()
+    nb = MultinomialNB(**nb_params).fit(cache.X, cache.y, cache.n_classes, train)
+    nb_seconds = time.perf_counter() - start
+    nb_result = {"fit_seconds": nb_seconds,
+                 **classification_metrics(cache.y[val], predict(nb, cache.X, val), cache.n_classes)}
+
+    lr = LogisticRegressionSGD(**lr_params).fit(cache.X, cache.y, cache.n_classes, train, val_rows=val)
+    last = lr.history[-1] if lr.history else {}
+    lr_result = {"fit_seconds": sum(record["seconds"] for record in lr.history), "history": lr.history,
+                 **{key: last[key] for key in ("accuracy", "macro_f1", "f1") if key in last}}
+    return {"fold": fold, "n_train": len(train), "n_val": len(val), "nb": nb_result, "lr": lr_result}
+
+
+def cross_validate(cache_dir: str, n_folds: int = 5, workers: int = 1, seed: int = 42,
+                   nb_params: Optional[Dict] = None, lr_params: Optional[Dict] = None) -> Dict:
+    """
+    k-fold cross-validation, các fold chạy song song trên tối đa `workers` process.
+
+    Returns:
+        {"folds": kết quả từng fold, "summary": {model: {metric: (trung bình, độ lệch chuẩn)}}}
+    """
+    nb_params, lr_params = nb_params or {}, lr_params or {}
+    start = time.perf_counter()
+    if workers <= 1:
+        results = [_run_fold(cache_dir, fold, n_folds, seed, nb_params, lr_params) for fold in range(n_folds)]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, n_folds)) as executor:
+            futures = [executor.submit(_run_fold, cache_dir, fold, n_folds, seed, nb_params, lr_params)
+                       for fold in range(n_folds)]
+            results = [future.result() for future in futures]
+
+    summary = {}
+    for name in ("nb", "lr"):
+        summary[name] = {}
+        for metric in ("accuracy", "macro_f1", "fit_seconds"):
+            values = np.array([result[name][metric] for result in results if metric in result[name]])
+            if len(values):
+                summary[name][metric] = [float(values.mean()), float(values.std())]
+    for result in results:
+        epochs = ", ".join(f"{record['seconds']:.1f}s" for record in result["lr"]["history"])
+        logging.info(f"Fold {result['fold']}: NB macro_f1={result['nb']['macro_f1']:.4f} "
+                     f"({result['nb']['fit_seconds']:.1f}s), LR macro_f1={result['lr'].get('macro_f1', 0.0):.4f} "
+                     f"(epoch: {epochs})")
+    logging.info(f"Cross-validation {n_folds} fold xong ({time.perf_counter() - start:.1f}s)")
+    return {"folds": results, "summary": summary, "seconds": time.perf_counter() - start}
+
+
+# --- Lưu / nạp model ---
+
+def save_model(out_dir: str, featurizer: HashingFeaturizer, classes: Sequence[str], nb: MultinomialNB,
+               lr: LogisticRegressionSGD, info: Dict):
+    os.makedirs(out_dir, exist_ok=True)
+    featurizer.save(out_dir)
+    np.savez(os.path.join(out_dir, "nb.npz"), feature_log_prob=nb.feature_log_prob.astype(np.float32),
+             class_log_prior=nb.class_log_prior)
+    np.savez(os.path.join(out_dir, "lr.npz"), coef=lr.coef.astype(np.float32), intercept=lr.intercept)
+    with open(os.path.join(out_dir, "model.json"), "w", encoding="utf-8") as f:
+        json.dump({"classes": list(classes), "nb": {"alpha": nb.alpha},
+                   "lr": {key: getattr(lr, key) for key in ("n_epochs", "batch_size", "learning_rate", "alpha",
+                                                            "initial_accumulator")},
+                   **info}, f, ensure_ascii=False, indent=2)
+
+
+class BaselineModel:
+    """Model đã lưu bởi save_model: featurize + dự đoán nhãn cho processed_text."""
+
+    def __init__(self, path: str, model: str = "lr"):
+        with open(os.path.join(path, "model.json"), "r", encoding="utf-8") as f:
+            self.info = json.load(f)
+        self.classes: List[str] = self.info["classes"]
+        self.featurizer = HashingFeaturizer.load(path)
+        if model == "nb":
+            self.model = MultinomialNB(**self.info["nb"])
+            with np.load(os.path.join(path, "nb.npz")) as arrays:
+                self.model.feature_log_prob = arrays["feature_log_prob"]
+                self.model.class_log_prior = arrays["class_log_prior"]
+        elif model == "lr":
+            self.model = LogisticRegressionSGD(**self.info["lr"])
+            with np.load(os.path.join(path, "lr.npz")) as arrays:
+                self.model.coef = arrays["coef"]
+                self.model.intercept = arrays["intercept"]
+        else:
+            raise ValueError(f"Model không hợp lệ: {model} (chỉ có 'nb' / 'lr')")
+
+    def predict(self, texts: Sequence[str]) -> List[str]:
+        codes = predict(self.model, self.featurizer.transform(texts))
+        return [self.classes[code] for code in codes]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Huấn luyện baseline NB + Logistic Regression trên CPU")
+    parser.add_argument("--input", required=True, help="File output của DataPipeline có cột nhãn (CSV/Parquet/Arrow)")
+    parser.add_argument("--label-column", default="label")
+    parser.add_argument("--output", default=os.path.join(MODELS_DIR, "baseline"), help="Thư mục lưu model")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Thư mục cache đặc trưng, dùng lại nếu còn khớp (mặc định: thư mục tạm, xoá khi xong)")
+    parser.add_argument("--n-features", type=int, default=2 ** 20)
+    parser.add_argument("--no-char", action="store_true", help="Chỉ dùng n-gram từ")
+    parser.add_argument("--no-idf", action="store_true", help="Bỏ idf (không cần lượt đọc thứ 2)")
+    parser.add_argument("--chunksize", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--folds", type=int, default=5, help="Số fold cross-validation; 0/1 = bỏ qua")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--nb-alpha", type=float, default=0.01)
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--learning-rate", type=float, default=2.0)
+    parser.add_argument("--l2", type=float, default=1e-6)
+    args = parser.parse_args()
+
+    featurizer = HashingFeaturizer(n_features=args.n_features, char_ngrams=None if args.no_char else (2, 4),
+                                   use_idf=not args.no_idf)
+    nb_params = {"alpha": args.nb_alpha}
+    lr_params = {"n_epochs": args.epochs, "batch_size": args.batch_size, "learning_rate": args.learning_rate,
+                 "alpha": args.l2, "seed": args.seed}
+    start = time.perf_counter()
+    cache_dir = args.cache_dir or tempfile.mkdtemp(prefix="features_", dir=os.path.dirname(os.path.abspath(args.output)))
+    try:
+        if args.cache_dir and cache_is_current(cache_dir, args.input, args.label_column, featurizer):
+            logging.info(f"Dùng lại cache đặc trưng: {cache_dir}")
+        else:
+            build_feature_cache(args.input, args.label_column, featurizer, cache_dir,
+                                chunksize=args.chunksize, workers=args.workers)
+        cache = FeatureCache(cache_dir)
+        logging.info(f"{len(cache.y)} comment, lớp: "
+                     + ", ".join(f"{c}={n}" for c, n in zip(cache.classes, cache.meta["class_counts"])))
+
+        cv = None
+        if args.folds > 1:
+            cv = cross_validate(cache_dir, args.folds, workers=args.workers, seed=args.seed,
+                                nb_params=nb_params, lr_params=lr_params)
+            for name, metrics in cv["summary"].items():
+                logging.info(f"CV {name.upper()}: " + ", ".join(f"{metric}={mean:.4f}±{std:.4f}"
+                                                                for metric, (mean, std) in metrics.items()))
+
+        logging.info("Train model cuối trên toàn bộ dữ liệu...")
+        fit_start = time.perf_counter()
+        nb = MultinomialNB(**nb_params).fit(cache.X, cache.y, cache.n_classes)
+        logging.info(f"  NB: {time.perf_counter() - fit_start:.1f}s")
+        lr = LogisticRegressionSGD(**lr_params).fit(cache.X, cache.y, cache.n_classes)
+        save_model(args.output, cache.featurizer(), cache.classes, nb, lr, {
+            "source": args.input, "label_column": args.label_column, "n_rows": len(cache.y),
+            "class_counts": cache.meta["class_counts"], "lr_history": lr.history,
+            "cv": cv["summary"] if cv else None,
+        })
+        del cache
+    finally:
+        if not args.cache_dir:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+    logging.info(f"XONG! Model -> {args.output} ({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
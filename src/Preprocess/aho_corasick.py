@@ -0,0 +1,116 @@
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+class AhoCorasick:
+    """
+    Automaton Aho–Corasick: tìm MỌI từ khóa xuất hiện trong văn bản chỉ với 1 lần duyệt.
+    Độ phức tạp O(độ dài văn bản + số lần khớp), không phụ thuộc số lượng từ khóa.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        """
+        Args:
+            patterns: Danh sách từ khóa. Vị trí trong danh sách chính là id trả về khi khớp
+                      (từ khóa trùng nhau vẫn giữ id riêng).
+        """
+        self.patterns: List[str] = list(patterns)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+        self._build()
+
+    def _build(self):
+        """Dựng trie các từ khóa rồi tính fail link bằng BFS."""
+        outputs: List[List[int]] = [[]]
+        for pattern_id, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    outputs.append([])
+                node = nxt
+            outputs[node].append(pattern_id)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                # Gộp output của fail link để khi khớp không phải đi ngược chuỗi fail
+                outputs[child].extend(outputs[self._fail[child]])
+
+        self._out = [tuple(ids) for ids in outputs]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """
+        Duyệt văn bản 1 lần, sinh ra (vị trí bắt đầu, id từ khóa) cho mọi lần khớp.
+        Từ khóa rỗng không bao giờ được trả về.
+        """
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self.patterns
+        node = 0
+        for pos, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                end = pos + 1
+                for pattern_id in out[node]:
+                    yield end - len(patterns[pattern_id]), pattern_id
+
+    def matched_ids(self, text: str) -> set:
+        """Tập id các từ khóa xuất hiện ít nhất 1 lần (không cần vị trí)."""
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+
+class KeywordScan:
+    """
+    Cùng interface với AhoCorasick nhưng dò từng từ khóa bằng `keyword in text` (tìm chuỗi viết bằng C).
+    Độ phức tạp O(số từ khóa × độ dài văn bản) nhưng với vài chục từ khóa vẫn nhanh hơn automaton
+    duyệt từng ký tự bằng Python (xem benchmarks/bench_spam_checker.py).
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = list(patterns)
+        self._indexed = [(pattern_id, pattern) for pattern_id, pattern in enumerate(self.patterns) if pattern]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Như AhoCorasick.iter_matches, cùng thứ tự: theo vị trí kết thúc, từ khóa dài hơn trước."""
+        matches = []
+        for pattern_id, pattern in self._indexed:
+            start = text.find(pattern)
+            while start != -1:
+                matches.append((start + len(pattern), -len(pattern), pattern_id))
+                start = text.find(pattern, start + 1)
+        matches.sort()
+        for end, neg_len, pattern_id in matches:
+            yield end + neg_len, pattern_id
+
+    def matched_ids(self, text: str) -> set:
+        return {pattern_id for pattern_id, pattern in self._indexed if pattern in text}
+
+    def __len__(self) -> int:
+        return len(self.patterns)
@@ -0,0 +1,174 @@
+"""
+Đọc/ghi bảng dữ liệu dạng cột (Parquet, Arrow IPC) bên cạnh CSV cho DataPipeline.
+
+- Định dạng suy ra từ đuôi file: .parquet/.pq -> parquet, .arrow/.feather/.ipc -> arrow, còn lại csv.
+- Index gốc của DataFrame (số thứ tự dòng trong file raw) được lưu kèm trong metadata pandas của
+  schema Arrow và khôi phục khi đọc, giống cột index đầu tiên của file CSV output.
+- Đọc có chiếu cột (`columns`): Parquet/Arrow chỉ giải nén các cột cần, Arrow IPC được memory-map.
+- Chế độ streaming ghi mỗi chunk thành 1 file part (part-00000.parquet, ...) trong thư mục output,
+  vì Parquet/Arrow không ghi nối được như CSV; đọc thư mục = nối các part theo thứ tự tên.
+
+Cần pyarrow (chỉ import khi dùng Parquet/Arrow, CSV không cần).
+"""
+import itertools
+import os
+import re
+import shutil
+from typing import Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+FORMATS = ("csv", "parquet", "arrow")
+_EXTENSIONS = {".parquet": "parquet", ".pq": "parquet", ".arrow": "arrow", ".feather": "arrow", ".ipc": "arrow"}
+_PART_PATTERN = re.compile(r"^part-(\d+)\.(parquet|arrow)$")
+
+
+def detect_format(path: str) -> str:
+    """Định dạng theo đuôi file; thư mục part lấy theo đuôi của part đầu tiên."""
+    if os.path.isdir(path):
+        parts = part_files(path)
+        path = parts[0] if parts else path
+    return _EXTENSIONS.get(os.path.splitext(path)[1].lower(), "csv")
+
+
+def part_files(directory: str) -> List[str]:
+    """Các file part trong thư mục, theo thứ tự chunk."""
+    if not os.path.isdir(directory):
+        return []
+    names = [name for name in os.listdir(directory) if _PART_PATTERN.match(name)]
+    return [os.path.join(directory, name) for name in sorted(names)]
+
+
+def part_path(directory: str, part: int, fmt: str) -> str:
+    return os.path.join(directory, f"part-{part:05d}.{fmt}")
+
+
+def remove_output(path: str):
+    """Xoá output cũ (file hoặc thư mục part)."""
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def remove_parts(directory: str, start: int):
+    """Xoá các part có số thứ tự >= start (part của chunk ghi dở khi bị ngắt)."""
+    for path in part_files(directory):
+        if int(_PART_PATTERN.match(os.path.basename(path)).group(1)) >= start:
+            os.remove(path)
+
+
+def write_table(df: pd.DataFrame, path: str, fmt: str, compression: Optional[str] = "zstd"):
+    """Ghi DataFrame (kèm index) ra 1 file Parquet hoặc Arrow IPC."""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    tmp_path = path + ".tmp"
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, tmp_path, compression=compression or "none")
+    elif fmt == "arrow":
+        options = pa.ipc.IpcWriteOptions(compression=compression)
+        with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+    else:
+        raise ValueError(f"Định dạng không hỗ trợ: {fmt} (chọn 1 trong {FORMATS})")
+    # Ghi ra file tạm rồi os.replace: người đọc không bao giờ thấy file ghi dở
+    os.replace(tmp_path, path)
+
+
+def _index_columns(schema) -> List[str]:
+    """Tên cột chứa index pandas trong schema (rỗng nếu file không lưu index)."""
+    metadata = schema.pandas_metadata or {}
+    return [col for col in metadata.get("index_columns", []) if isinstance(col, str)]
+
+
+def _read_file(path: str, fmt: str, columns: Optional[Sequence[str]]):
+    """Đọc 1 file thành pyarrow.Table, chỉ các cột cần (luôn kèm cột index)."""
+    import pyarrow as pa
+
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        schema = pq.read_schema(path)
+        selected = None if columns is None else list(columns) + _index_columns(schema)
+        return pq.read_table(path, columns=selected)
+    # Arrow IPC (= Feather v2): memory-map, chỉ các cột được chọn bị đọc/giải nén
+    import pyarrow.feather as feather
+
+    if columns is not None:
+        with pa.memory_map(path, "r") as source:
+            schema = pa.ipc.open_file(source).schema
+        columns = list(columns) + _index_columns(schema)
+    return feather.read_table(path, columns=columns, memory_map=True)
+
+
+def read_table(path: str, columns: Optional[Sequence[str]] = None, fmt: Optional[str] = None) -> pd.DataFrame:
+    """
+    Đọc file (hoặc thư mục part) Parquet/Arrow thành DataFrame, khôi phục index đã lưu.
+
+    Args:
+        path: File hoặc thư mục chứa các part-*.parquet / part-*.arrow
+        columns: Chỉ đọc các cột này (None = tất cả)
+        fmt: "parquet" / "arrow"; None = suy ra từ đuôi file
+
+    Returns:
+        DataFrame với index gốc
+    """
+    import pyarrow as pa
+
+    fmt = fmt or detect_format(path)
+    paths = part_files(path) if os.path.isdir(path) else [path]
+    if not paths:
+        return pd.DataFrame(columns=list(columns or []))
+    tables = [_read_file(p, fmt, columns) for p in paths]
+    return pa.concat_tables(tables).to_pandas() if len(tables) > 1 else tables[0].to_pandas()
+
+
+def _iter_batches(path: str, fmt: str, columns: Optional[Sequence[str]], batch_size: int):
+    """(schema, iterator RecordBatch) của 1 file; Parquet đọc dần theo row group thay vì cả file."""
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        schema = parquet_file.schema_arrow
+        selected = None if columns is None else list(columns) + _index_columns(schema)
+        return schema, parquet_file.iter_batches(batch_size=batch_size, columns=selected)
+    table = _read_file(path, fmt, columns)
+    return table.schema, iter(table.to_batches(max_chunksize=batch_size))
+
+
+def iter_table(path: str, chunksize: int, columns: Optional[Sequence[str]] = None,
+               fmt: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """
+    Đọc Parquet/Arrow theo từng chunk đúng `chunksize` dòng (chunk cuối có thể ít hơn).
+    File không lưu index (vd file raw) được đánh index liên tục như khi đọc cả file.
+    """
+    import pyarrow as pa
+
+    fmt = fmt or detect_format(path)
+    paths = part_files(path) if os.path.isdir(path) else [path]
+    sources = [_iter_batches(p, fmt, columns, chunksize) for p in paths]
+    if not sources:
+        return
+    has_index = bool(_index_columns(sources[0][0]))
+    offset = 0
+    pending, n_pending = [], 0
+    for batch in itertools.chain(*(batches for _, batches in sources), [None]):
+        if batch is not None:
+            pending.append(batch)
+            n_pending += batch.num_rows
+            if n_pending < chunksize:
+                continue
+        if not n_pending:
+            break
+        # Gom các batch (ranh giới row group/part không trùng chunksize) thành đúng 1 chunk
+        table = pa.Table.from_batches(pending)
+        chunk = table.slice(0, chunksize).to_pandas()
+        rest = table.slice(chunksize)
+        pending, n_pending = rest.to_batches(), rest.num_rows
+        if not has_index:
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield chunk
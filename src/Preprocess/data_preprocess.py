@@ -1,14 +1,33 @@
 import sys
 import os
 import re
+import glob
+import shutil
 import json
 import logging
+import pickle
+import tempfile
+import time
 import unicodedata
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-import emoji
 from tqdm import tqdm
-from py_vncorenlp import VnCoreNLP
-from typing import List, Dict, Tuple
+from typing import List, Dict, NamedTuple, Tuple, Optional, Set
+
+from columnar_io import detect_format, iter_table, part_path, read_table, remove_output, remove_parts, write_table
+from emoji_engine import EmojiEngine
+from encoding_detector import EncodingGuess, detect_encoding, open_detected
+from metrics import create_metrics
+from near_duplicate import NearDuplicateIndex, lsh_params
+from preprocess_cache import PreprocessCache
+from processed_manifest import ProcessedManifest, settings_version
+from resource_compiler import load_compiled
+from resource_watcher import ResourceWatcher, dictionary_version
+from seen_hashes import SeenHashes
+from segmenters import Segmenter, VnCoreNLPSegmenter, create_segmenter
+from teencode_trie import TeencodeTrie
+from token_corpus import build_token_corpus
 
 # --- 1. CONFIGURATION (CẤU HÌNH) ---
 class Config:
@@ -24,7 +43,15 @@ class Config:
     
     # Tên file Input/Output
     INPUT_FILE = os.path.join(DATA_DIR, "IzSYlr3VI1A_raw.csv")
+    # File IzSYlr3VI1A_preprocess.csv đang commit sinh từ bản cũ (chưa tách từ), xem README trước khi dùng
     OUTPUT_FILE = os.path.join(BASE_DIR, "IzSYlr3VI1A_preprocess.csv")
+    # Định dạng output: "csv" | "parquet" | "arrow" (Arrow IPC); None = suy ra từ đuôi OUTPUT_FILE.
+    # Parquet/Arrow giữ index gốc + kiểu dữ liệu, nén OUTPUT_COMPRESSION, đọc lại nhanh và nhỏ hơn CSV;
+    # ở chế độ streaming OUTPUT_FILE là thư mục chứa part-00000.parquet, part-00001.parquet, ...
+    # INPUT_FILE cũng có thể là .parquet/.arrow (hoặc thư mục part), chỉ các cột cần dùng được đọc
+    OUTPUT_FORMAT = None
+    OUTPUT_COMPRESSION = "zstd"
+    OUTPUT_EXTRA_COLUMNS = []   # Cột của input ghi kèm vào output, vd ['text'] để giữ comment gốc
     
     # File tài nguyên
     TEENCODE_FILE = os.path.join(BASE_DIR, "teencode.json")
@@ -35,6 +62,76 @@ class Config:
     MAX_WORD_LENGTH = 15     # Bỏ từ quá dài (spam ký tự)
     SPAM_THRESHOLD = 1       # Số từ khóa spam tối thiểu để bị loại
 
+    # Bỏ comment gần trùng lặp (spam đổi vài ký tự) bằng MinHash + LSH, chạy sau các bước lọc trên.
+    # Mỗi cụm giữ 1 đại diện (comment xuất hiện đầu tiên); output có thêm cột cluster_id (= index của
+    # đại diện), các dòng bị loại được ghi vào NEAR_DUP_AUDIT_FILE để kiểm tra lại
+    NEAR_DUPLICATE = False
+    NEAR_DUP_THRESHOLD = 0.8     # Độ tương đồng Jaccard (ước lượng) tối thiểu để coi là gần trùng
+    NEAR_DUP_NUM_PERM = 64       # Số hàm băm MinHash
+    NEAR_DUP_SHINGLE_SIZE = 5    # Độ dài shingle (ký tự)
+    NEAR_DUP_AUDIT_FILE = OUTPUT_FILE + ".near_dup.csv"
+
+    # Xử lý NLP
+    NLP_BATCH_SIZE = 64      # Số comment gộp vào 1 lần gọi VnCoreNLP (<= 1: xử lý từng comment)
+    SINGLE_PASS_SEGMENTATION = False  # True: dựng kết quả trực tiếp từ annotate_text, bỏ lần word_segment thứ 2
+    NUM_WORKERS = 1          # > 1: chạy song song nhiều process, mỗi process 1 VnCoreNLP riêng
+    # Bộ tách từ: "vncorenlp" (JVM, chính xác nhất), "longest_match" (tra từ điển SEGMENTER_DICT_FILE,
+    # không cần Java, nhanh hơn nhiều nhưng kém chính xác hơn: dùng khi làm mới dữ liệu nhanh / CI)
+    # hoặc "server" (gửi tới segment_server.py đang chạy tại SEGMENTER_ADDRESS, model đã nạp sẵn)
+    SEGMENTER = "vncorenlp"
+    SEGMENTER_DICT_FILE = os.path.join(BASE_DIR, "vi_words.txt")
+    SEGMENTER_ADDRESS = "127.0.0.1:8765"   # hoặc "unix:/tmp/segment.sock"
+    WORKER_CHUNK_SIZE = 1000 # Số comment gửi cho worker mỗi lần
+
+    # Chế độ streaming: đọc/xử lý/ghi từng chunk, có checkpoint để chạy tiếp khi bị ngắt
+    STREAMING = False
+    STREAM_CHUNK_SIZE = 50000
+    CHECKPOINT_FILE = OUTPUT_FILE + ".ckpt.json"
+    # Bỏ trùng lặp xuyên chunk giữ hash 64-bit của mọi text đã gặp: tối đa DEDUP_MEMORY_ENTRIES hash
+    # trong RAM (~70 byte/hash), phần vượt được đổ xuống file SQLite tạm trong CACHE_DIR (seen_hashes.py)
+    DEDUP_MEMORY_ENTRIES = 2_000_000
+
+    # Chế độ thư mục: xử lý mọi file raw trong INPUT_DIR (youtube_crawler ghi mỗi video 1 file <video_id>.csv).
+    # MANIFEST_FILE lưu hash nội dung từng file + phiên bản cấu hình/từ điển/model đã dùng, lần chạy sau
+    # chỉ xử lý file mới hoặc đã thay đổi. Kết quả từng video ở OUTPUT_DIR/<video_id>.<định dạng>,
+    # OUTPUT_FILE là bản gộp của tất cả video (thêm cột video_id)
+    DIRECTORY_MODE = False
+    INPUT_DIR = os.path.join(DATA_DIR, "raw")
+    INPUT_GLOB = "*.csv"
+    OUTPUT_DIR = os.path.join(BASE_DIR, "processed")
+    MANIFEST_FILE = os.path.join(OUTPUT_DIR, "manifest.json")
+
+    # Cache kết quả tiền xử lý trên đĩa (tự xoá khi teencode.json/cấu hình/model thay đổi)
+    USE_CACHE = True
+    CACHE_DIR = os.path.join(BASE_DIR, ".cache")
+    CACHE_MAX_ENTRIES = 2_000_000
+
+    # Hot-reload teencode.json / spamkeyword.json khi đang chạy (chỉ chế độ STREAMING): bảng mới được dựng
+    # ở thread nền và áp dụng từ chunk kế tiếp; output có thêm cột dict_version (phiên bản từ điển đã dùng).
+    # JSON ghi dở / sai cú pháp bị bỏ qua, tiếp tục dùng phiên bản cũ
+    HOT_RELOAD = False
+    RELOAD_INTERVAL = 5.0    # Chu kỳ kiểm tra file (giây)
+
+    # Xuất thêm corpus token dạng số nguyên (token_corpus.py) từ OUTPUT_FILE sau khi chạy xong:
+    # từ điển token + mảng id token/offsets memory-map, huấn luyện không phải tách/intern lại chuỗi.
+    # None = không xuất
+    TOKEN_CORPUS_DIR = None
+
+    # Đo đạc: histogram thời gian từng bước, bộ đếm dòng (bị loại/lỗi NLP/rỗng), độ sâu hàng đợi.
+    # Xuất qua prometheus_client (nếu có METRICS_PORT) và báo cáo JSON cuối mỗi lần chạy
+    METRICS_ENABLED = False
+    METRICS_PORT = None      # vd 9100: mở http://localhost:9100/metrics
+    METRICS_REPORT_FILE = OUTPUT_FILE + ".metrics.json"
+
+    # Service online (preprocess_service.py): gom comment đến lẻ thành micro-batch
+    SERVICE_PORT = 8080
+    SERVICE_WORKERS = 1              # > 1: process pool, mỗi process 1 segmenter riêng
+    SERVICE_MAX_BATCH_SIZE = 64      # Số comment tối đa mỗi batch
+    SERVICE_MAX_WAIT_MS = 10         # Comment đầu tiên của batch chờ gom thêm tối đa bao lâu
+    SERVICE_LATENCY_TARGET_MS = 200  # Batch xử lý lâu hơn mức này => giảm kích thước batch
+    SERVICE_MAX_QUEUE = 10000        # Hàng đợi đầy => trả 503 (backpressure)
+    SERVICE_REQUEST_TIMEOUT = 30.0   # Giây, quá hạn => trả 504
+
 # Setup môi trường
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 sys.stdout.reconfigure(encoding=Config.ENCODING)
@@ -44,212 +141,1322 @@ os.environ["JAVA_HOME"] = Config.JAVA_HOME
 # --- 2. HELPER CLASSES ---
 
 class TeencodeConverter:
-    def __init__(self, json_path: str):
-        self.teencode_dict = self._load_dict(json_path)
+    ARTIFACT_KIND = "pipeline"
 
-    def _load_dict(self, json_path: str) -> Dict[str, str]:
-        if not os.path.exists(json_path):
-            return {}
+    def __init__(self, json_path: str, strict: bool = False):
+        """
+        strict=True: JSON lỗi thì ném lỗi (hot-reload giữ phiên bản cũ); mặc định log lỗi và dùng bảng rỗng.
+        Bảng dựng từ JSON lỗi không bao giờ được ghi thành artifact.
+        """
+        # Bảng tra + trie được lưu sẵn thành artifact nhị phân (teencode.pipeline.bin), tự dựng lại khi JSON đổi
         try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            # Chuyển về dạng: key (lower) -> value (standard)
-            return {var.lower(): std for std, variants in data.items() for var in variants}
+            self.teencode_dict, self.trie = load_compiled(json_path, self.ARTIFACT_KIND,
+                                                          lambda: self._compile(json_path))
         except Exception as e:
+            if strict:
+                raise
             logging.error(f"Lỗi đọc teencode: {e}")
+            self.teencode_dict, self.trie = {}, TeencodeTrie({})
+
+    def _compile(self, json_path: str):
+        teencode_dict = self._load_dict(json_path)
+        return teencode_dict, TeencodeTrie(teencode_dict)
+
+    def _load_dict(self, json_path: str) -> Dict[str, str]:
+        if not os.path.exists(json_path):
             return {}
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        # Chuyển về dạng: key (lower) -> value (standard)
+        return {var.lower(): std for std, variants in data.items() for var in variants}
 
     def replace(self, text: str) -> str:
         if not text: return ""
-        # Tách từ và dấu câu để thay thế chính xác (vd: "hnay," -> "hnay" + ",")
-        tokens = re.findall(r"\w+|[^\w\s]", text, re.UNICODE)
-        result = []
-        for token in tokens:
-            if token.isalnum(): # Nếu là chữ/số thì tra từ điển
-                result.append(self.teencode_dict.get(token.lower(), token))
-            else: # Nếu là dấu câu thì giữ nguyên
-                result.append(token)
-        return ' '.join(result)
+        # Tách từ và dấu câu để thay thế chính xác (vd: "hnay," -> "hnay" + ","),
+        # trie thay cả variant nhiều từ (vd: "chài ai", "v.c.l") theo cụm dài nhất
+        return ' '.join(self.trie.replace_tokens(self.trie.tokenize(text)))
 
 
 class SpamChecker:
-    def __init__(self, json_path: str):
-        self.patterns = self._load_patterns(json_path)
+    def __init__(self, json_path: str, strict: bool = False):
+        # strict: như TeencodeConverter
+        try:
+            self.patterns = self._load_patterns(json_path)
+        except Exception as e:
+            if strict:
+                raise
+            logging.error(f"Lỗi đọc spam keywords: {e}")
+            self.patterns = {}
+        self._build_any_pattern()
+
+    def _build_any_pattern(self):
+        # Gộp mọi từ khóa thành 1 regex: đa số comment không chứa từ khóa nào nên chỉ cần 1 lần quét.
+        # Text và từ khóa đều đã lower() nên bản gộp dùng regex phân biệt hoa/thường (nhanh hơn nhiều);
+        # chỉ text chứa ký tự mà IGNORECASE coi là tương đương với ký tự của từ khóa (vd 'ı' ~ 'i',
+        # 'ſ' ~ 's') mới cần quét lại bằng regex IGNORECASE để kết quả giống hệt.
+        self.any_pattern = None
+        self._fast_pattern = None
+        self._fold_pattern = None
+        if not self.patterns:
+            return
+        joined = '|'.join(p.pattern for p in self.patterns.values())
+        self.any_pattern = re.compile(joined, re.IGNORECASE)
+        self._fast_pattern = re.compile(joined)
+
+        keyword_chars = set(re.sub(r'\\(.)', r'\1', joined)) - {'|'}
+        char_class = re.compile('[' + ''.join(re.escape(c) for c in keyword_chars) + ']', re.IGNORECASE)
+        # Mọi ký tự có hoa/thường đều nằm dưới U+1F000
+        equivalents = set(char_class.findall(''.join(map(chr, range(0xD800))) +
+                                             ''.join(map(chr, range(0xE000, 0x1F000))))) - keyword_chars
+        if equivalents:
+            self._fold_pattern = re.compile('[' + ''.join(re.escape(c) for c in equivalents) + ']')
+
+    def search_any(self, text_lower: str) -> bool:
+        """text (đã lower) có chứa ít nhất 1 từ khóa spam bất kỳ không."""
+        if self._fast_pattern is None: return False
+        if self._fast_pattern.search(text_lower): return True
+        return bool(self._fold_pattern is not None and self._fold_pattern.search(text_lower)
+                    and self.any_pattern.search(text_lower))
 
     def _load_patterns(self, json_path: str) -> Dict[str, re.Pattern]:
         if not os.path.exists(json_path):
             return {}
-        try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            patterns = {}
-            for category, keywords in data.items():
-                if keywords:
-                    escaped = [re.escape(k.lower()) for k in keywords]
-                    patterns[category] = re.compile('|'.join(escaped), re.IGNORECASE)
-            return patterns
-        except Exception:
-            return {}
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        patterns = {}
+        for category, keywords in data.items():
+            if keywords:
+                escaped = [re.escape(k.lower()) for k in keywords]
+                patterns[category] = re.compile('|'.join(escaped), re.IGNORECASE)
+        return patterns
+
+    def match_categories(self, text: str) -> List[str]:
+        """Danh sách các category có ít nhất 1 từ khóa xuất hiện trong text."""
+        if not text: return []
+        text_lower = text.lower()
+        if not self.search_any(text_lower):
+            return []
+        return [category for category, pattern in self.patterns.items() if pattern.search(text_lower)]
 
     def is_spam(self, text: str, threshold: int = 1) -> bool:
         if not text: return False
-        count = 0
-        text_lower = text.lower()
-        for pattern in self.patterns.values():
-            if pattern.search(text_lower):
-                count += 1
-        return count >= threshold
+        return len(self.match_categories(text)) >= threshold
 
 
 # --- 3. TEXT PREPROCESSOR (CORE LOGIC) ---
 
+# Regex của bước clean, compile 1 lần và dùng chung cho bản từng comment lẫn bản theo cột
+URL_PATTERN = re.compile(r'http\S+|www\S+', re.IGNORECASE)
+REPEAT_CHAR_PATTERN = re.compile(r'(.)\1{2,}')
+REPEAT_PUNCT_PATTERN = re.compile(r'([!?.,])\1+')
+
 class TextPreprocessor:
-    def __init__(self, vncorenlp_dir: str, teencode_path: str):
-        if not os.path.exists(vncorenlp_dir):
-            raise FileNotFoundError(f"Không tìm thấy VnCoreNLP tại: {vncorenlp_dir}")
-        
-        # Khởi tạo VnCoreNLP
-        self.vncorenlp = VnCoreNLP(annotators=["wseg", "pos"], save_dir=vncorenlp_dir)
-        self.teencode_converter = TeencodeConverter(teencode_path)
+    # Tăng khi thay đổi logic xử lý để cache cũ tự bị loại bỏ
+    VERSION = 3
+
+    def __init__(self, vncorenlp_dir: str, teencode_path: str, single_pass: bool = False,
+                 nlp: Optional[Segmenter] = None, teencode: Optional[TeencodeConverter] = None):
+        # nlp: bộ tách từ (segmenters.py, hoặc đối tượng bất kỳ có annotate_text/word_segment);
+        # mặc định là VnCoreNLP trong vncorenlp_dir
+        self.segmenter = nlp if nlp is not None else VnCoreNLPSegmenter(vncorenlp_dir)
+        # teencode: bảng đã dựng sẵn (đúng phiên bản pipeline đang dùng) thay vì đọc lại teencode_path
+        self.teencode_converter = teencode if teencode is not None else TeencodeConverter(teencode_path)
+        self.emoji_engine = EmojiEngine()
+        # Bộ đếm sự kiện NLP (lỗi, fallback); pipeline lấy ra định kỳ qua pop_counters()
+        self.counters: Dict[str, int] = {}
+        # single_pass: các token 'form' của annotate_text (wseg) đã được nối bằng '_',
+        # nên có thể dùng luôn mà không cần gọi word_segment lần nữa
+        self.single_pass = single_pass
+        # Bộ tách từ có API theo lô (SegmentClient: annotate_many / segment_many) xử lý từng văn bản
+        # riêng trong 1 lần gọi, nên process_batch gửi thẳng cả lô, không cần ghép câu sentinel
+        self._native_batch = (callable(getattr(self.segmenter, 'annotate_many', None))
+                              and callable(getattr(self.segmenter, 'segment_many', None)))
+
+    def _count(self, name: str):
+        self.counters[name] = self.counters.get(name, 0) + 1
+
+    def pop_counters(self) -> Dict[str, int]:
+        counters, self.counters = self.counters, {}
+        return counters
 
     def _mask_emojis(self, text: str) -> Tuple[str, List[str]]:
-        found_emojis = []
-        def replace_cb(char, _):
-            demojized = emoji.demojize(char)
-            found_emojis.append(demojized)
-            return f" EMOJITOKEN{len(found_emojis)-1} "
-        return emoji.replace_emoji(text, replace=replace_cb), found_emojis
+        return self.emoji_engine.mask(text)
 
     def _restore_emojis(self, text: str, found_emojis: List[str]) -> str:
-        def restore_cb(match):
-            idx = int(match.group(1))
-            return f" {found_emojis[idx]} " if 0 <= idx < len(found_emojis) else match.group(0)
-        return re.sub(r'EMOJITOKEN\s*(\d+)', restore_cb, text)
+        return self.emoji_engine.restore(text, found_emojis)
 
-    def process(self, text: str) -> str:
-        if not isinstance(text, str) or not text.strip(): return ""
-        
+    def _clean(self, text: str) -> str:
         # 1. Clean cơ bản
         text = unicodedata.normalize('NFC', text)
-        text = re.sub(r'http\S+|www\S+', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'(.)\1{2,}', r'\1', text)
+        text = URL_PATTERN.sub('', text)
+        text = REPEAT_CHAR_PATTERN.sub(r'\1', text)
         
         # 2. Teencode
         text = self.teencode_converter.replace(text)
         
         # 3. Dấu câu
-        text = re.sub(r'([!?.,])\1+', r' \1 ', text)
+        return REPEAT_PUNCT_PATTERN.sub(r' \1 ', text)
+
+    def clean_series(self, texts: pd.Series, timings: Optional[Dict[str, float]] = None) -> pd.Series:
+        """
+        Bản theo cột của _clean(): chạy các bước chỉ thao tác chuỗi trên cả Series một lần.
+        Phần tử không hợp lệ (không phải str / rỗng) trả về None, giống process() trả "".
+
+        Args:
+            texts: Series các comment gốc
+            timings: Nếu truyền vào, cộng dồn thời gian (giây) của từng bước theo tên
+        """
+        valid = texts.map(lambda t: isinstance(t, str) and bool(t.strip())).astype(bool)
+        # pd.Series(None, ...) sẽ điền NaN; list [None, ...] với dtype object mới giữ đúng None
+        result = pd.Series([None] * len(texts), index=texts.index, dtype=object)
+        s = texts[valid]
+        if s.empty:
+            return result
+
+        def timed(name, func, series):
+            start = time.perf_counter()
+            out = func(series)
+            if timings is not None:
+                timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+            return out
+
+        s = timed('normalize', lambda x: x.str.normalize('NFC'), s)
+        s = timed('url', lambda x: x.str.replace(URL_PATTERN, '', regex=True), s)
+        s = timed('repeat_char', lambda x: x.str.replace(REPEAT_CHAR_PATTERN, r'\1', regex=True), s)
+        # Teencode tra từ điển theo token nên vẫn chạy theo từng comment
+        s = timed('teencode', lambda x: x.map(self.teencode_converter.replace), s)
+        s = timed('repeat_punct', lambda x: x.str.replace(REPEAT_PUNCT_PATTERN, r' \1 ', regex=True), s)
+
+        result[valid] = s
+        return result
+
+    def _smart_lowercase(self, sentences: List[List[Dict]]) -> List[str]:
+        # Cấu trúc JSON trả về: {'sentences': [[{'index': 1, 'form': 'Từ', 'posTag': 'Nhãn'}, ...]]}
+        processed_tokens = []
+        for sentence in sentences:   # Duyệt qua các câu
+            for token in sentence:   # Duyệt qua các từ trong câu
+                # Lấy chính xác dữ liệu từ key, không cắt chuỗi thủ công nữa
+                word = token.get('form', '')
+                tag = token.get('posTag', '')
+                
+                # Logic Smart Lowercase
+                if tag in ['Np', 'Ny', 'M', 'Ab'] or "EMOJITOKEN" in word:
+                    processed_tokens.append(word)
+                else:
+                    processed_tokens.append(word.lower())
+        return processed_tokens
+
+    def _finalize(self, text: str, emojis: List[str]) -> str:
+        # 5. Restore Emoji & Final Clean
+        text = self._restore_emojis(text, emojis)
+        return re.sub(r'\s+', ' ', text).strip()
+
+    def process(self, text: str) -> str:
+        if not isinstance(text, str) or not text.strip(): return ""
+        
+        text = self._clean(text)
 
         # 4. Mask Emoji -> Annotate (JSON) -> Smart Lowercase
         text, emojis = self._mask_emojis(text)
-        
+        return self._process_masked(text, emojis)
+
+    def _process_masked(self, text: str, emojis: List[str]) -> str:
+        return self._process_masked_status(text, emojis)[0]
+
+    def _process_masked_status(self, text: str, emojis: List[str]) -> Tuple[str, bool]:
+        """Như _process_masked, kèm cờ False khi NLP lỗi / sai format và kết quả chỉ là text đã clean."""
+        ok = True
         try:
             # --- KHẮC PHỤC LỖI TẠI ĐÂY ---
             # Sử dụng .annotate() để lấy JSON Object thay vì String
-            output = self.vncorenlp.annotate_text(text)
-            
-            # Cấu trúc JSON trả về: {'sentences': [[{'index': 1, 'form': 'Từ', 'posTag': 'Nhãn'}, ...]]}
-            processed_tokens = []
+            output = self.segmenter.annotate_text(text)
             
             if isinstance(output, dict) and 'sentences' in output:
-                for sentence in output['sentences']: # Duyệt qua các câu
-                    for token in sentence:           # Duyệt qua các từ trong câu
-                        # Lấy chính xác dữ liệu từ key, không cắt chuỗi thủ công nữa
-                        word = token.get('form', '')
-                        tag = token.get('posTag', '')
-                        
-                        # Logic Smart Lowercase
-                        if tag in ['Np', 'Ny', 'M', 'Ab'] or "EMOJITOKEN" in word:
-                            processed_tokens.append(word)
-                        else:
-                            processed_tokens.append(word.lower())
+                processed_tokens = self._smart_lowercase(output['sentences'])
                 
                 # Ghép lại
                 if processed_tokens:
                     text = ' '.join(processed_tokens)
 
-                text = self.vncorenlp.word_segment(text)
+                if not self.single_pass:
+                    text = self.segmenter.word_segment(text)
             else:
                 # Nếu output rỗng hoặc sai format, dùng text gốc (đã clean sơ)
-                pass
+                self._count('nlp_bad_output')
+                ok = False
 
         except Exception as e:
             # Fallback an toàn
             logging.error(f"Lỗi xử lý NLP: {e}")
-            pass 
+            self._count('nlp_error')
+            ok = False
         
-        # 5. Restore Emoji & Final Clean
-        text = self._restore_emojis(text, emojis)
-        return re.sub(r'\s+', ' ', text).strip()
+        return self._finalize(text, emojis), ok
+
+    # --- Xử lý theo lô (batch) ---
+    # Gộp nhiều comment vào MỘT lần gọi annotate_text (và một lần word_segment cho lượt 2),
+    # ngăn cách bằng câu "BATCHSEPTOKEN ."
+    # VnCoreNLP tự tách câu dựa vào nội dung (Tokenizer.joinSentences), nên chỉ những comment
+    # kết thúc bằng dấu kết câu và không bắt đầu bằng chữ thường/số/dấu đóng ngoặc mới chắc chắn
+    # được tách thành câu riêng. Các comment còn lại (hoặc bị dính câu với sentinel) đi đường
+    # xử lý từng comment như cũ => kết quả luôn giống hệt process().
+    # Với bộ tách từ có annotate_many / segment_many (segment server), mọi comment đều gửi theo lô.
+    BATCH_SEPARATOR = "BATCHSEPTOKEN"
+    _EOS_CHARS = ('.', '?', '!', '…')
+    _BAD_FIRST_CHARS = ('”', "'", ')', '}', ']', ',')
+
+    def _is_packable(self, text: str) -> bool:
+        stripped = text.strip()
+        if self._native_batch:
+            return bool(stripped)
+        if not stripped or self.BATCH_SEPARATOR in stripped:
+            return False
+        first = stripped[0]
+        if first.islower() or first.isdigit() or first in self._BAD_FIRST_CHARS:
+            return False
+        return stripped.endswith(self._EOS_CHARS)
+
+    def _annotate_packed(self, texts: List[str]) -> List[Optional[List[List[Dict]]]]:
+        """
+        Annotate nhiều văn bản (đã mask emoji) trong một lần gọi JVM.
+        Trả về list các câu của từng văn bản, hoặc None nếu ranh giới không sạch.
+        """
+        if self._native_batch:
+            return [output['sentences'] if isinstance(output, dict) and output.get('sentences') else None
+                    for output in self.segmenter.annotate_many(texts)]
+        separator = f" {self.BATCH_SEPARATOR} . "
+        output = self.segmenter.annotate_text(separator.join(texts))
+        if not isinstance(output, dict) or 'sentences' not in output:
+            return [None] * len(texts)
+
+        segments = [[] for _ in texts]
+        clean = [True] * len(texts)
+        idx = 0
+        for sentence in output['sentences']:
+            forms = [token.get('form', '') for token in sentence]
+            n_sep = sum(self.BATCH_SEPARATOR in form for form in forms)
+            if n_sep == 0:
+                if idx < len(texts):
+                    segments[idx].append(sentence)
+                continue
+            # Câu sentinel "sạch" chỉ gồm đúng 2 token: BATCHSEPTOKEN và "."
+            if not (n_sep == 1 and forms == [self.BATCH_SEPARATOR, '.']):
+                for k in range(idx, min(idx + n_sep + 1, len(texts))):
+                    clean[k] = False
+            idx += n_sep
+
+        if idx != len(texts) - 1:
+            # Số sentinel không khớp => không tin được việc tách, xử lý lại từng comment
+            return [None] * len(texts)
+        return [seg if ok and seg else None for seg, ok in zip(segments, clean)]
+
+    def _segment_packed(self, texts: List[str]) -> List[Optional[str]]:
+        """
+        word_segment nhiều văn bản (kết quả lượt annotate) trong một lần gọi JVM, ngăn cách bằng
+        cùng câu sentinel. Lượt này chỉ cần tách theo token nên không phụ thuộc cách VnCoreNLP tách câu.
+        Trả về kết quả của từng văn bản, hoặc None nếu ranh giới không sạch.
+        """
+        if self._native_batch:
+            return list(self.segmenter.segment_many(texts))
+        if len(texts) == 1:
+            return [self.segmenter.word_segment(texts[0])]
+        separator = f" {self.BATCH_SEPARATOR} . "
+        tokens = self.segmenter.word_segment(separator.join(texts)).split()
+
+        parts: List[List[str]] = [[]]
+        pos = 0
+        while pos < len(tokens):
+            token = tokens[pos]
+            if self.BATCH_SEPARATOR not in token:
+                parts[-1].append(token)
+                pos += 1
+                continue
+            # Sentinel "sạch": đúng token BATCHSEPTOKEN rồi tới "." (không bị ghép '_' với từ bên cạnh)
+            if token != self.BATCH_SEPARATOR or tokens[pos + 1:pos + 2] != ['.']:
+                return [None] * len(texts)
+            parts.append([])
+            pos += 2
+
+        if len(parts) != len(texts):
+            return [None] * len(texts)
+        return [' '.join(part) if part else None for part in parts]
+
+    def process_batch(self, texts: List[str], batch_size: int = 64, cleaned: bool = False,
+                      emojis: Optional[List[List[str]]] = None, degraded: Optional[Set[int]] = None) -> List[str]:
+        """
+        Xử lý một danh sách comment, gom tối đa `batch_size` comment cho mỗi lần annotate.
+        Kết quả giống hệt việc gọi process() cho từng comment.
+        cleaned=True: `texts` là output của clean_series (None = comment không hợp lệ).
+        emojis: nếu truyền vào, `texts` đã được mask (EmojiEngine.mask_many) và đây là emoji của từng dòng.
+        degraded: nếu truyền vào, thêm vị trí các comment đã đi qua đường lỗi/fallback của NLP
+                  (nlp_error, nlp_bad_output, nlp_batch_fallback, ...); kết quả này không nên được cache.
+        """
+        def mark(i):
+            if degraded is not None:
+                degraded.add(i)
+
+        results = [""] * len(texts)
+        packed = []   # (vị trí, text đã mask, emojis)
+        pending = []  # (vị trí, text sau smart lowercase, emojis) chờ word_segment
+        for i, text in enumerate(texts):
+            if not isinstance(text, str):
+                continue
+            if not cleaned:
+                if not text.strip():
+                    continue
+                text = self._clean(text)
+            if emojis is None:
+                masked, found_emojis = self._mask_emojis(text)
+            else:
+                masked, found_emojis = text, emojis[i]
+            if batch_size > 1 and self._is_packable(masked):
+                packed.append((i, masked, found_emojis))
+            else:
+                results[i], ok = self._process_masked_status(masked, found_emojis)
+                if not ok:
+                    mark(i)
+
+        for start in range(0, len(packed), max(batch_size, 1)):
+            group = packed[start:start + batch_size]
+            try:
+                segments = self._annotate_packed([masked for _, masked, _ in group])
+            except Exception as e:
+                logging.error(f"Lỗi xử lý NLP theo lô, chuyển sang xử lý từng comment: {e}")
+                self._count('nlp_batch_error')
+                segments = [None] * len(group)
+
+            for (i, masked, found_emojis), sentences in zip(group, segments):
+                if sentences is None:
+                    self._count('nlp_batch_fallback')
+                    mark(i)
+                    results[i] = self._process_masked(masked, found_emojis)
+                    continue
+                text = masked
+                try:
+                    processed_tokens = self._smart_lowercase(sentences)
+                    if processed_tokens:
+                        text = ' '.join(processed_tokens)
+                except Exception as e:
+                    logging.error(f"Lỗi xử lý NLP: {e}")
+                    self._count('nlp_error')
+                    mark(i)
+                    results[i] = self._finalize(text, found_emojis)
+                    continue
+                if self.single_pass:
+                    results[i] = self._finalize(text, found_emojis)
+                else:
+                    pending.append((i, text, found_emojis))
+
+        # Lượt 2 (word_segment) cũng gom theo lô; lô có ranh giới không sạch chạy lại từng comment
+        for start in range(0, len(pending), max(batch_size, 1)):
+            group = pending[start:start + batch_size]
+            try:
+                segmented = self._segment_packed([text for _, text, _ in group])
+            except Exception as e:
+                logging.error(f"Lỗi word_segment theo lô, chuyển sang xử lý từng comment: {e}")
+                self._count('nlp_batch_error')
+                segmented = [None] * len(group)
+
+            for (i, text, found_emojis), output in zip(group, segmented):
+                if output is None:
+                    self._count('nlp_segment_fallback')
+                    mark(i)
+                    try:
+                        output = self.segmenter.word_segment(text)
+                    except Exception as e:
+                        logging.error(f"Lỗi xử lý NLP: {e}")
+                        self._count('nlp_error')
+                        output = text
+                results[i] = self._finalize(output, found_emojis)
+        return results
+
+    def process_many(self, texts: List[str], batch_size: int = 64,
+                     timings: Optional[Dict[str, float]] = None, degraded: Optional[Set[int]] = None) -> List[str]:
+        """
+        Clean theo cột (clean_series) rồi mới chạy phần NLP cho từng comment / từng lô.
+        Kết quả giống hệt process() cho từng comment. `degraded`: xem process_batch.
+        """
+        cleaned = self.clean_series(pd.Series(texts, dtype=object), timings)
+        start = time.perf_counter()
+        masked, emojis = self.emoji_engine.mask_many(cleaned.tolist())
+        if timings is not None:
+            timings['emoji'] = timings.get('emoji', 0.0) + time.perf_counter() - start
+        start = time.perf_counter()
+        results = self.process_batch(masked, batch_size=batch_size, cleaned=True, emojis=emojis, degraded=degraded)
+        if timings is not None:
+            timings['nlp'] = timings.get('nlp', 0.0) + time.perf_counter() - start
+        return results
+
+    def compare_batch_modes(self, texts: List[str], batch_size: int = 64) -> List[Dict]:
+        """
+        So sánh process() từng comment với process_many() theo lô (cả 2 lượt annotate/word_segment
+        đều gom theo lô). Trả về danh sách các comment cho kết quả khác nhau.
+        """
+        batched = self.process_many(texts, batch_size=batch_size)
+        mismatches = []
+        for i, (raw, batch_result) in enumerate(zip(texts, batched)):
+            single = self.process(raw)
+            if single != batch_result:
+                mismatches.append({"index": i, "text": raw, "single": single, "batch": batch_result})
+
+        logging.info(f"Parity theo lô: {len(mismatches)}/{len(texts)} comment khác kết quả")
+        return mismatches
+
+    def compare_segmentation_modes(self, texts: List[str]) -> List[Dict]:
+        """
+        So sánh 2 chế độ: annotate_text + word_segment (cũ) và single-pass.
+        Mỗi comment chỉ annotate 1 lần, 2 kết quả được dựng từ cùng output.
+        Trả về danh sách các comment cho kết quả khác nhau.
+        """
+        mismatches = []
+        for i, raw in enumerate(texts):
+            if not isinstance(raw, str) or not raw.strip():
+                continue
+            text, emojis = self._mask_emojis(self._clean(raw))
+            try:
+                output = self.segmenter.annotate_text(text)
+                if not (isinstance(output, dict) and 'sentences' in output):
+                    continue
+                processed_tokens = self._smart_lowercase(output['sentences'])
+                if processed_tokens:
+                    text = ' '.join(processed_tokens)
+                single = self._finalize(text, emojis)
+                two_pass = self._finalize(self.segmenter.word_segment(text), emojis)
+            except Exception as e:
+                logging.error(f"Lỗi xử lý NLP: {e}")
+                continue
+            if single != two_pass:
+                mismatches.append({"index": i, "text": raw, "two_pass": two_pass, "single_pass": single})
+
+        logging.info(f"Parity single-pass: {len(mismatches)}/{len(texts)} comment khác kết quả")
+        return mismatches
+
+
+# Worker cho chế độ đa process: VnCoreNLP (JVM) không chia sẻ được giữa các process,
+# nên mỗi worker tự tạo 1 TextPreprocessor trong initializer và dùng lại cho mọi chunk.
+# Bảng teencode không đọc lại từ teencode.json (file có thể đã đổi so với phiên bản pipeline ghi vào
+# output) mà nạp từ snapshot pickle của đúng phiên bản đó do process chính ghi ra.
+_worker_preprocessor: Optional[TextPreprocessor] = None
+_worker_batch_size = 1
+_worker_dict_version = ""
+
+def _load_teencode_snapshot(path: str) -> TeencodeConverter:
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+def _init_worker(segmenter_args: Tuple, teencode_snapshot: str, single_pass: bool, batch_size: int,
+                 dict_version: str):
+    global _worker_preprocessor, _worker_batch_size, _worker_dict_version
+    vncorenlp_dir = segmenter_args[1]
+    _worker_preprocessor = TextPreprocessor(vncorenlp_dir, "", single_pass=single_pass,
+                                            nlp=create_segmenter(*segmenter_args),
+                                            teencode=_load_teencode_snapshot(teencode_snapshot))
+    _worker_batch_size = batch_size
+    _worker_dict_version = dict_version
+
+def _process_chunk(texts: List[str], dict_version: str,
+                   teencode_snapshot: str) -> Tuple[List[str], Dict[str, float], Dict[str, int], List[int]]:
+    global _worker_dict_version
+    # Process chính đã chuyển sang từ điển mới (hot-reload) -> worker nạp snapshot của phiên bản đó
+    if dict_version != _worker_dict_version:
+        _worker_preprocessor.teencode_converter = _load_teencode_snapshot(teencode_snapshot)
+        _worker_dict_version = dict_version
+    timings, degraded = {}, set()
+    results = _worker_preprocessor.process_many(texts, batch_size=_worker_batch_size, timings=timings,
+                                                degraded=degraded)
+    return results, timings, _worker_preprocessor.pop_counters(), sorted(degraded)
 
 
 # --- 4. DATA PIPELINE ---
 
+class DictionarySet(NamedTuple):
+    """Bộ từ điển dựng sẵn cho 1 phiên bản teencode.json + spamkeyword.json"""
+    version: str
+    teencode_converter: TeencodeConverter
+    spam_checker: SpamChecker
+    cache_fingerprint: str
+
+
 class DataPipeline:
+    # Cột text luôn đọc thành chuỗi: pandas tự suy kiểu theo từng chunk, chunk toàn số ('12345')
+    # sẽ thành int/float => bị lọc như comment rỗng và lệch hash dedup so với cùng text ở chunk khác
+    CSV_DTYPES = {'text': str}
+
     def __init__(self, config):
         self.cfg = config
         logging.info("Đang khởi tạo các models...")
-        self.preprocessor = TextPreprocessor(self.cfg.VNCORENLP_DIR, self.cfg.TEENCODE_FILE)
-        self.spam_checker = SpamChecker(self.cfg.SPAM_KEYWORDS_FILE)
+        self._preprocessor = None
+        self._executor = None
+        self._watcher: Optional[ResourceWatcher] = None
+        self._latest_dictionaries: Optional[DictionarySet] = None
+        self._snapshot_dir: Optional[str] = None
+        self.stage_timings: Dict[str, float] = {}
+        if self.cfg.HOT_RELOAD and not self._hot_reload_active():
+            logging.warning("HOT_RELOAD chỉ áp dụng cho chế độ streaming (STREAMING=True), bỏ qua")
+        # Bộ từ điển đang dùng: phiên bản, teencode, spam checker và fingerprint cache luôn đi cùng nhau
+        self.dictionaries = self._load_dictionaries(strict=False)
+        self.dict_version = self.dictionaries.version
+        self.spam_checker = self.dictionaries.spam_checker
+        self.cache = self._open_cache() if self.cfg.USE_CACHE else None
+        self.metrics = create_metrics(self.cfg.METRICS_ENABLED, self.cfg.METRICS_PORT)
+        self.near_dup_index = self._new_near_dup_index()
+        self.near_dup_audit_file = self.cfg.NEAR_DUP_AUDIT_FILE
+
+    @property
+    def preprocessor(self) -> TextPreprocessor:
+        # Chỉ load VnCoreNLP khi thực sự cần: ở chế độ đa process, process chính không dùng tới
+        if self._preprocessor is None:
+            nlp = create_segmenter(*self._segmenter_args())
+            self._preprocessor = TextPreprocessor(self.cfg.VNCORENLP_DIR, self.cfg.TEENCODE_FILE,
+                                                  single_pass=self.cfg.SINGLE_PASS_SEGMENTATION, nlp=nlp,
+                                                  teencode=self.dictionaries.teencode_converter)
+        return self._preprocessor
+
+    def _segmenter_args(self) -> Tuple:
+        """Tham số của create_segmenter (process chính và các worker dùng chung)."""
+        return (self.cfg.SEGMENTER, self.cfg.VNCORENLP_DIR, self.cfg.SEGMENTER_DICT_FILE, self.cfg.SEGMENTER_ADDRESS)
+
+    def _server_identity(self) -> Dict:
+        """Identity của segment server (backend + phiên bản model/từ điển server đã nạp, qua ping)."""
+        client = create_segmenter(*self._segmenter_args())
+        try:
+            return client.identity()
+        finally:
+            client.close()
+
+    def _cache_settings(self) -> Dict:
+        settings = {
+            "version": TextPreprocessor.VERSION,
+            "single_pass": self.cfg.SINGLE_PASS_SEGMENTATION,
+            "annotators": ["wseg", "pos"],
+            "segmenter": self.cfg.SEGMENTER,
+            # Từ điển chỉ ảnh hưởng kết quả của longest_match
+            "segmenter_dict": (dictionary_version([self.cfg.SEGMENTER_DICT_FILE])
+                               if self.cfg.SEGMENTER == "longest_match" else None),
+        }
+        if self.cfg.SEGMENTER == "server":
+            # Daemon có thể chạy backend / từ điển / model khác cấu hình local (VNCORENLP_DIR,
+            # SEGMENTER_DICT_FILE): dùng identity do chính server báo thay vì chỉ chữ "server"
+            settings["segmenter"] = self._server_identity()
+        return settings
+
+    def _cache_fingerprint(self) -> str:
+        return PreprocessCache.make_fingerprint(self.cfg.TEENCODE_FILE, self._cache_settings(),
+                                                self.cfg.VNCORENLP_DIR)
+
+    def _open_cache(self) -> PreprocessCache:
+        return PreprocessCache(self.cfg.CACHE_DIR, self.dictionaries.cache_fingerprint,
+                               max_entries=self.cfg.CACHE_MAX_ENTRIES)
+
+    # --- Hot-reload từ điển ---
+
+    def _resource_files(self) -> List[str]:
+        return [self.cfg.TEENCODE_FILE, self.cfg.SPAM_KEYWORDS_FILE]
+
+    def _hot_reload_active(self) -> bool:
+        # Chỉ streaming có ranh giới chunk để đổi từ điển giữa chừng; run() xử lý 1 lần, chế độ thư mục
+        # đã tự xử lý lại các file khi từ điển đổi (manifest) nên không cần watcher
+        return self.cfg.HOT_RELOAD and self.cfg.STREAMING and not self.cfg.DIRECTORY_MODE
+
+    def _load_dictionaries(self, strict: bool = True) -> DictionarySet:
+        """
+        Dựng bộ từ điển từ teencode.json + spamkeyword.json hiện tại.
+        strict=True (hot-reload): JSON ghi dở/sai cú pháp hoặc file đổi trong lúc dựng -> ném lỗi để watcher
+        giữ nguyên phiên bản cũ. strict=False (khởi động): JSON lỗi -> log lỗi và dùng bảng rỗng.
+        """
+        version = dictionary_version(self._resource_files())
+        dictionaries = DictionarySet(
+            version=version,
+            teencode_converter=TeencodeConverter(self.cfg.TEENCODE_FILE, strict=strict),
+            spam_checker=SpamChecker(self.cfg.SPAM_KEYWORDS_FILE, strict=strict),
+            cache_fingerprint=self._cache_fingerprint(),
+        )
+        if strict and dictionary_version(self._resource_files()) != version:
+            raise RuntimeError("Từ điển thay đổi trong lúc dựng, thử lại ở chu kỳ sau")
+        return dictionaries
+
+    def _start_watcher(self):
+        if self._hot_reload_active() and self._watcher is None:
+            self._watcher = ResourceWatcher(self._resource_files(), self._rebuild_dictionaries,
+                                            interval=self.cfg.RELOAD_INTERVAL).start()
+
+    def _rebuild_dictionaries(self, changed: List[str]):
+        """Chạy trên thread của watcher: dựng bộ từ điển mới rồi công bố bằng 1 phép gán."""
+        latest = self._load_dictionaries()
+        self._latest_dictionaries = latest
+        logging.info(f"Đã dựng từ điển mới {latest.version} ({', '.join(os.path.basename(p) for p in changed)}), "
+                     f"áp dụng từ chunk kế tiếp")
+
+    def _apply_latest_dictionaries(self):
+        """Gọi ở ranh giới giữa các chunk: chunk đang chạy dùng trọn từ điển cũ, chunk sau dùng bản mới."""
+        latest = self._latest_dictionaries
+        if latest is None or latest.version == self.dict_version:
+            return
+        self.dictionaries = latest
+        self.dict_version = latest.version
+        self.spam_checker = latest.spam_checker
+        if self._preprocessor is not None:
+            self._preprocessor.teencode_converter = latest.teencode_converter
+        if self.cache is not None:
+            # Kết quả cache dựng từ teencode cũ không còn đúng
+            self.cache.set_fingerprint(latest.cache_fingerprint)
+        logging.info(f"Chuyển sang từ điển phiên bản {latest.version}")
+
+    def _output_format(self) -> str:
+        return self.cfg.OUTPUT_FORMAT or detect_format(self.cfg.OUTPUT_FILE)
+
+    def _input_columns(self) -> List[str]:
+        """Các cột cần đọc từ input (chiếu cột khi đọc)."""
+        return ['text'] + [col for col in self.cfg.OUTPUT_EXTRA_COLUMNS if col != 'text']
+
+    def _output_columns(self) -> List[str]:
+        columns = ['processed_text'] + list(self.cfg.OUTPUT_EXTRA_COLUMNS)
+        if self.cfg.NEAR_DUPLICATE:
+            columns.append('cluster_id')
+        if self._hot_reload_active():
+            columns.append('dict_version')
+        if self.cfg.DIRECTORY_MODE:
+            columns.append('video_id')
+        return columns
 
-    def load_data(self, filepath: str) -> pd.DataFrame:
+    def _record_stage_timings(self, timings: Dict[str, float]):
+        """Cộng dồn thời gian 1 lần process_many (1 lô/chunk) và ghi vào histogram."""
+        for name, sec in timings.items():
+            self.stage_timings[name] = self.stage_timings.get(name, 0.0) + sec
+        self.metrics.observe_many(timings)
+
+    def _record_counters(self, counters: Dict[str, int]):
+        for name, value in counters.items():
+            self.metrics.inc(name, value)
+
+    def _write_metrics_report(self):
+        self.metrics.write_report(self.cfg.METRICS_REPORT_FILE, extra={
+            "input_file": self.cfg.INPUT_FILE,
+            "output_file": self.cfg.OUTPUT_FILE,
+            "dict_version": self.dict_version,
+            "stage_totals_seconds": {name: round(sec, 6) for name, sec in self.stage_timings.items()},
+            "cache": self.cache.report() if self.cache is not None else None,
+        })
+
+    def _timed_chunks(self, chunks):
+        """Bọc iterator chunk để đo thời gian đọc CSV của từng chunk."""
+        iterator = iter(chunks)
+        while True:
+            with self.metrics.time('read'):
+                chunk = next(iterator, None)
+            if chunk is None:
+                return
+            yield chunk
+
+    def _log_stage_timings(self):
+        if self.stage_timings:
+            parts = ', '.join(f"{name} {sec:.2f}s" for name, sec in self.stage_timings.items())
+            logging.info(f"Thời gian các bước xử lý: {parts}")
+
+    def _log_cache_report(self):
+        if self.cache is None:
+            return
+        report = self.cache.report()
+        logging.info(f"Cache: {report['hits']} hit / {report['misses']} miss "
+                     f"(hit rate {report['hit_rate']:.1%}), {report['entries']} entry trên đĩa")
+
+    @staticmethod
+    def _log_encoding(guess: EncodingGuess):
+        logging.info(f"Encoding '{guess.encoding}' (nhận diện qua {guess.source}, {guess.seconds * 1000:.2f} ms)")
+
+    def load_data(self, filepath: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Đọc CSV / Parquet / Arrow (theo đuôi file); `columns`: chỉ đọc các cột này.
+        CSV: nhận diện encoding từ vài KB đầu file rồi parse đúng 1 lần.
+        """
         logging.info(f"Đọc file: {filepath}")
-        for enc in ['utf-8-sig', 'utf-8', 'utf-16']:
-            try:
-                df = pd.read_csv(filepath, encoding=enc)
-                logging.info(f"Encoding '{enc}': OK. Số dòng: {len(df)}")
-                return df
-            except Exception:
-                continue
-        raise ValueError("Không đọc được file CSV (thử kiểm tra encoding hoặc đường dẫn).")
+        fmt = detect_format(filepath)
+        if fmt != "csv":
+            df = read_table(filepath, columns=columns, fmt=fmt)
+            logging.info(f"Định dạng {fmt}. Số dòng: {len(df)}")
+            return df
+        guess = detect_encoding(filepath)
+        self._log_encoding(guess)
+        try:
+            df = pd.read_csv(filepath, encoding=guess.encoding, usecols=columns, dtype=self.CSV_DTYPES)
+        except (UnicodeDecodeError, pd.errors.ParserError) as e:
+            raise ValueError(f"Không đọc được file CSV với encoding '{guess.encoding}': {e}") from e
+        logging.info(f"Số dòng: {len(df)}")
+        return df
 
-    def filter_noise(self, df: pd.DataFrame) -> pd.DataFrame:
+    def iter_chunks(self, filepath, chunksize: int, columns: Optional[List[str]] = None):
+        """
+        Đọc CSV / Parquet / Arrow theo từng chunk `chunksize` dòng (index vẫn liên tục như khi đọc cả file).
+        `filepath` có thể là luồng byte CSV (vd sys.stdin.buffer): encoding được nhận diện từ phần đầu luồng.
+        """
+        if hasattr(filepath, 'read'):
+            logging.info(f"Đọc luồng CSV theo chunk ({chunksize} dòng)")
+            guess, source = open_detected(filepath)
+            self._log_encoding(guess)
+            with pd.read_csv(source, chunksize=chunksize, usecols=columns, dtype=self.CSV_DTYPES) as reader:
+                yield from reader
+            return
+
+        logging.info(f"Đọc file theo chunk ({chunksize} dòng): {filepath}")
+        fmt = detect_format(filepath)
+        if fmt != "csv":
+            yield from iter_table(filepath, chunksize, columns=columns, fmt=fmt)
+            return
+        guess = detect_encoding(filepath)
+        self._log_encoding(guess)
+        with pd.read_csv(filepath, encoding=guess.encoding, chunksize=chunksize, usecols=columns,
+                         dtype=self.CSV_DTYPES) as reader:
+            yield from reader
+
+    @staticmethod
+    def _text_hashes(texts: pd.Series) -> List[int]:
+        # Lưu hash 64-bit thay vì cả chuỗi để bộ nhớ dedup giữa các chunk nhỏ gọn
+        return pd.util.hash_pandas_object(texts, index=False).tolist()
+
+    def _near_dup_settings(self) -> Optional[List]:
+        if not self.cfg.NEAR_DUPLICATE:
+            return None
+        # Kèm (bands, rows) của LSH: đổi cách chọn dải thì checkpoint cũ không được dùng tiếp
+        return [self.cfg.NEAR_DUP_THRESHOLD, self.cfg.NEAR_DUP_NUM_PERM, self.cfg.NEAR_DUP_SHINGLE_SIZE,
+                *lsh_params(self.cfg.NEAR_DUP_NUM_PERM, self.cfg.NEAR_DUP_THRESHOLD)]
+
+    def _new_near_dup_index(self) -> Optional[NearDuplicateIndex]:
+        if not self.cfg.NEAR_DUPLICATE:
+            return None
+        return NearDuplicateIndex(threshold=self.cfg.NEAR_DUP_THRESHOLD, num_perm=self.cfg.NEAR_DUP_NUM_PERM,
+                                  shingle_size=self.cfg.NEAR_DUP_SHINGLE_SIZE)
+
+    def _write_near_dup_audit(self, dropped: pd.DataFrame):
+        """Ghi nối các dòng bị loại vì gần trùng (index, cluster_id, similarity, text) vào file audit."""
+        if dropped.empty:
+            return
+        path = self.near_dup_audit_file
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        dropped.to_csv(path, index=True, header=new_file, mode='w' if new_file else 'a',
+                       encoding='utf-8-sig' if new_file else 'utf-8')
+
+    def _filter_near_duplicates(self, df: pd.DataFrame, replay: bool = False) -> pd.DataFrame:
+        """Gán cluster_id cho từng dòng và bỏ các dòng gần trùng với đại diện của cụm."""
+        with self.metrics.time('near_dup'):
+            cluster_ids, similarity, is_duplicate = self.near_dup_index.add(df['text'].astype(str).tolist(),
+                                                                            df.index.tolist())
+        df = df.assign(cluster_id=cluster_ids)
+        if not replay:
+            audit = df.loc[is_duplicate, ['cluster_id', 'text']]
+            audit.insert(1, 'similarity', similarity[is_duplicate].round(3))
+            self._write_near_dup_audit(audit)
+        return df[~is_duplicate]
+
+    def filter_noise(self, df: pd.DataFrame, seen: Optional[SeenHashes] = None, return_report: bool = False,
+                     replay: bool = False):
+        """
+        Lọc dòng rỗng, trùng lặp, quá ngắn, từ quá dài, spam và (nếu bật NEAR_DUPLICATE) gần trùng lặp.
+        `seen`: tập hash (SeenHashes) các text đã gặp ở những chunk trước (chế độ streaming),
+        dùng để bỏ trùng lặp xuyên chunk; được cập nhật tại chỗ.
+        `return_report=True`: trả về (df, report) với report là số dòng bị loại theo từng lý do.
+        `replay=True`: chỉ dựng lại trạng thái dedup cho chunk đã xử lý (khi chạy tiếp từ checkpoint),
+        không đếm dòng bị loại, không log, không ghi file audit.
+        """
         initial_count = len(df)
+        report = {"empty": 0, "duplicate": 0, "too_short": 0, "long_word": 0, "spam": 0,
+                  "near_duplicate": 0, "spam_by_category": {}}
         
         # Lọc dòng rỗng/trùng
-        df = df.dropna(subset=['text']).drop_duplicates(subset=['text'], keep='first')
+        df = df.dropna(subset=['text'])
+        report["empty"] = initial_count - len(df)
+        n_before = len(df)
+        df = df.drop_duplicates(subset=['text'], keep='first')
+        if seen is not None and len(df):
+            hashes = self._text_hashes(df['text'])
+            is_new = [not hit for hit in seen.contains_many(hashes)]
+            df = df[is_new]
+            seen.update(h for h, new in zip(hashes, is_new) if new)
+        report["duplicate"] = n_before - len(df)
         
-        # Hàm kiểm tra hợp lệ
-        def is_valid_content(text):
-            text = str(text).strip()
-            # Quá ngắn
-            if len(text) < self.cfg.MIN_TEXT_LENGTH: return False
-            # Từ dài vô lý (aaaaaaaa...)
-            longest = max(text.split(), key=len, default="")
-            if len(longest) > self.cfg.MAX_WORD_LENGTH: return False
-            # Dính spam keywords
-            if self.spam_checker.is_spam(text, self.cfg.SPAM_THRESHOLD): return False
-            return True
-
-        valid_mask = df['text'].apply(is_valid_content)
-        df_clean = df[valid_mask].copy()
+        # Kiểm tra hợp lệ trên cả cột thay vì từng dòng
+        # (dtype object để .str dùng đúng ngữ nghĩa Unicode của Python như str.split()/str.lower())
+        text = df['text'].astype(str).astype(object).str.strip()
+        # Quá ngắn
+        too_short = text.str.len() < self.cfg.MIN_TEXT_LENGTH
+        # Từ dài vô lý (aaaaaaaa...): có chuỗi không chứa khoảng trắng dài hơn MAX_WORD_LENGTH
+        long_word = ~too_short & text.str.contains(rf'\S{{{self.cfg.MAX_WORD_LENGTH + 1},}}', regex=True)
+        # Dính spam keywords: 1 lần quét bằng regex gộp cho mỗi dòng,
+        # chỉ những dòng có từ khóa mới đếm số category bị dính
+        remaining = ~too_short & ~long_word
+        lowered = text[remaining].str.lower()
+        has_keyword = lowered.map(self.spam_checker.search_any).astype(bool)
+        candidates = lowered[has_keyword]
+        category_hits = pd.DataFrame({category: candidates.map(pattern.search).notna()
+                                      for category, pattern in self.spam_checker.patterns.items()},
+                                     index=candidates.index, dtype=bool)
+        n_categories = category_hits.sum(axis=1).reindex(text.index, fill_value=0)
+        spam = remaining & (n_categories >= self.cfg.SPAM_THRESHOLD) & (text.str.len() > 0)
+
+        report["too_short"] = int(too_short.sum())
+        report["long_word"] = int(long_word.sum())
+        report["spam"] = int(spam.sum())
+        spam_hits = category_hits[spam.reindex(category_hits.index, fill_value=False)]
+        report["spam_by_category"] = {category: int(n) for category, n in spam_hits.sum().items() if n}
+
+        df_clean = df[remaining & ~spam].copy()
+        if self.near_dup_index is not None and len(df_clean):
+            n_before = len(df_clean)
+            df_clean = self._filter_near_duplicates(df_clean, replay=replay)
+            report["near_duplicate"] = n_before - len(df_clean)
+        if replay:
+            return (df_clean, report) if return_report else df_clean
         
         dropped = initial_count - len(df_clean)
+        for reason in ("empty", "duplicate", "too_short", "long_word", "spam", "near_duplicate"):
+            self.metrics.inc("dropped", report[reason], reason=reason)
         logging.info(f"Đã lọc bỏ {dropped} dòng rác/spam. Còn lại: {len(df_clean)}")
+        logging.info(f"Chi tiết lọc: {report}")
+        if return_report:
+            return df_clean, report
         return df_clean
 
+    def preprocess_texts(self, texts: List[str]) -> List[str]:
+        if self.cache is None:
+            return self._preprocess_uncached(texts)
+
+        # Gom các comment giống nhau theo key, tra cache trước, chỉ xử lý những text chưa có
+        results = [""] * len(texts)
+        positions: Dict[str, List[int]] = {}
+        for i, text in enumerate(texts):
+            if isinstance(text, str) and text.strip():
+                positions.setdefault(PreprocessCache.make_key(text), []).append(i)
+
+        with self.metrics.time('cache_lookup'):
+            cached = self.cache.get_many(list(positions))
+        todo_keys = [key for key in positions if key not in cached]
+        degraded: Set[int] = set()
+        processed = self._preprocess_uncached([texts[positions[key][0]] for key in todo_keys], degraded)
+        # Kết quả từ đường lỗi/fallback của NLP không được cache: lần chạy sau sẽ xử lý lại
+        with self.metrics.time('cache_store'):
+            self.cache.put_many((key, value) for k, (key, value) in enumerate(zip(todo_keys, processed))
+                                if k not in degraded)
+        self.metrics.inc('cache_hit', len(cached))
+        self.metrics.inc('cache_miss', len(todo_keys))
+
+        for key, value in list(cached.items()) + list(zip(todo_keys, processed)):
+            for i in positions[key]:
+                results[i] = value
+        return results
+
+    def _preprocess_uncached(self, texts: List[str], degraded: Optional[Set[int]] = None) -> List[str]:
+        """`degraded`: nếu truyền vào, thêm vị trí các comment đi qua đường lỗi/fallback của NLP."""
+        if self.cfg.NUM_WORKERS > 1:
+            return self._preprocess_parallel(texts, degraded)
+
+        batch_size = self.cfg.NLP_BATCH_SIZE
+        results = []
+        with tqdm(total=len(texts), desc="Tiến độ") as pbar:
+            # Mỗi lần clean theo cột + NLP cho một đoạn, để thanh tiến độ vẫn cập nhật đều
+            step = max(batch_size * 16, 1000)
+            for start in range(0, len(texts), step):
+                chunk = texts[start:start + step]
+                self.metrics.set_queue_depth('pending_comments', len(texts) - start)
+                timings, chunk_degraded = {}, set()
+                results.extend(self.preprocessor.process_many(chunk, batch_size=batch_size, timings=timings,
+                                                              degraded=chunk_degraded))
+                if degraded is not None:
+                    degraded.update(start + k for k in chunk_degraded)
+                self._record_stage_timings(timings)
+                self._record_counters(self.preprocessor.pop_counters())
+                pbar.update(len(chunk))
+            self.metrics.set_queue_depth('pending_comments', 0)
+        return results
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Pool được giữ suốt 1 lần chạy (kể cả nhiều chunk streaming) => mỗi worker chỉ load model 1 lần
+        if self._executor is None:
+            # 'spawn' thay vì 'fork': fork một process đã khởi động JVM là không an toàn
+            ctx = multiprocessing.get_context('spawn')
+            initargs = (self._segmenter_args(), self._teencode_snapshot(), self.cfg.SINGLE_PASS_SEGMENTATION,
+                        self.cfg.NLP_BATCH_SIZE, self.dict_version)
+            self._executor = ProcessPoolExecutor(max_workers=self.cfg.NUM_WORKERS, mp_context=ctx,
+                                                 initializer=_init_worker, initargs=initargs)
+        return self._executor
+
+    def _teencode_snapshot(self) -> str:
+        """Ghi (1 lần cho mỗi phiên bản) bảng teencode đang dùng ra file pickle cho các worker nạp."""
+        if self._snapshot_dir is None:
+            self._snapshot_dir = tempfile.mkdtemp(prefix="teencode_snapshots_")
+        path = os.path.join(self._snapshot_dir, f"teencode.{self.dict_version}.pkl")
+        if not os.path.exists(path):
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(self.dictionaries.teencode_converter, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        return path
+
+    def close(self):
+        """Tắt pool worker, watcher, đóng cache và xoá snapshot teencode (nếu có)."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._snapshot_dir is not None:
+            shutil.rmtree(self._snapshot_dir, ignore_errors=True)
+            self._snapshot_dir = None
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+        if self.cache is not None:
+            self.cache.close()
+
+    def _preprocess_parallel(self, texts: List[str], degraded: Optional[Set[int]] = None) -> List[str]:
+        n_workers = self.cfg.NUM_WORKERS
+        chunk_size = max(self.cfg.WORKER_CHUNK_SIZE, 1)
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        logging.info(f"Xử lý song song: {n_workers} worker, {len(chunks)} chunk x {chunk_size} comment")
+
+        results = []
+        with tqdm(total=len(texts), desc="Tiến độ") as pbar:
+            # executor.map trả kết quả đúng thứ tự các chunk gửi đi
+            executor = self._get_executor()
+            versions = [self.dict_version] * len(chunks)
+            snapshots = [self._teencode_snapshot()] * len(chunks)
+            self.metrics.set_queue_depth('worker_chunks', len(chunks))
+            outputs = executor.map(_process_chunk, chunks, versions, snapshots)
+            for done, (out, timings, counters, chunk_degraded) in enumerate(outputs, 1):
+                if degraded is not None:
+                    degraded.update(len(results) + k for k in chunk_degraded)
+                results.extend(out)
+                pbar.update(len(out))
+                # Cộng dồn thời gian đo trong từng worker (tổng của mọi worker, lớn hơn wall-time)
+                self._record_stage_timings(timings)
+                self._record_counters(counters)
+                # Số chunk đã gửi cho pool nhưng chưa lấy kết quả
+                self.metrics.set_queue_depth('worker_chunks', len(chunks) - done)
+        return results
+
+    def _load_checkpoint(self) -> Optional[Dict]:
+        path = self.cfg.CHECKPOINT_FILE
+        if not os.path.exists(path) or not os.path.exists(self.cfg.OUTPUT_FILE):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except Exception as e:
+            logging.warning(f"Checkpoint hỏng, chạy lại từ đầu: {e}")
+            return None
+        # Chỉ chạy tiếp nếu vẫn là cùng file input và cùng kích thước chunk
+        stat = os.stat(self.cfg.INPUT_FILE)
+        if (state.get('input_file') != self.cfg.INPUT_FILE or state.get('input_size') != stat.st_size
+                or state.get('input_mtime') != stat.st_mtime or state.get('chunk_size') != self.cfg.STREAM_CHUNK_SIZE
+                or state.get('columns', ['processed_text']) != self._output_columns()
+                or state.get('near_dup') != self._near_dup_settings()
+                or state.get('format', 'csv') != self._output_format()):
+            logging.warning("Checkpoint không khớp với input/cấu hình hiện tại, chạy lại từ đầu.")
+            return None
+        return state
+
+    def _save_checkpoint(self, state: Dict):
+        # Ghi ra file tạm rồi os.replace để checkpoint không bao giờ bị ghi dở
+        tmp_path = self.cfg.CHECKPOINT_FILE + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.cfg.CHECKPOINT_FILE)
+
+    def run_streaming(self):
+        """
+        Đọc input theo chunk STREAM_CHUNK_SIZE dòng: lọc -> xử lý -> ghi nối (append) vào output.
+        Sau mỗi chunk ghi checkpoint (số chunk đã xong + kích thước file output),
+        nên khi chạy lại sẽ tiếp tục từ chunk cuối cùng đã ghi xong.
+        """
+        cfg = self.cfg
+        output_path = cfg.OUTPUT_FILE
+        fmt = self._output_format()
+        state = self._load_checkpoint()
+        if state is None:
+            stat = os.stat(cfg.INPUT_FILE)
+            state = {'input_file': cfg.INPUT_FILE, 'input_size': stat.st_size, 'input_mtime': stat.st_mtime,
+                     'chunk_size': cfg.STREAM_CHUNK_SIZE, 'columns': self._output_columns(),
+                     'near_dup': self._near_dup_settings(), 'format': fmt,
+                     'chunks_done': 0, 'rows_written': 0, 'output_bytes': 0, 'audit_bytes': 0}
+            for path in (output_path, cfg.NEAR_DUP_AUDIT_FILE):
+                remove_output(path)
+            if fmt != "csv":
+                os.makedirs(output_path)
+        else:
+            logging.info(f"Chạy tiếp từ checkpoint: đã xong {state['chunks_done']} chunk, {state['rows_written']} dòng")
+            # Cắt bỏ phần output của chunk đang ghi dở (nếu có) lúc bị ngắt
+            if fmt == "csv":
+                with open(output_path, 'r+b') as f:
+                    f.truncate(state['output_bytes'])
+            else:
+                remove_parts(output_path, state['chunks_done'])
+            if os.path.exists(cfg.NEAR_DUP_AUDIT_FILE):
+                with open(cfg.NEAR_DUP_AUDIT_FILE, 'r+b') as f:
+                    f.truncate(state.get('audit_bytes', 0))
+
+        seen = SeenHashes(cfg.DEDUP_MEMORY_ENTRIES, cfg.CACHE_DIR)
+        columns = self._output_columns()
+        self._start_watcher()
+        try:
+            chunks = self.iter_chunks(cfg.INPUT_FILE, cfg.STREAM_CHUNK_SIZE, columns=self._input_columns())
+            for i, chunk in enumerate(self._timed_chunks(chunks)):
+                if i < state['chunks_done']:
+                    # Chunk đã xử lý: chỉ dựng lại trạng thái dedup
+                    if self.near_dup_index is not None:
+                        # Chỉ mục gần trùng phải thấy đúng các dòng đã qua bộ lọc như lần chạy trước
+                        self.filter_noise(chunk, seen=seen, replay=True)
+                    else:
+                        seen.update(self._text_hashes(chunk['text'].dropna()))
+                    continue
+
+                self._apply_latest_dictionaries()
+                self.metrics.inc('input', len(chunk))
+                with self.metrics.time('filter'):
+                    df = self.filter_noise(chunk, seen=seen)
+                logging.info(f"Chunk {i}: xử lý {len(df)} dòng...")
+                df['processed_text'] = self.preprocess_texts(df['text'].tolist())
+                df['dict_version'] = self.dict_version
+                df_final = df[df['processed_text'].str.strip().astype(bool)]
+                self.metrics.inc('empty_after_processing', len(df) - len(df_final))
+                self.metrics.inc('output', len(df_final))
+
+                # CSV: chunk đầu tiên ghi header + BOM, các chunk sau ghi nối.
+                # Parquet/Arrow: mỗi chunk 1 file part (chunk rỗng không ghi part)
+                with self.metrics.time('write'):
+                    if fmt != "csv":
+                        if len(df_final):
+                            write_table(df_final.reindex(columns=columns), part_path(output_path, i, fmt), fmt,
+                                        compression=cfg.OUTPUT_COMPRESSION)
+                    elif state['output_bytes'] == 0:
+                        df_final.reindex(columns=columns).to_csv(output_path, index=True, encoding='utf-8-sig')
+                    else:
+                        df_final.reindex(columns=columns).to_csv(output_path, index=True, header=False,
+                                                                 mode='a', encoding='utf-8')
+
+                state['chunks_done'] = i + 1
+                state['rows_written'] += len(df_final)
+                if fmt == "csv":
+                    state['output_bytes'] = os.path.getsize(output_path)
+                if os.path.exists(cfg.NEAR_DUP_AUDIT_FILE):
+                    state['audit_bytes'] = os.path.getsize(cfg.NEAR_DUP_AUDIT_FILE)
+                self._save_checkpoint(state)
+        except Exception as e:
+            logging.error(f"Dừng ở chunk {state['chunks_done']} (chạy lại để tiếp tục): {e}")
+            return
+        finally:
+            seen.close()
+            self.close()
+            self._log_stage_timings()
+            self._log_cache_report()
+            self._write_metrics_report()
+
+        if os.path.exists(cfg.CHECKPOINT_FILE):
+            os.remove(cfg.CHECKPOINT_FILE)
+        logging.info(f"XONG! {state['rows_written']} dòng, kết quả lưu tại: {output_path}")
+        self._export_token_corpus()
+
+    def _export_token_corpus(self):
+        if self.cfg.TOKEN_CORPUS_DIR:
+            build_token_corpus(self.cfg.OUTPUT_FILE, self.cfg.TOKEN_CORPUS_DIR, chunksize=self.cfg.STREAM_CHUNK_SIZE)
+
+    def _write_output(self, df: pd.DataFrame, path: str, fmt: str):
+        """Ghi 1 file output (giữ index gốc) theo định dạng fmt."""
+        if fmt == "csv":
+            df.to_csv(path, index=True, encoding='utf-8-sig')
+        else:
+            remove_output(path)
+            write_table(df, path, fmt, compression=self.cfg.OUTPUT_COMPRESSION)
+
+    # --- Chế độ thư mục (nhiều file raw, chạy tăng dần theo manifest) ---
+
+    def _discover_inputs(self) -> Dict[str, str]:
+        """video_id (tên file không đuôi) -> đường dẫn, theo thứ tự tên."""
+        paths = sorted(glob.glob(os.path.join(self.cfg.INPUT_DIR, self.cfg.INPUT_GLOB)))
+        return {os.path.splitext(os.path.basename(path))[0]: path for path in paths if os.path.isfile(path)}
+
+    def _directory_settings(self) -> Dict:
+        """Mọi thứ ảnh hưởng tới kết quả 1 file: đổi bất kỳ mục nào => xử lý lại mọi file."""
+        return {
+            "dictionaries": dictionary_version(self._resource_files()),
+            "preprocess": self._cache_fingerprint()[:12],
+            "filter": [self.cfg.MIN_TEXT_LENGTH, self.cfg.MAX_WORD_LENGTH, self.cfg.SPAM_THRESHOLD],
+            "near_dup": self._near_dup_settings(),
+            "columns": self._output_columns(),
+            "format": self._output_format(),
+        }
+
+    def _part_file(self, video_id: str) -> str:
+        return os.path.join(self.cfg.OUTPUT_DIR, f"{video_id}.{self._output_format()}")
+
+    def _load_input_file(self, video_id: str, path: str) -> Tuple[pd.DataFrame, int]:
+        """Đọc + lọc 1 file raw; trùng lặp/gần trùng chỉ xét trong cùng video. Trả về (df, số dòng input)."""
+        with self.metrics.time('read'):
+            df = self.load_data(path, columns=self._input_columns())
+        rows_in = len(df)
+        self.metrics.inc('input', rows_in)
+        self.near_dup_index = self._new_near_dup_index()
+        self.near_dup_audit_file = os.path.join(self.cfg.OUTPUT_DIR, f"{video_id}.near_dup.csv")
+        if os.path.exists(self.near_dup_audit_file):
+            os.remove(self.near_dup_audit_file)
+        with self.metrics.time('filter'):
+            df = self.filter_noise(df)
+        df['video_id'] = video_id
+        return df, rows_in
+
+    def _process_file_batch(self, batch: List[Tuple[str, str, Dict, pd.DataFrame, int]],
+                            manifest: ProcessedManifest, version: str):
+        """
+        Xử lý NLP chung 1 lần cho nhiều file (worker pool/cache dùng chung, không bị nghẽn ở file nhỏ),
+        rồi tách kết quả ghi ra từng file và cập nhật manifest.
+        """
+        texts = [text for _, _, _, df, _ in batch for text in df['text'].tolist()]
+        logging.info(f"Xử lý {len(batch)} file, {len(texts)} dòng...")
+        processed = self.preprocess_texts(texts)
+        columns = self._output_columns()
+        start = 0
+        for video_id, path, fingerprint, df, rows_in in batch:
+            df['processed_text'] = processed[start:start + len(df)]
+            start += len(df)
+            df_final = df[df['processed_text'].str.strip().astype(bool)]
+            self.metrics.inc('empty_after_processing', len(df) - len(df_final))
+            self.metrics.inc('output', len(df_final))
+            output = self._part_file(video_id)
+            with self.metrics.time('write'):
+                self._write_output(df_final.reindex(columns=columns), output, self._output_format())
+            previous = manifest.files.get(video_id)
+            if previous and previous["output"] != output:
+                # Đổi định dạng output: bỏ file kết quả cũ
+                remove_output(previous["output"])
+            manifest.record(video_id, path, fingerprint, version, output, rows_in, len(df_final))
+        # Manifest được ghi sau mỗi lô: bị ngắt giữa chừng thì lần sau chỉ làm lại lô dở
+        manifest.save()
+
+    def _write_merged(self, manifest: ProcessedManifest):
+        """Gộp kết quả của mọi video (theo thứ tự video_id) thành OUTPUT_FILE."""
+        fmt = self._output_format()
+        outputs = [manifest.files[video_id]["output"] for video_id in sorted(manifest.files)]
+        output_path = self.cfg.OUTPUT_FILE
+        with self.metrics.time('write'):
+            if fmt == "csv":
+                # Các file cùng header: nối byte, chỉ giữ BOM + header của file đầu
+                tmp_path = output_path + ".tmp"
+                with open(tmp_path, 'wb') as out:
+                    for i, path in enumerate(outputs):
+                        with open(path, 'rb') as f:
+                            header = f.readline()
+                            if i == 0:
+                                out.write(header)
+                            shutil.copyfileobj(f, out)
+                os.replace(tmp_path, output_path)
+            else:
+                frames = [read_table(path, fmt=fmt) for path in outputs]
+                merged = pd.concat(frames) if frames else pd.DataFrame(columns=self._output_columns())
+                self._write_output(merged, output_path, fmt)
+        manifest.merged = True
+        manifest.save()
+        logging.info(f"Đã gộp {len(outputs)} video vào {output_path}")
+
+    def run_directory(self):
+        """
+        Xử lý tăng dần mọi file raw trong INPUT_DIR: file đã có trong manifest với cùng hash nội dung
+        và cùng cấu hình được bỏ qua, file mới/thay đổi được xử lý, file đã bị xoá được gỡ khỏi output.
+        Các file cần xử lý được gom thành lô ~STREAM_CHUNK_SIZE dòng, NLP của cả lô chạy song song
+        trên NUM_WORKERS process; cuối cùng OUTPUT_FILE được gộp lại nếu có thay đổi.
+        """
+        cfg = self.cfg
+        os.makedirs(cfg.OUTPUT_DIR, exist_ok=True)
+        manifest = ProcessedManifest(cfg.MANIFEST_FILE)
+        manifest.settings = self._directory_settings()
+        version = settings_version(manifest.settings)
+
+        inputs = self._discover_inputs()
+        todo = []
+        for video_id, path in inputs.items():
+            fingerprint = manifest.fingerprint(video_id, path)
+            if manifest.is_current(video_id, fingerprint, version):
+                # Cập nhật mtime (file bị touch nhưng nội dung không đổi) để lần sau khỏi hash lại
+                manifest.files[video_id].update(fingerprint)
+            else:
+                todo.append((video_id, path, fingerprint))
+        removed = [video_id for video_id in manifest.files if video_id not in inputs]
+        for video_id in removed:
+            entry = manifest.remove(video_id)
+            for path in (entry["output"], os.path.join(cfg.OUTPUT_DIR, f"{video_id}.near_dup.csv")):
+                remove_output(path)
+        manifest.save()
+        logging.info(f"{cfg.INPUT_DIR}: {len(inputs)} file, {len(todo)} mới/thay đổi, "
+                     f"{len(inputs) - len(todo)} không đổi, {len(removed)} đã bị xoá")
+
+        batch, batch_rows = [], 0
+        try:
+            for video_id, path, fingerprint in todo:
+                try:
+                    df, rows_in = self._load_input_file(video_id, path)
+                except Exception as e:
+                    logging.error(f"Bỏ qua {path}: {e}")
+                    continue
+                batch.append((video_id, path, fingerprint, df, rows_in))
+                batch_rows += len(df)
+                if batch_rows >= cfg.STREAM_CHUNK_SIZE:
+                    self._process_file_batch(batch, manifest, version)
+                    batch, batch_rows = [], 0
+            if batch:
+                self._process_file_batch(batch, manifest, version)
+        except Exception as e:
+            logging.error(f"Dừng giữa chừng (chạy lại để tiếp tục từ các file chưa xong): {e}")
+            return
+        finally:
+            self.close()
+            self._log_stage_timings()
+            self._log_cache_report()
+            self._write_metrics_report()
+
+        merged_changed = not manifest.merged or not os.path.exists(cfg.OUTPUT_FILE)
+        if merged_changed:
+            self._write_merged(manifest)
+        logging.info(f"XONG! {len(manifest.files)} video, kết quả gộp tại: {cfg.OUTPUT_FILE}")
+        if merged_changed or (cfg.TOKEN_CORPUS_DIR and not os.path.exists(os.path.join(cfg.TOKEN_CORPUS_DIR,
+                                                                                        "meta.json"))):
+            self._export_token_corpus()
+
     def run(self):
+        if self.cfg.DIRECTORY_MODE:
+            return self.run_directory()
+        if self.cfg.STREAMING:
+            return self.run_streaming()
+
         # 1. Load Data
         try:
-            df = self.load_data(self.cfg.INPUT_FILE)
+            with self.metrics.time('read'):
+                df = self.load_data(self.cfg.INPUT_FILE, columns=self._input_columns())
         except Exception as e:
             logging.error(str(e))
             return
+        self.metrics.inc('input', len(df))
 
         # 2. Filter
-        df = self.filter_noise(df)
+        if os.path.exists(self.near_dup_audit_file):
+            os.remove(self.near_dup_audit_file)
+        with self.metrics.time('filter'):
+            df = self.filter_noise(df)
 
         logging.info("Bắt đầu xử lý (Preprocessing)...")
-        tqdm.pandas(desc="Tiến độ")
-        df['processed_text'] = df['text'].progress_apply(self.preprocessor.process)
+        try:
+            df['processed_text'] = self.preprocess_texts(df['text'].tolist())
+        finally:
+            self.close()
+            self._log_stage_timings()
+            self._log_cache_report()
 
         # Lọc bỏ dòng rỗng sau xử lý
         df_final = df[df['processed_text'].str.strip().astype(bool)]
+        self.metrics.inc('empty_after_processing', len(df) - len(df_final))
+        self.metrics.inc('output', len(df_final))
         
-        # Lưu file: THÊM index=False
+        # Lưu file (giữ index gốc)
         output_path = self.cfg.OUTPUT_FILE
-        df_final[['processed_text']].to_csv(output_path, index=True, encoding='utf-8-sig')
+        fmt = self._output_format()
+        with self.metrics.time('write'):
+            self._write_output(df_final.reindex(columns=self._output_columns()), output_path, fmt)
+        self._write_metrics_report()
         logging.info(f"XONG! Kết quả lưu tại: {output_path}")
+        self._export_token_corpus()
 
 # --- 5. MAIN ENTRY POINT ---
 if __name__ == "__main__":
@@ -0,0 +1,119 @@
+import re
+from typing import List, Sequence, Tuple
+
+import emoji
+
+
+class EmojiEngine:
+    """
+    Mask / restore emoji cho TextPreprocessor, kết quả giống hệt emoji.replace_emoji + emoji.demojize.
+    - Trie các emoji (từ emoji.EMOJI_DATA) và bảng emoji -> tên (":face_with_tears_of_joy:") dựng 1 lần.
+    - 1 regex ký tự đầu tìm vị trí có thể là emoji; text không có ký tự nào như vậy trả về ngay.
+    - Duyệt trie giống hệt emoji.tokenize: đi sâu nhất có thể, chỉ khớp nếu nút cuối là 1 emoji;
+      ký tự biến thể (U+FE0E/U+FE0F) đứng lẻ bị bỏ như thư viện.
+    - Chuỗi có ZWJ (U+200D) dùng thẳng thư viện vì luật ghép chuỗi ZWJ không chuẩn khá phức tạp.
+    """
+
+    TOKEN = "EMOJITOKEN"
+    RESTORE_PATTERN = re.compile(r'EMOJITOKEN\s*(\d+)')
+    _ZWJ = '\u200d'
+    _VARIATION_SELECTORS = ('\ufe0e', '\ufe0f')
+
+    def __init__(self):
+        self._tree = {}
+        for emj in emoji.EMOJI_DATA:
+            node = self._tree
+            for char in emj:
+                node = node.setdefault(char, {})
+            # Key None giữ tên emoji (ký tự luôn là str nên không trùng)
+            node[None] = emoji.demojize(emj)
+        self._candidate_pattern = self._char_class(set(self._tree) | set(self._VARIATION_SELECTORS))
+
+    @staticmethod
+    def _char_class(chars) -> re.Pattern:
+        """
+        Regex 1 ký tự "có thể là đầu emoji". Ký tự BMP được gộp thành các khoảng liên tiếp;
+        mọi ký tự ngoài BMP gộp chung 1 khoảng, để re dùng bitmap thay vì so từng khoảng
+        (ký tự ngoài BMP không phải emoji chỉ tốn thêm 1 lần tra trie).
+        """
+        codes = sorted(ord(c) for c in chars if ord(c) <= 0xFFFF)
+        ranges = []
+        for code in codes:
+            if ranges and code == ranges[-1][1] + 1:
+                ranges[-1][1] = code
+            else:
+                ranges.append([code, code])
+        parts = [re.escape(chr(lo)) if lo == hi else f"{re.escape(chr(lo))}-{re.escape(chr(hi))}"
+                 for lo, hi in ranges]
+        return re.compile('[' + ''.join(parts) + '\U00010000-\U0010FFFF]')
+
+    def _mask_with_library(self, text: str) -> Tuple[str, List[str]]:
+        found_emojis = []
+        def replace_cb(char, _):
+            found_emojis.append(emoji.demojize(char))
+            return f" {self.TOKEN}{len(found_emojis)-1} "
+        return emoji.replace_emoji(text, replace=replace_cb), found_emojis
+
+    def mask(self, text: str) -> Tuple[str, List[str]]:
+        """Thay mỗi emoji bằng " EMOJITOKEN<i> ", trả về (text đã mask, list tên emoji theo thứ tự)."""
+        search = self._candidate_pattern.search
+        match = search(text)
+        if match is None:
+            return text, []
+        if self._ZWJ in text:
+            return self._mask_with_library(text)
+
+        tree = self._tree
+        found_emojis = []
+        parts = []
+        last = 0
+        n = len(text)
+        while match is not None:
+            start = match.start()
+            char = text[start]
+            node = tree.get(char)
+            if node is not None:
+                end = start + 1
+                while end < n and text[end] in node:
+                    node = node[text[end]]
+                    end += 1
+                if None in node:
+                    parts.append(text[last:start])
+                    parts.append(f" {self.TOKEN}{len(found_emojis)} ")
+                    found_emojis.append(node[None])
+                    last = end
+                    match = search(text, end)
+                    continue
+            if char in self._VARIATION_SELECTORS:
+                parts.append(text[last:start])
+                last = start + 1
+            match = search(text, start + 1)
+
+        parts.append(text[last:])
+        return ''.join(parts), found_emojis
+
+    def mask_many(self, texts: Sequence) -> Tuple[List, List[List[str]]]:
+        """
+        Bản theo cột của mask() (list / Series): lọc nhanh bằng regex ký tự đầu,
+        chỉ duyệt trie ở những dòng có thể chứa emoji. Phần tử không phải str giữ nguyên.
+
+        Returns:
+            (list text đã mask, list các list tên emoji), cùng thứ tự với texts
+        """
+        search = self._candidate_pattern.search
+        masked = list(texts)
+        emojis: List[List[str]] = [[] for _ in masked]
+        for pos, text in enumerate(masked):
+            if isinstance(text, str) and search(text) is not None:
+                masked[pos], emojis[pos] = self.mask(text)
+        return masked, emojis
+
+    def restore(self, text: str, found_emojis: List[str]) -> str:
+        """Trả các EMOJITOKEN<i> về tên emoji tương ứng (1 lượt regex)."""
+        if not found_emojis:
+            # Không có emoji nào: mọi token (nếu có) đều ngoài khoảng => giữ nguyên
+            return text
+        def restore_cb(match):
+            idx = int(match.group(1))
+            return f" {found_emojis[idx]} " if 0 <= idx < len(found_emojis) else match.group(0)
+        return self.RESTORE_PATTERN.sub(restore_cb, text)
@@ -0,0 +1,114 @@
+"""
+Nhận diện encoding của file CSV bằng 1 lần đọc vài KB đầu file, thay cho việc parse cả file
+lần lượt với từng encoding.
+
+Thứ tự:
+1. BOM: UTF-8 (utf-8-sig), UTF-32 / UTF-16 (LE/BE, file xuất từ Excel/Windows thường là UTF-16 LE có BOM)
+2. Không có BOM: mẫu có nhiều byte NUL ở vị trí chẵn/lẻ => UTF-16 BE/LE
+3. Mẫu giải mã được bằng UTF-8 (bỏ qua ký tự nhiều byte bị cắt ở cuối mẫu) => utf-8
+Không khớp trường hợp nào => ValueError.
+
+`open_detected` là bản cho luồng (pipe/stdin/socket, không seek được): đọc mẫu, nhận diện, rồi trả về
+luồng text đã giải mã mà vẫn chứa cả phần mẫu, dùng được cho pd.read_csv(chunksize=...).
+"""
+import codecs
+import io
+import time
+from typing import BinaryIO, NamedTuple, Tuple
+
+SAMPLE_SIZE = 64 * 1024
+
+# BOM dài hơn phải được kiểm trước (BOM UTF-32 LE bắt đầu bằng BOM UTF-16 LE)
+_BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+# Tỉ lệ byte NUL tối thiểu ở 1 phía để coi là UTF-16 không BOM (văn bản Latin/tiếng Việt: ~50-100%)
+_UTF16_NUL_RATIO = 0.3
+
+
+class EncodingGuess(NamedTuple):
+    encoding: str
+    source: str      # "bom" | "nul-pattern" | "utf-8-valid"
+    seconds: float
+
+
+def detect_encoding_bytes(sample: bytes, complete: bool = False) -> Tuple[str, str]:
+    """
+    Nhận diện encoding từ các byte đầu file.
+
+    Args:
+        sample: Các byte đầu file
+        complete: True nếu sample là toàn bộ file (ký tự cuối không thể bị cắt dở)
+
+    Returns:
+        (encoding cho open()/pd.read_csv, cách nhận diện)
+    """
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding, "bom"
+
+    half = len(sample) // 2
+    if half:
+        even_nul = sample[0:2 * half:2].count(0) / half
+        odd_nul = sample[1:2 * half:2].count(0) / half
+        if odd_nul >= _UTF16_NUL_RATIO and even_nul < odd_nul / 4:
+            return "utf-16-le", "nul-pattern"
+        if even_nul >= _UTF16_NUL_RATIO and odd_nul < even_nul / 4:
+            return "utf-16-be", "nul-pattern"
+
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=complete)
+    except UnicodeDecodeError as e:
+        raise ValueError(f"Không nhận diện được encoding (không có BOM, không phải UTF-8/UTF-16): {e}") from e
+    return "utf-8", "utf-8-valid"
+
+
+def detect_encoding(path: str, sample_size: int = SAMPLE_SIZE) -> EncodingGuess:
+    """Đọc `sample_size` byte đầu file (1 lần) và nhận diện encoding."""
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        sample = f.read(sample_size)
+        complete = not f.read(1)
+    encoding, source = detect_encoding_bytes(sample, complete=complete)
+    return EncodingGuess(encoding, source, time.perf_counter() - start)
+
+
+class _PrefixedStream(io.RawIOBase):
+    """Luồng byte: phần đã đọc để nhận diện, tiếp theo là phần còn lại của luồng gốc."""
+
+    def __init__(self, prefix: bytes, stream: BinaryIO):
+        self._prefix = memoryview(prefix)
+        self._stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._prefix:
+            n = min(len(buffer), len(self._prefix))
+            buffer[:n] = self._prefix[:n]
+            self._prefix = self._prefix[n:]
+            return n
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def open_detected(stream: BinaryIO, sample_size: int = SAMPLE_SIZE) -> Tuple[EncodingGuess, io.TextIOWrapper]:
+    """
+    Nhận diện encoding của luồng byte không seek được, không phải đọc lại từ đầu.
+
+    Returns:
+        (kết quả nhận diện, luồng text đã giải mã từ byte đầu tiên, BOM đã được bỏ)
+    """
+    start = time.perf_counter()
+    sample = stream.read(sample_size)
+    complete = len(sample) < sample_size
+    encoding, source = detect_encoding_bytes(sample, complete=complete)
+    guess = EncodingGuess(encoding, source, time.perf_counter() - start)
+    text = io.TextIOWrapper(io.BufferedReader(_PrefixedStream(sample, stream)), encoding=encoding, newline="")
+    return guess, text
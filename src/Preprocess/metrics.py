@@ -0,0 +1,152 @@
+"""
+Đo đạc cho pipeline tiền xử lý: histogram thời gian từng bước, bộ đếm theo dòng, độ sâu hàng đợi.
+
+- PipelineMetrics: ghi vào registry riêng của prometheus_client (mở endpoint /metrics nếu có port)
+  và giữ số liệu thô để xuất báo cáo JSON cuối lần chạy.
+- NullMetrics: cùng API nhưng không làm gì, dùng khi tắt đo đạc. Pipeline chỉ gọi metrics ở mức
+  chunk/lô (không gọi theo từng comment) nên khi tắt gần như không tốn gì.
+"""
+import json
+import logging
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+
+# Mốc histogram (giây): từ vài ms (1 lô nhỏ) tới vài phút (đọc/ghi file lớn)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+class NullMetrics:
+    """Đo đạc bị tắt: mọi lời gọi đều là no-op."""
+
+    enabled = False
+    _NULL_CONTEXT = nullcontext()
+
+    def time(self, stage: str):
+        return self._NULL_CONTEXT
+
+    def observe(self, stage: str, seconds: float):
+        pass
+
+    def observe_many(self, timings: Dict[str, float]):
+        pass
+
+    def inc(self, name: str, value: float = 1, **labels):
+        pass
+
+    def set_queue_depth(self, queue: str, depth: int):
+        pass
+
+    def report(self) -> Dict:
+        return {}
+
+    def write_report(self, path: str, extra: Optional[Dict] = None):
+        pass
+
+
+class PipelineMetrics(NullMetrics):
+    """
+    Metrics xuất qua prometheus_client:
+    - preprocess_stage_seconds{stage}: histogram thời gian mỗi lần chạy 1 bước (theo lô/chunk)
+    - preprocess_rows_total{event}: số dòng đọc vào, ghi ra, rỗng sau xử lý, NLP lỗi/fallback, ...
+    - preprocess_rows_dropped_total{reason}: số dòng bị filter_noise loại theo lý do
+    - preprocess_queue_depth{queue}: độ sâu hàng đợi (chunk chờ worker, comment chờ NLP)
+    """
+
+    enabled = True
+
+    def __init__(self, port: Optional[int] = None, namespace: str = "preprocess"):
+        """
+        Args:
+            port: Nếu có, mở HTTP server /metrics tại port này cho Prometheus scrape
+            namespace: Tiền tố tên metric
+        """
+        from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, start_http_server
+
+        # Registry riêng: tạo nhiều pipeline trong cùng process không bị trùng tên metric
+        self.registry = CollectorRegistry()
+        self._stage_hist = Histogram(f"{namespace}_stage_seconds", "Thời gian mỗi bước xử lý (giây)",
+                                     ["stage"], buckets=LATENCY_BUCKETS, registry=self.registry)
+        self._rows = Counter(f"{namespace}_rows", "Bộ đếm theo dòng", ["event"], registry=self.registry)
+        self._dropped = Counter(f"{namespace}_rows_dropped", "Số dòng bị lọc theo lý do",
+                                ["reason"], registry=self.registry)
+        self._queue = Gauge(f"{namespace}_queue_depth", "Độ sâu hàng đợi", ["queue"], registry=self.registry)
+        if port:
+            start_http_server(port, registry=self.registry)
+            logging.info(f"Prometheus metrics: http://localhost:{port}/metrics")
+
+        self.started_at = time.time()
+        self._samples: Dict[str, List[float]] = {}
+        self._counters: Dict[str, float] = {}
+        self._queue_max: Dict[str, int] = {}
+
+    @contextmanager
+    def time(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def observe(self, stage: str, seconds: float):
+        self._stage_hist.labels(stage=stage).observe(seconds)
+        self._samples.setdefault(stage, []).append(seconds)
+
+    def observe_many(self, timings: Dict[str, float]):
+        for stage, seconds in timings.items():
+            self.observe(stage, seconds)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """
+        Tăng bộ đếm. name="dropped" cần label reason=...; các name khác được ghi làm label event.
+        """
+        if not value:
+            return
+        if name == "dropped":
+            reason = labels["reason"]
+            self._dropped.labels(reason=reason).inc(value)
+            key = f"dropped.{reason}"
+        else:
+            self._rows.labels(event=name).inc(value)
+            key = name
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_queue_depth(self, queue: str, depth: int):
+        self._queue.labels(queue=queue).set(depth)
+        self._queue_max[queue] = max(self._queue_max.get(queue, 0), depth)
+
+    @staticmethod
+    def _summary(samples: List[float]) -> Dict:
+        ordered = sorted(samples)
+        def pct(q):
+            return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+        return {
+            "count": len(ordered),
+            "total_seconds": round(sum(ordered), 6),
+            "mean_seconds": round(sum(ordered) / len(ordered), 6),
+            "p50_seconds": round(pct(0.50), 6),
+            "p95_seconds": round(pct(0.95), 6),
+            "max_seconds": round(ordered[-1], 6),
+        }
+
+    def report(self) -> Dict:
+        return {
+            "started_at": self.started_at,
+            "duration_seconds": round(time.time() - self.started_at, 3),
+            "stages": {stage: self._summary(samples) for stage, samples in self._samples.items()},
+            "counters": dict(self._counters),
+            "queue_depth_max": dict(self._queue_max),
+        }
+
+    def write_report(self, path: str, extra: Optional[Dict] = None):
+        """Ghi báo cáo JSON của lần chạy (extra: thông tin bổ sung như cấu hình, cache)."""
+        report = self.report()
+        if extra:
+            report.update(extra)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logging.info(f"Đã ghi báo cáo đo đạc: {path}")
+
+
+def create_metrics(enabled: bool, port: Optional[int] = None):
+    return PipelineMetrics(port=port) if enabled else NullMetrics()
@@ -0,0 +1,273 @@
+"""
+Phát hiện comment gần trùng lặp (near-duplicate) bằng MinHash + LSH banding.
+
+- Chữ ký MinHash: shingle ký tự (k ký tự liên tiếp, sau khi lower + gộp khoảng trắng) được hash bằng
+  rolling hash trên mã Unicode, num_perm hàm băm (a*x + b) mod 2^32, tính theo lô bằng numpy
+  (np.minimum.reduceat), không có vòng lặp Python theo từng shingle.
+- LSH: chia chữ ký thành `bands` dải `rows` hàng; 2 comment là ứng viên nếu trùng toàn bộ 1 dải.
+  Ứng viên được kiểm lại bằng độ tương đồng ước lượng từ chữ ký (>= threshold), nên dải được chọn
+  "lỏng": cặp có Jaccard đúng bằng threshold bị LSH bỏ sót với xác suất <= max_miss (mặc định 1%,
+  vd 64 hàm băm, threshold 0.8 => 16 dải x 4 hàng). Cặp sát ngưỡng vẫn có thể bị loại ở bước kiểm lại
+  do sai số ước lượng của chữ ký (độ lệch chuẩn ~ sqrt(s(1-s)/num_perm), ~0.05 với 64 hàm băm).
+- Mỗi cụm có 1 đại diện (comment xuất hiện đầu tiên, được giữ lại); comment sau chỉ được so với
+  đại diện của các bucket nó rơi vào.
+- Chỉ mục tăng dần theo chunk (chế độ streaming): mỗi dải là vài "run" mảng hash đã sắp xếp + slot
+  đại diện (như LSM tree). Chunk mới được tra bằng searchsorted trên từng run và thêm vào thành 1 run
+  mới; run chỉ được gộp với run trước khi kích thước xấp xỉ nhau, nên mỗi dải có O(log n) run và
+  tổng chi phí chèn là O(n log n), thay vì chép lại cả mảng (O(n)) ở mỗi chunk.
+  Chữ ký của đại diện chỉ giữ 8 bit thấp mỗi hàm băm (b-bit MinHash) để tiết kiệm bộ nhớ.
+"""
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+_MAX_HASH = np.uint32(0xFFFFFFFF)
+_SHINGLE_BASE = np.uint64(0x100000001B3)
+_PAD = '\0'
+
+
+def lsh_params(num_perm: int, threshold: float, max_miss: float = 0.01) -> Tuple[int, int]:
+    """
+    Chọn (bands, rows) với bands * rows = num_perm: ít dải nhất (ít bộ nhớ và ít ứng viên thừa nhất)
+    sao cho cặp có Jaccard đúng bằng threshold bị bỏ sót với xác suất (1 - threshold^rows)^bands
+    không quá max_miss. Không cấu hình nào đạt thì dùng num_perm dải 1 hàng.
+    """
+    for rows in range(num_perm, 0, -1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1 - threshold ** rows) ** bands <= max_miss:
+            return bands, rows
+    return num_perm, 1
+
+
+class MinHasher:
+    """Tính chữ ký MinHash cho nhiều văn bản cùng lúc (vector hoá bằng numpy)."""
+
+    # Số shingle tối đa mỗi lần tính (mảng trung gian num_perm x shingle uint32)
+    _BLOCK_SHINGLES = 65536
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 5, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # Họ hoán vị (a*x + b) mod 2^32 với a lẻ trên hash 32-bit của shingle: số học uint32 nhanh
+        # gần 3 lần bản 64-bit, sai số ước lượng Jaccard như nhau (hash shingle đã phân bố đều)
+        self._a = rng.integers(0, 2 ** 31, size=num_perm, dtype=np.uint32) * np.uint32(2) + np.uint32(1)
+        self._b = rng.integers(0, 2 ** 32, size=num_perm, dtype=np.uint32)
+
+    def normalize(self, text) -> str:
+        """lower + gộp khoảng trắng; text ngắn hơn shingle_size được đệm để thành đúng 1 shingle."""
+        if not isinstance(text, str):
+            return ''
+        text = ' '.join(text.lower().split())
+        return text.ljust(self.shingle_size, _PAD) if text else ''
+
+    def shingle_hashes(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Hash 32-bit của mọi shingle k ký tự (rolling hash 64-bit trên mã Unicode, gập lại 32 bit),
+        nối liền theo thứ tự văn bản.
+
+        Returns:
+            (mảng hash uint32, số shingle của từng văn bản)
+        """
+        k = self.shingle_size
+        normalized = [self.normalize(t) for t in texts]
+        lengths = np.fromiter((len(t) for t in normalized), dtype=np.int64, count=len(normalized))
+        counts = np.maximum(lengths - k + 1, 0)
+        total = int(counts.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.uint32), counts
+        codes = np.frombuffer(''.join(normalized).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        n_windows = len(codes) - k + 1
+        hashes = np.zeros(n_windows, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            for j in range(k):
+                hashes = hashes * _SHINGLE_BASE + codes[j:j + n_windows]
+        # Chỉ giữ cửa sổ nằm trọn trong 1 văn bản
+        text_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        shingle_starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        positions = np.arange(total) + np.repeat(text_starts - shingle_starts, counts)
+        hashes = hashes[positions]
+        return (hashes ^ (hashes >> np.uint64(32))).astype(np.uint32), counts
+
+    def signatures(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Returns:
+            Mảng (len(texts), num_perm) uint32; dòng của text rỗng toàn giá trị 0xFFFFFFFF
+        """
+        sigs = np.full((len(texts), self.num_perm), _MAX_HASH, dtype=np.uint32)
+        flat, counts = self.shingle_hashes(texts)
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        docs = np.flatnonzero(counts)
+        ends = offsets[docs + 1]
+        a, b = self._a[:, None], self._b[:, None]
+        pos = 0
+        with np.errstate(over='ignore'):
+            while pos < len(docs):
+                begin = offsets[docs[pos]]
+                # Gom các văn bản liên tiếp tới khi đủ _BLOCK_SHINGLES shingle (ít nhất 1 văn bản)
+                stop = max(pos + 1, int(np.searchsorted(ends, begin + self._BLOCK_SHINGLES, side='right')))
+                block = docs[pos:stop]
+                hashed = a * flat[begin:offsets[block[-1] + 1]] + b
+                sigs[block] = np.minimum.reduceat(hashed, offsets[block] - begin, axis=1).T
+                pos = stop
+        return sigs
+
+
+class NearDuplicateIndex:
+    """
+    Chỉ mục LSH tăng dần. add() nhận từng lô comment (theo thứ tự xuất hiện) và trả về cụm của mỗi comment;
+    comment đầu tiên của cụm là đại diện, các comment sau là bản gần trùng của nó.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, shingle_size: int = 5, seed: int = 1):
+        """
+        Args:
+            threshold: Độ tương đồng Jaccard (ước lượng) tối thiểu để coi là gần trùng
+            num_perm: Số hàm băm MinHash (nhiều hơn => ước lượng chính xác hơn, chậm hơn)
+            shingle_size: Số ký tự mỗi shingle
+        """
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm, shingle_size, seed)
+        self.bands, self.rows = lsh_params(num_perm, threshold)
+        # Mỗi dải: các run (hash dải đã sắp xếp, slot đại diện tương ứng), run lớn nhất đứng đầu.
+        # Mỗi hash dải chỉ nằm trong 1 run (bucket đã có đại diện thì không thêm lại)
+        self._runs: List[List[Tuple[np.ndarray, np.ndarray]]] = [[] for _ in range(self.bands)]
+        # Theo slot: cluster id (id của đại diện) và chữ ký b-bit của đại diện
+        self._cluster_ids = np.empty(1024, dtype=np.int64)
+        self._rep_sigs = np.empty((1024, num_perm), dtype=np.uint8)
+        self.n_clusters = 0
+        self.n_seen = 0
+        self.n_duplicates = 0
+
+    def __len__(self) -> int:
+        return self.n_clusters
+
+    def _band_hashes(self, sigs: np.ndarray) -> np.ndarray:
+        """(bands, n) uint64: hash FNV-1a các hàng của từng dải."""
+        n = len(sigs)
+        out = np.empty((self.bands, n), dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            for band in range(self.bands):
+                h = np.full(n, 0xCBF29CE484222325, dtype=np.uint64)
+                for col in range(band * self.rows, (band + 1) * self.rows):
+                    h = (h ^ sigs[:, col].astype(np.uint64)) * np.uint64(0x100000001B3)
+                out[band] = h
+        return out
+
+    def _similarity(self, sig8: np.ndarray, slot: int) -> float:
+        # b-bit MinHash: 2 hàm băm khác nhau vẫn trùng 8 bit thấp với xác suất 1/256 => hiệu chỉnh
+        match = np.count_nonzero(self._rep_sigs[slot] == sig8) / self.hasher.num_perm
+        return max(0.0, (match - 1 / 256) / (1 - 1 / 256))
+
+    def _new_cluster(self, cluster_id: int, sig8: np.ndarray) -> int:
+        slot = self.n_clusters
+        if slot == len(self._cluster_ids):
+            self._cluster_ids = np.resize(self._cluster_ids, 2 * slot)
+            grown = np.empty((2 * slot, self._rep_sigs.shape[1]), dtype=np.uint8)
+            grown[:slot] = self._rep_sigs
+            self._rep_sigs = grown
+        self._cluster_ids[slot] = cluster_id
+        self._rep_sigs[slot] = sig8
+        self.n_clusters += 1
+        return slot
+
+    def add(self, texts: Sequence[str], ids: Sequence[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Thêm 1 lô comment vào chỉ mục.
+
+        Args:
+            texts: Các comment, theo thứ tự xuất hiện
+            ids: Id ổn định của từng comment (vd index của DataFrame), dùng làm cluster id
+
+        Returns:
+            (cluster_ids, similarity, is_duplicate): cluster id (= id đại diện) của mỗi comment,
+            độ tương đồng ước lượng với đại diện (1.0 với chính đại diện), và comment có phải bản gần trùng
+        """
+        n = len(texts)
+        sigs = self.hasher.signatures(texts)
+        sigs8 = sigs.astype(np.uint8)
+        band_hashes = self._band_hashes(sigs)
+        empty = (sigs == _MAX_HASH).all(axis=1)
+
+        # Tra các đại diện đã có từ những lô trước (vector hoá theo từng dải)
+        existing = np.full((self.bands, n), -1, dtype=np.int64)
+        for band in range(self.bands):
+            for keys, slots in self._runs[band]:
+                pos = np.minimum(np.searchsorted(keys, band_hashes[band]), len(keys) - 1)
+                hit = keys[pos] == band_hashes[band]
+                existing[band, hit] = slots[pos[hit]]
+
+        cluster_ids = np.empty(n, dtype=np.int64)
+        similarity = np.ones(n, dtype=np.float32)
+        is_duplicate = np.zeros(n, dtype=bool)
+        new_buckets = [{} for _ in range(self.bands)]   # hash dải -> slot, của đại diện mới trong lô
+        existing_rows = existing.T.tolist()
+        hash_rows = band_hashes.T.tolist()
+        for i in range(n):
+            if empty[i]:
+                cluster_ids[i] = ids[i]
+                continue
+            checked = set()
+            match_slot, match_sim = -1, 0.0
+            for band, h in enumerate(hash_rows[i]):
+                slot = existing_rows[i][band]
+                if slot < 0:
+                    slot = new_buckets[band].get(h, -1)
+                if slot < 0 or slot in checked:
+                    continue
+                checked.add(slot)
+                sim = self._similarity(sigs8[i], slot)
+                if sim >= self.threshold:
+                    match_slot, match_sim = slot, sim
+                    break
+            if match_slot >= 0:
+                cluster_ids[i] = self._cluster_ids[match_slot]
+                similarity[i] = match_sim
+                is_duplicate[i] = True
+                continue
+            slot = self._new_cluster(ids[i], sigs8[i])
+            cluster_ids[i] = ids[i]
+            for band, h in enumerate(hash_rows[i]):
+                # Bucket đã có đại diện thì giữ đại diện cũ (comment xuất hiện trước)
+                if existing_rows[i][band] < 0 and h not in new_buckets[band]:
+                    new_buckets[band][h] = slot
+
+        self._merge(new_buckets)
+        self.n_seen += n
+        self.n_duplicates += int(is_duplicate.sum())
+        return cluster_ids, similarity, is_duplicate
+
+    def _merge(self, new_buckets: List[dict]):
+        """
+        Thêm bucket mới của từng dải thành 1 run đã sắp xếp, rồi gộp các run cuối khi run trước
+        không lớn hơn quá 2 lần run sau (mỗi phần tử chỉ bị chép lại O(log n) lần).
+        """
+        for band, buckets in enumerate(new_buckets):
+            if not buckets:
+                continue
+            keys = np.fromiter(buckets.keys(), dtype=np.uint64, count=len(buckets))
+            slots = np.fromiter(buckets.values(), dtype=np.int32, count=len(buckets))
+            order = np.argsort(keys)
+            runs = self._runs[band]
+            runs.append((keys[order], slots[order]))
+            while len(runs) > 1 and len(runs[-2][0]) <= 2 * len(runs[-1][0]):
+                (keys_a, slots_a), (keys_b, slots_b) = runs[-2], runs.pop()
+                keys = np.concatenate((keys_a, keys_b))
+                # Sort ổn định trên 2 đoạn đã sắp xếp: gần như 1 lần merge tuyến tính
+                order = np.argsort(keys, kind='stable')
+                runs[-1] = (keys[order], np.concatenate((slots_a, slots_b))[order])
+
+    def report(self) -> dict:
+        return {
+            "threshold": self.threshold,
+            "num_perm": self.hasher.num_perm,
+            "bands": self.bands,
+            "rows": self.rows,
+            # Xác suất LSH bỏ sót 1 cặp có Jaccard đúng bằng threshold
+            "lsh_miss_at_threshold": round((1 - self.threshold ** self.rows) ** self.bands, 6),
+            "seen": self.n_seen,
+            "clusters": self.n_clusters,
+            "duplicates": self.n_duplicates,
+        }
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Tuple
+
+
+class PreprocessCache:
+    """
+    Cache kết quả tiền xử lý trên đĩa (SQLite), đánh địa chỉ theo nội dung.
+    - Key: sha1 của comment gốc.
+    - Fingerprint: hash của teencode.json + cấu hình tiền xử lý + phiên bản model VnCoreNLP.
+      Khi fingerprint khác với lần chạy trước, toàn bộ cache bị xoá (tự động invalidate).
+    - Giới hạn số entry, khi vượt sẽ xoá các entry lâu không dùng nhất (LRU).
+    """
+
+    DB_NAME = "preprocess_cache.sqlite"
+    _SQL_BATCH = 500  # Số tham số tối đa mỗi câu lệnh IN (...)
+
+    def __init__(self, cache_dir: str, fingerprint: str, max_entries: int = 1_000_000):
+        """
+        Args:
+            cache_dir: Thư mục chứa file SQLite
+            fingerprint: Chuỗi đặc trưng cho tài nguyên/cấu hình hiện tại (xem make_fingerprint)
+            max_entries: Số entry tối đa giữ lại trong cache
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, self.DB_NAME)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_used ON cache(last_used)")
+        self.conn.commit()
+        # Số entry được đếm 1 lần lúc mở rồi cập nhật theo từng lần ghi/xoá (không COUNT(*) mỗi lần put)
+        self._entries = self.conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        self.set_fingerprint(fingerprint)
+
+    # --- Fingerprint ---
+
+    @staticmethod
+    def make_fingerprint(teencode_path: str, settings: Dict, vncorenlp_dir: str) -> str:
+        """
+        Tạo fingerprint từ nội dung teencode.json, cấu hình tiền xử lý và phiên bản model.
+
+        Args:
+            teencode_path: Đường dẫn teencode.json
+            settings: Các tham số ảnh hưởng tới kết quả (single_pass, annotators, ...)
+            vncorenlp_dir: Thư mục VnCoreNLP (lấy tên file jar + kích thước các file model)
+        """
+        h = hashlib.sha1()
+        if os.path.exists(teencode_path):
+            with open(teencode_path, 'rb') as f:
+                h.update(f.read())
+        h.update(json.dumps(settings, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        h.update(PreprocessCache.model_version(vncorenlp_dir).encode('utf-8'))
+        return h.hexdigest()
+
+    @staticmethod
+    def model_version(vncorenlp_dir: str) -> str:
+        """Phiên bản model = tên các file .jar + đường dẫn/kích thước các file trong models/"""
+        if not os.path.isdir(vncorenlp_dir):
+            return "unknown"
+        parts = sorted(name for name in os.listdir(vncorenlp_dir) if name.endswith('.jar'))
+        models_dir = os.path.join(vncorenlp_dir, "models")
+        for root, _, files in os.walk(models_dir):
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                parts.append(f"{os.path.relpath(path, vncorenlp_dir)}:{os.path.getsize(path)}")
+        return "|".join(parts)
+
+    def set_fingerprint(self, fingerprint: str):
+        """Đổi fingerprint; nếu khác fingerprint đang lưu thì xoá sạch cache."""
+        self.fingerprint = fingerprint
+        row = self.conn.execute("SELECT value FROM meta WHERE name = 'fingerprint'").fetchone()
+        if row is not None and row[0] == fingerprint:
+            return
+        if row is not None:
+            self.conn.execute("DELETE FROM cache")
+            self._entries = 0
+        self.conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('fingerprint', ?)", (fingerprint,))
+        self.conn.commit()
+
+    # --- Đọc / ghi ---
+
+    @staticmethod
+    def make_key(text: str) -> str:
+        return hashlib.sha1(text.encode('utf-8', 'surrogatepass')).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """Tra cứu nhiều key một lúc, cập nhật thời điểm dùng gần nhất cho các key tìm thấy."""
+        found = {}
+        for start in range(0, len(keys), self._SQL_BATCH):
+            batch = keys[start:start + self._SQL_BATCH]
+            placeholders = ','.join('?' * len(batch))
+            found.update(self.conn.execute(
+                f"SELECT key, value FROM cache WHERE key IN ({placeholders})", batch
+            ).fetchall())
+
+        if found:
+            now = time.time()
+            self.conn.executemany("UPDATE cache SET last_used = ? WHERE key = ?", [(now, k) for k in found])
+            self.conn.commit()
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, str]]):
+        now = time.time()
+        rows = [(key, value, now) for key, value in items]
+        if not rows:
+            return
+        before = self.conn.total_changes
+        self.conn.executemany("INSERT OR IGNORE INTO cache (key, value, last_used) VALUES (?, ?, ?)", rows)
+        inserted = self.conn.total_changes - before
+        if inserted < len(rows):
+            # Có key đã tồn tại (vd 2 pipeline dùng chung cache): ghi đè giá trị như INSERT OR REPLACE
+            self.conn.executemany("UPDATE cache SET value = ?, last_used = ? WHERE key = ?",
+                                  [(value, used, key) for key, value, used in rows])
+        self.conn.commit()
+        self._entries += inserted
+        self._evict()
+
+    def _evict(self):
+        overflow = self._entries - self.max_entries
+        if overflow > 0:
+            deleted = self.conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY last_used ASC LIMIT ?)",
+                (overflow,)
+            ).rowcount
+            self.conn.commit()
+            self._entries -= deleted
+
+    # --- Thống kê ---
+
+    def __len__(self) -> int:
+        return self._entries
+
+    def report(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self),
+        }
+
+    def close(self):
+        # Gọi nhiều lần vẫn an toàn; report() vẫn dùng được sau khi đóng
+        self.conn.close()
@@ -0,0 +1,346 @@
+"""
+Service HTTP (asyncio + tornado) tiền xử lý comment online: nhận từng comment, gom thành micro-batch
+theo kích thước / thời gian chờ, chạy lọc rác + spam + TextPreprocessor trên worker pool, trả kết quả
+cho từng request.
+
+- Batch được gửi đi khi đủ batch_limit comment hoặc comment đầu tiên đã chờ SERVICE_MAX_WAIT_MS.
+- batch_limit tự điều chỉnh theo SERVICE_LATENCY_TARGET_MS: batch xử lý lâu hơn mục tiêu thì giảm một
+  nửa, batch đầy mà xử lý nhanh (< 1/2 mục tiêu) thì tăng dần lại tới SERVICE_MAX_BATCH_SIZE.
+- Backpressure: hàng đợi giới hạn SERVICE_MAX_QUEUE comment, đầy thì trả 503 + Retry-After ngay;
+  request chờ quá SERVICE_REQUEST_TIMEOUT trả 504 và bị bỏ khỏi batch (không tốn worker cho request
+  đã hết hạn; đếm ở "dropped" trong /stats).
+
+API:
+    POST /preprocess  {"text": "..."}
+        -> {"processed_text": "...", "filtered": null | "empty" | "too_short" | "long_word" | "spam",
+            "spam_categories": [...], "latency_ms": 12.3}
+    GET  /health, GET /stats
+
+Chạy:
+    python preprocess_service.py --port 8080 --workers 2 --segmenter longest_match
+    python ../../benchmarks/load_generator.py --url http://localhost:8080 --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import re
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from data_preprocess import Config, SpamChecker, TextPreprocessor
+from metrics import create_metrics
+from segmenters import SEGMENTERS, create_segmenter
+
+
+class BatchWorker:
+    """Xử lý 1 micro-batch: lọc rác/spam theo đúng ngưỡng của DataPipeline.filter_noise rồi tiền xử lý."""
+
+    def __init__(self, segmenter_args: Tuple, teencode_path: str, spam_path: str, single_pass: bool,
+                 nlp_batch_size: int, min_text_length: int, max_word_length: int, spam_threshold: int):
+        self.preprocessor = TextPreprocessor(segmenter_args[1], teencode_path, single_pass=single_pass,
+                                             nlp=create_segmenter(*segmenter_args))
+        self.spam_checker = SpamChecker(spam_path)
+        self.nlp_batch_size = nlp_batch_size
+        self.min_text_length = min_text_length
+        self.long_word_pattern = re.compile(rf'\S{{{max_word_length + 1},}}')
+        self.spam_threshold = spam_threshold
+
+    def _noise_reason(self, text) -> Tuple[Optional[str], List[str]]:
+        if not isinstance(text, str):
+            return "empty", []
+        text = text.strip()
+        if len(text) < self.min_text_length:
+            return "too_short", []
+        if self.long_word_pattern.search(text):
+            return "long_word", []
+        categories = self.spam_checker.match_categories(text)
+        if text and len(categories) >= self.spam_threshold:
+            return "spam", categories
+        return None, categories
+
+    def run(self, texts: List[str]) -> List[Dict]:
+        results = []
+        keep = []
+        for i, text in enumerate(texts):
+            reason, categories = self._noise_reason(text)
+            results.append({"processed_text": None, "filtered": reason, "spam_categories": categories})
+            if reason is None:
+                keep.append(i)
+        processed = self.preprocessor.process_many([texts[i] for i in keep], batch_size=self.nlp_batch_size)
+        for i, text in zip(keep, processed):
+            results[i]["processed_text"] = text
+        return results
+
+
+# Worker process: mỗi process giữ 1 BatchWorker (segmenter/JVM riêng), tạo trong initializer
+_service_worker: Optional[BatchWorker] = None
+
+def _init_service_worker(*worker_args):
+    global _service_worker
+    _service_worker = BatchWorker(*worker_args)
+
+def _run_service_batch(texts: List[str]) -> List[Dict]:
+    return _service_worker.run(texts)
+
+
+class QueueFullError(Exception):
+    """Hàng đợi đầy: client nên thử lại sau (HTTP 503)."""
+
+
+class MicroBatcher:
+    """Gom các comment đến lẻ thành batch, gửi cho executor, trả kết quả về đúng future của từng request."""
+
+    def __init__(self, run_batch: Callable[[List[str]], List[Dict]], executor: Executor, max_batch_size: int = 64,
+                 max_wait_ms: float = 10.0, latency_target_ms: float = 200.0, max_queue: int = 10000,
+                 max_inflight: int = 1, metrics=None):
+        """
+        Args:
+            run_batch: Hàm (picklable nếu executor là process pool) xử lý 1 list comment
+            executor: Pool chạy run_batch
+            max_batch_size: Kích thước batch tối đa
+            max_wait_ms: Thời gian tối đa comment đầu tiên của batch phải chờ gom thêm
+            latency_target_ms: Mục tiêu thời gian xử lý 1 batch, dùng để điều chỉnh batch_limit
+            max_queue: Số comment chờ tối đa trước khi từ chối (backpressure)
+            max_inflight: Số batch chạy đồng thời (= số worker)
+        """
+        self.run_batch = run_batch
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.batch_limit = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.latency_target = latency_target_ms / 1000
+        self.metrics = metrics or create_metrics(False)
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._inflight = asyncio.Semaphore(max_inflight)
+        self._task: Optional[asyncio.Task] = None
+        self._latencies = deque(maxlen=10000)
+        self._stats = {"requests": 0, "rejected": 0, "timeouts": 0, "dropped": 0, "batches": 0,
+                       "batched_texts": 0, "batch_errors": 0, "batch_seconds": 0.0}
+
+    def start(self) -> "MicroBatcher":
+        self._task = asyncio.get_running_loop().create_task(self._collect_loop())
+        return self
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    async def submit(self, text: str, timeout: Optional[float] = None) -> Dict:
+        """Đưa 1 comment vào hàng đợi và chờ kết quả; QueueFullError nếu hàng đợi đầy, TimeoutError nếu quá hạn."""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((text, future))
+        except asyncio.QueueFull:
+            self._stats["rejected"] += 1
+            self.metrics.inc("service_rejected")
+            raise QueueFullError(f"Hàng đợi đầy ({self._queue.maxsize} comment)")
+        self._stats["requests"] += 1
+        start = time.perf_counter()
+        try:
+            # Hết hạn -> future bị huỷ; comment còn trong hàng đợi bị bỏ khi gom batch, còn nếu batch
+            # đã chạy thì kết quả của nó bị bỏ qua
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            self.metrics.inc("service_timeout")
+            raise
+        finally:
+            self._latencies.append(time.perf_counter() - start)
+
+    def _drop(self, count: int):
+        """Đếm các comment bị bỏ vì request đã hết hạn / bị huỷ trước khi được xử lý."""
+        if count:
+            self._stats["dropped"] += count
+            self.metrics.inc("service_dropped", count)
+
+    async def _collect_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Chỉ gom batch mới khi còn worker rảnh: trong lúc chờ, comment tích lại trong hàng đợi
+            await self._inflight.acquire()
+            # Bỏ qua request đã hết hạn (future bị huỷ) để worker không xử lý comment không ai chờ
+            item = await self._queue.get()
+            while item[1].done():
+                self._drop(1)
+                item = await self._queue.get()
+            batch = [item]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.batch_limit:
+                if not self._queue.empty():
+                    item = self._queue.get_nowait()
+                else:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if item[1].done():
+                    self._drop(1)
+                else:
+                    batch.append(item)
+            self.metrics.set_queue_depth("service_queue", self._queue.qsize())
+            loop.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch: List[Tuple[str, asyncio.Future]]):
+        loop = asyncio.get_running_loop()
+        # Request có thể hết hạn trong lúc gom batch: lọc lại ngay trước khi gửi cho executor
+        live = [(text, future) for text, future in batch if not future.done()]
+        self._drop(len(batch) - len(live))
+        if not live:
+            self._inflight.release()
+            return
+        batch = live
+        start = time.perf_counter()
+        try:
+            results = await loop.run_in_executor(self.executor, self.run_batch, [text for text, _ in batch])
+        except Exception as e:
+            logging.error(f"Lỗi xử lý batch {len(batch)} comment: {e}")
+            self._stats["batch_errors"] += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._inflight.release()
+
+        elapsed = time.perf_counter() - start
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+        self._stats["batches"] += 1
+        self._stats["batched_texts"] += len(batch)
+        self._stats["batch_seconds"] += elapsed
+        self.metrics.observe("service_batch", elapsed)
+        self._adjust_batch_limit(len(batch), elapsed)
+
+    def _adjust_batch_limit(self, batch_size: int, elapsed: float):
+        if elapsed > self.latency_target and self.batch_limit > 1:
+            self.batch_limit = max(1, self.batch_limit // 2)
+        elif batch_size >= self.batch_limit and elapsed < self.latency_target / 2:
+            self.batch_limit = min(self.max_batch_size, self.batch_limit + max(1, self.max_batch_size // 8))
+
+    def stats(self) -> Dict:
+        stats = dict(self._stats)
+        ordered = sorted(self._latencies)
+        def pct(q):
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2) if ordered else None
+        stats.update({
+            "queue_depth": self.queue_depth,
+            "batch_limit": self.batch_limit,
+            "mean_batch_size": round(stats["batched_texts"] / stats["batches"], 2) if stats["batches"] else None,
+            "batch_seconds": round(stats["batch_seconds"], 3),
+            "latency_ms": {"p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99)},
+        })
+        return stats
+
+
+def worker_args(cfg) -> Tuple:
+    """Tham số của BatchWorker lấy từ Config."""
+    segmenter_args = (cfg.SEGMENTER, cfg.VNCORENLP_DIR, cfg.SEGMENTER_DICT_FILE, cfg.SEGMENTER_ADDRESS)
+    return (segmenter_args, cfg.TEENCODE_FILE, cfg.SPAM_KEYWORDS_FILE, cfg.SINGLE_PASS_SEGMENTATION,
+            cfg.NLP_BATCH_SIZE, cfg.MIN_TEXT_LENGTH, cfg.MAX_WORD_LENGTH, cfg.SPAM_THRESHOLD)
+
+
+def create_batcher(cfg, metrics=None) -> MicroBatcher:
+    """
+    SERVICE_WORKERS <= 1: 1 BatchWorker chạy trên 1 thread (segmenter nạp trong process này);
+    > 1: process pool, mỗi process 1 BatchWorker.
+    """
+    if cfg.SERVICE_WORKERS > 1:
+        executor = ProcessPoolExecutor(max_workers=cfg.SERVICE_WORKERS, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_init_service_worker, initargs=worker_args(cfg))
+        run_batch = _run_service_batch
+    else:
+        executor = ThreadPoolExecutor(max_workers=1)
+        run_batch = BatchWorker(*worker_args(cfg)).run
+    return MicroBatcher(run_batch, executor, max_batch_size=cfg.SERVICE_MAX_BATCH_SIZE,
+                        max_wait_ms=cfg.SERVICE_MAX_WAIT_MS, latency_target_ms=cfg.SERVICE_LATENCY_TARGET_MS,
+                        max_queue=cfg.SERVICE_MAX_QUEUE, max_inflight=max(1, cfg.SERVICE_WORKERS), metrics=metrics)
+
+
+def make_app(batcher: MicroBatcher, request_timeout: float):
+    import tornado.web
+
+    class PreprocessHandler(tornado.web.RequestHandler):
+        async def post(self):
+            start = time.perf_counter()
+            try:
+                text = json.loads(self.request.body or b"{}").get("text")
+            except (ValueError, AttributeError):
+                raise tornado.web.HTTPError(400, reason="Body phải là JSON {\"text\": \"...\"}")
+            try:
+                result = await batcher.submit(text, timeout=request_timeout)
+            except QueueFullError:
+                self.set_header("Retry-After", "1")
+                raise tornado.web.HTTPError(503, reason="Service quá tải")
+            except asyncio.TimeoutError:
+                raise tornado.web.HTTPError(504, reason="Quá thời gian xử lý")
+            self.write({**result, "latency_ms": round((time.perf_counter() - start) * 1000, 2)})
+
+    class HealthHandler(tornado.web.RequestHandler):
+        def get(self):
+            self.write({"status": "ok", "queue_depth": batcher.queue_depth, "batch_limit": batcher.batch_limit})
+
+    class StatsHandler(tornado.web.RequestHandler):
+        def get(self):
+            self.write(batcher.stats())
+
+    return tornado.web.Application([
+        (r"/preprocess", PreprocessHandler),
+        (r"/health", HealthHandler),
+        (r"/stats", StatsHandler),
+    ])
+
+
+async def serve(cfg, port: int):
+    metrics = create_metrics(cfg.METRICS_ENABLED, cfg.METRICS_PORT)
+    batcher = create_batcher(cfg, metrics).start()
+    app = make_app(batcher, cfg.SERVICE_REQUEST_TIMEOUT)
+    server = app.listen(port)
+    logging.info(f"Preprocess service tại http://localhost:{port} (batch <= {cfg.SERVICE_MAX_BATCH_SIZE}, "
+                 f"chờ <= {cfg.SERVICE_MAX_WAIT_MS}ms, {cfg.SERVICE_WORKERS} worker)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        server.stop()
+        await batcher.stop()
+        batcher.executor.shutdown(wait=False, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Service tiền xử lý comment online")
+    parser.add_argument("--port", type=int, default=Config.SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=Config.SERVICE_WORKERS)
+    parser.add_argument("--segmenter", choices=SEGMENTERS, default=Config.SEGMENTER)
+    parser.add_argument("--max-batch-size", type=int, default=Config.SERVICE_MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=Config.SERVICE_MAX_WAIT_MS)
+    parser.add_argument("--latency-target-ms", type=float, default=Config.SERVICE_LATENCY_TARGET_MS)
+    parser.add_argument("--max-queue", type=int, default=Config.SERVICE_MAX_QUEUE)
+    args = parser.parse_args()
+
+    class ServiceConfig(Config):
+        SEGMENTER = args.segmenter
+        SERVICE_WORKERS = args.workers
+        SERVICE_MAX_BATCH_SIZE = args.max_batch_size
+        SERVICE_MAX_WAIT_MS = args.max_wait_ms
+        SERVICE_LATENCY_TARGET_MS = args.latency_target_ms
+        SERVICE_MAX_QUEUE = args.max_queue
+
+    try:
+        asyncio.run(serve(ServiceConfig, args.port))
+    except KeyboardInterrupt:
+        logging.info("Dừng preprocess service")
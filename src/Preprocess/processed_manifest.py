@@ -0,0 +1,94 @@
+"""
+Manifest của chế độ thư mục (DataPipeline.run_directory): ghi lại mỗi file raw đã xử lý với
+hash nội dung, phiên bản cấu hình/từ điển đã dùng và file kết quả, để lần chạy sau chỉ xử lý
+file mới hoặc đã thay đổi.
+
+Cấu trúc (JSON):
+    {
+      "settings": {...},            # cấu hình + phiên bản từ điển/model của lần ghi gần nhất
+      "merged": true,               # output gộp đã khớp với các file kết quả hay chưa
+      "files": {
+        "<video_id>": {"source": ..., "sha256": ..., "size": ..., "mtime_ns": ...,
+                       "settings_version": ..., "output": ..., "rows_in": ..., "rows_out": ...,
+                       "processed_at": ...}
+      }
+    }
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, Optional
+
+_HASH_BLOCK = 1 << 20
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def settings_version(settings: Dict) -> str:
+    """12 ký tự đầu sha1 của cấu hình (JSON, sắp xếp key)."""
+    return hashlib.sha1(json.dumps(settings, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:12]
+
+
+class ProcessedManifest:
+    def __init__(self, path: str):
+        self.path = path
+        self.settings: Optional[Dict] = None
+        self.merged = False
+        self.files: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.settings = data.get("settings")
+            self.merged = data.get("merged", False)
+            self.files = data.get("files", {})
+
+    def fingerprint(self, video_id: str, path: str) -> Dict:
+        """
+        {sha256, size, mtime_ns} của file; nếu kích thước + mtime trùng với lần trước thì dùng lại
+        hash đã lưu (không phải đọc lại cả file mỗi lần chạy).
+        """
+        stat = os.stat(path)
+        entry = self.files.get(video_id)
+        if (entry and entry.get("source") == path and entry.get("size") == stat.st_size
+                and entry.get("mtime_ns") == stat.st_mtime_ns):
+            sha256 = entry["sha256"]
+        else:
+            sha256 = file_sha256(path)
+        return {"sha256": sha256, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def is_current(self, video_id: str, fingerprint: Dict, version: str) -> bool:
+        """File đã được xử lý với đúng nội dung và cấu hình này, và file kết quả vẫn còn."""
+        entry = self.files.get(video_id)
+        return (entry is not None and entry["sha256"] == fingerprint["sha256"]
+                and entry["settings_version"] == version and os.path.exists(entry["output"]))
+
+    def record(self, video_id: str, source: str, fingerprint: Dict, version: str, output: str,
+               rows_in: int, rows_out: int):
+        self.files[video_id] = {
+            "source": source, **fingerprint,
+            "settings_version": version, "output": output, "rows_in": rows_in, "rows_out": rows_out,
+            "processed_at": datetime.now().isoformat(timespec='seconds'),
+        }
+        self.merged = False
+
+    def remove(self, video_id: str) -> Optional[Dict]:
+        entry = self.files.pop(video_id, None)
+        if entry is not None:
+            self.merged = False
+        return entry
+
+    def save(self):
+        # Ghi ra file tạm rồi os.replace để manifest không bao giờ bị ghi dở
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"settings": self.settings, "merged": self.merged, "files": self.files},
+                      f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,118 @@
+"""
+Biên dịch tài nguyên JSON (teencode.json, spamkeyword.json) thành artifact nhị phân.
+
+Artifact nằm cạnh file JSON (vd: teencode.json -> teencode.<kind>.bin), gồm header cố định
+(magic, phiên bản định dạng, mtime/kích thước của JSON nguồn) + payload pickle đã dựng sẵn
+(bảng tra đã đảo, trie, automaton, ...). Khi nạp, file được mmap và chỉ dùng nếu header khớp
+với JSON hiện tại; ngược lại artifact được dựng lại từ JSON và ghi đè (ghi tạm rồi os.replace).
+
+Chạy:  python resource_compiler.py   # biên dịch trước mọi artifact trong thư mục này
+"""
+import logging
+import mmap
+import os
+import pickle
+import struct
+from typing import Any, Callable, Dict, Optional, Tuple
+
+MAGIC = b"TCCR"
+# Tăng khi cấu trúc payload (TeencodeTrie, AhoCorasick, ...) thay đổi để artifact cũ tự bị bỏ qua
+FORMAT_VERSION = 3
+_HEADER = struct.Struct("<4sHqq")  # magic, format version, source mtime_ns, source size
+
+
+def artifact_path(json_path: str, kind: str) -> str:
+    """Đường dẫn artifact cho 1 file JSON và 1 loại bảng dựng từ nó."""
+    base, _ = os.path.splitext(json_path)
+    return f"{base}.{kind}.bin"
+
+
+def _source_stamp(json_path: str):
+    st = os.stat(json_path)
+    return st.st_mtime_ns, st.st_size
+
+
+def read_artifact(json_path: str, kind: str) -> Optional[Any]:
+    """Đọc artifact qua mmap; trả None nếu không có, hỏng, khác phiên bản hoặc cũ hơn JSON."""
+    path = artifact_path(json_path, kind)
+    try:
+        if os.path.getsize(path) <= _HEADER.size:
+            return None
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, version, mtime_ns, size = _HEADER.unpack_from(mm, 0)
+            if magic != MAGIC or version != FORMAT_VERSION or (mtime_ns, size) != _source_stamp(json_path):
+                return None
+            with memoryview(mm) as view:
+                return pickle.loads(view[_HEADER.size:])
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.warning(f"Bỏ qua artifact hỏng {path}: {e}")
+        return None
+
+
+def write_artifact(json_path: str, kind: str, payload: Any, source_stamp: Optional[Tuple[int, int]] = None):
+    """
+    Ghi artifact kèm dấu thời gian của JSON nguồn (ghi file tạm rồi os.replace).
+
+    Args:
+        source_stamp: (mtime_ns, size) của JSON lúc bắt đầu dựng payload; nếu JSON đổi trong lúc
+                      dựng thì artifact mang dấu cũ và sẽ bị dựng lại ở lần nạp sau
+    """
+    path = artifact_path(json_path, kind)
+    mtime_ns, size = source_stamp or _source_stamp(json_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, mtime_ns, size))
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        # Thư mục chỉ đọc, ... -> vẫn chạy bình thường, chỉ không có artifact
+        logging.warning(f"Không ghi được artifact {path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_compiled(json_path: str, kind: str, build: Callable[[], Any]) -> Any:
+    """
+    Nạp bảng đã biên dịch cho json_path, tự dựng lại khi artifact thiếu hoặc cũ.
+
+    Args:
+        json_path: File JSON nguồn
+        kind: Tên loại bảng (mỗi consumer dựng bảng khác nhau từ cùng 1 JSON)
+        build: Hàm đọc JSON và dựng payload (phải pickle được)
+    """
+    if not os.path.exists(json_path):
+        return build()
+    payload = read_artifact(json_path, kind)
+    if payload is None:
+        stamp = _source_stamp(json_path)
+        payload = build()
+        write_artifact(json_path, kind, payload, stamp)
+    return payload
+
+
+def compile_all(base_dir: str) -> Dict[str, str]:
+    """Biên dịch trước các artifact mà pipeline dùng, trả về {kind: đường dẫn artifact}."""
+    from data_preprocess import TeencodeConverter as PipelineTeencodeConverter
+    from spam_checker import SpamChecker
+    from teencode_converter import TeencodeConverter
+
+    teencode_path = os.path.join(base_dir, "teencode.json")
+    spam_path = os.path.join(base_dir, "spamkeyword.json")
+    PipelineTeencodeConverter(teencode_path)
+    TeencodeConverter(teencode_path)
+    SpamChecker(spam_path)
+    return {
+        kind: artifact_path(path, kind)
+        for path, kind in [(teencode_path, PipelineTeencodeConverter.ARTIFACT_KIND),
+                           (teencode_path, TeencodeConverter.ARTIFACT_KIND),
+                           (spam_path, SpamChecker.ARTIFACT_KIND)]
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    for kind, path in compile_all(os.path.dirname(os.path.abspath(__file__))).items():
+        logging.info(f"{kind}: {path} ({os.path.getsize(path) if os.path.exists(path) else 0} bytes)")
@@ -0,0 +1,95 @@
+"""
+Theo dõi thay đổi của các file tài nguyên (teencode.json, spamkeyword.json) để hot-reload.
+
+Watcher chạy trên 1 thread nền, định kỳ so sánh (mtime, kích thước) của từng file. Khi có file đổi,
+callback được gọi ngay trên thread nền đó để dựng bảng mới; bên dùng chỉ việc gán 1 tham chiếu
+(nguyên tử trong Python) nên luồng xử lý chính không phải dừng lại.
+"""
+import hashlib
+import logging
+import os
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+def file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def dictionary_version(paths: Iterable[str]) -> str:
+    """Phiên bản từ điển = 12 ký tự đầu sha1 của nội dung các file (file thiếu được bỏ qua)."""
+    h = hashlib.sha1()
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                h.update(f.read())
+        h.update(b"\0")
+    return h.hexdigest()[:12]
+
+
+class ResourceWatcher:
+    """
+    Polling watcher cho 1 nhóm file.
+    - Chỉ reload khi (mtime, kích thước) của file đã đứng yên qua 1 chu kỳ, tránh đọc file đang
+      được SpamKeywordManager/TeencodeManager ghi dở.
+    - on_change(changed_paths) chạy trên thread nền; nếu callback lỗi thì giữ phiên bản cũ và
+      thử lại ở chu kỳ sau.
+    """
+
+    def __init__(self, paths: Iterable[str], on_change: Callable[[List[str]], None], interval: float = 5.0):
+        """
+        Args:
+            paths: Các file cần theo dõi
+            on_change: Hàm được gọi với danh sách file vừa thay đổi
+            interval: Chu kỳ kiểm tra (giây)
+        """
+        self.paths = list(paths)
+        self.on_change = on_change
+        self.interval = interval
+        self._stamps: Dict[str, Optional[Tuple[int, int]]] = {path: file_stamp(path) for path in self.paths}
+        self._pending: Dict[str, Optional[Tuple[int, int]]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "ResourceWatcher":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="resource-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def poll(self) -> List[str]:
+        """Kiểm tra 1 lần; gọi on_change nếu có file đổi. Trả về danh sách file đã đổi."""
+        changed = []
+        for path in self.paths:
+            stamp = file_stamp(path)
+            if stamp == self._stamps[path]:
+                self._pending.pop(path, None)
+            elif path in self._pending and self._pending[path] == stamp:
+                changed.append(path)
+            else:
+                self._pending[path] = stamp
+        if not changed:
+            return []
+        try:
+            self.on_change(changed)
+        except Exception as e:
+            logging.error(f"Hot-reload thất bại, tiếp tục dùng phiên bản cũ: {e}")
+            return []
+        # Chỉ ghi nhận stamp mới khi reload thành công
+        for path in changed:
+            self._stamps[path] = self._pending.pop(path)
+        return changed
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
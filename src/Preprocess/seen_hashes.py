@@ -0,0 +1,96 @@
+import os
+import sqlite3
+import tempfile
+from typing import Iterable, List, Optional, Set
+
+
+class SeenHashes:
+    """
+    Tập hash 64-bit các text đã gặp, dùng để bỏ trùng lặp xuyên chunk ở chế độ streaming.
+    - Tối đa `max_memory` hash nằm trong set Python (~70 byte/hash).
+    - Khi vượt, cả set được đổ xuống 1 bảng SQLite tạm rồi làm rỗng: RAM giới hạn theo max_memory
+      thay vì tăng theo số dòng duy nhất, phần còn lại nằm trên đĩa (~10-20 byte/hash).
+    - Tra cứu luôn chính xác (không có dương tính giả như Bloom filter), nên không bỏ nhầm comment.
+    File tạm bị xoá khi close(); chạy tiếp từ checkpoint dựng lại tập từ các chunk đã xử lý.
+    """
+
+    _SQL_BATCH = 500  # Số tham số tối đa mỗi câu lệnh IN (...)
+
+    def __init__(self, max_memory: int = 2_000_000, spill_dir: Optional[str] = None):
+        """
+        Args:
+            max_memory: Số hash tối đa giữ trong RAM
+            spill_dir: Thư mục chứa file SQLite tạm (None = thư mục tạm của hệ thống)
+        """
+        self.max_memory = max_memory
+        self.spill_dir = spill_dir
+        self.spilled = 0
+        self._memory: Set[int] = set()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._path: Optional[str] = None
+
+    @staticmethod
+    def _signed(h: int) -> int:
+        # Hash của pandas là uint64, SQLite INTEGER là int64 có dấu
+        return h - (1 << 64) if h >= (1 << 63) else h
+
+    def _open(self):
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+        fd, self._path = tempfile.mkstemp(prefix="seen_hashes_", suffix=".sqlite", dir=self.spill_dir)
+        os.close(fd)
+        self._conn = sqlite3.connect(self._path)
+        # Dữ liệu tạm, dựng lại được: không cần journal / fsync
+        self._conn.execute("PRAGMA journal_mode=OFF")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute("CREATE TABLE seen (h INTEGER PRIMARY KEY)")
+
+    def _spill(self):
+        if self._conn is None:
+            self._open()
+        before = self._conn.total_changes
+        with self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO seen (h) VALUES (?)",
+                                   ((self._signed(h),) for h in self._memory))
+        # INSERT OR IGNORE bỏ qua hash đã có nên chỉ số dòng thực sự thêm được tính
+        self.spilled += self._conn.total_changes - before
+        self._memory = set()
+
+    def _lookup_disk(self, hashes: List[int]) -> Set[int]:
+        found = set()
+        for start in range(0, len(hashes), self._SQL_BATCH):
+            batch = hashes[start:start + self._SQL_BATCH]
+            by_signed = {self._signed(h): h for h in batch}
+            placeholders = ",".join("?" * len(by_signed))
+            rows = self._conn.execute(f"SELECT h FROM seen WHERE h IN ({placeholders})", list(by_signed))
+            found.update(by_signed[h] for (h,) in rows)
+        return found
+
+    def contains_many(self, hashes: List[int]) -> List[bool]:
+        """Với mỗi hash, True nếu đã có trong tập."""
+        found = [h in self._memory for h in hashes]
+        if self._conn is not None and self.spilled:
+            on_disk = self._lookup_disk([h for h, hit in zip(hashes, found) if not hit])
+            if on_disk:
+                found = [hit or h in on_disk for h, hit in zip(hashes, found)]
+        return found
+
+    def update(self, hashes: Iterable[int]):
+        """Thêm hash vào tập (đổ xuống đĩa khi phần trong RAM vượt max_memory)."""
+        self._memory.update(hashes)
+        if len(self._memory) > self.max_memory:
+            self._spill()
+
+    def __len__(self) -> int:
+        # Xấp xỉ trên: hash trong RAM có thể trùng với hash đã đổ xuống đĩa (replay checkpoint)
+        return len(self._memory) + self.spilled
+
+    def close(self):
+        """Đóng và xoá file SQLite tạm (nếu có)."""
+        self._memory = set()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if self._path and os.path.exists(self._path):
+            os.remove(self._path)
+        self._path = None
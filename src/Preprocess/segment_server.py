@@ -0,0 +1,333 @@
+"""
+Daemon tách từ: nạp segmenter (VnCoreNLP, ...) MỘT lần rồi phục vụ nhiều client qua socket cục bộ,
+để notebook / các lần chạy DataPipeline ngắn không phải khởi động JVM và nạp model lại mỗi lần.
+
+Giao thức: JSON lines (UTF-8), mỗi request / response là 1 dòng:
+    -> {"id": 1, "op": "annotate" | "segment", "texts": ["...", ...]}
+    <- {"id": 1, "ok": true, "result": [...]}          (cùng thứ tự với texts)
+    -> {"id": 2, "op": "ping" | "stats"}                (ping: backend + identity, xem Segmenter.identity)
+    <- {"id": 2, "ok": false, "error": "..."}         (khi lỗi)
+
+Mỗi kết nối được phục vụ bởi 1 thread; model dùng chung được bảo vệ bằng lock (JVM pipeline
+không an toàn khi gọi song song), phần đọc/ghi socket và JSON của các client vẫn chạy song song.
+
+Chạy:
+    python segment_server.py serve --backend vncorenlp --vncorenlp-dir path/to/vncorenlp
+    python segment_server.py serve --address unix:/tmp/segment.sock
+    python segment_server.py stats --address 127.0.0.1:8765
+Dùng từ pipeline: Config.SEGMENTER = "server", Config.SEGMENTER_ADDRESS = "127.0.0.1:8765"
+"""
+import argparse
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from segmenters import SEGMENTERS, Segmenter, create_segmenter
+
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+
+
+def parse_address(address: str) -> Tuple[int, object]:
+    """
+    "unix:/đường/dẫn.sock" -> (AF_UNIX, path); "host:port" -> (AF_INET, (host, port))
+    """
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server: SegmentServer = self.server.segment_server
+        server._client_change(+1)
+        try:
+            for line in self.rfile:
+                if line.strip():
+                    self.wfile.write(server.handle_request(line))
+                    self.wfile.flush()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            server._client_change(-1)
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+else:  # Windows
+    _UnixServer = None
+
+
+class SegmentServer:
+    """Phục vụ 1 segmenter cho nhiều client, có thống kê thông lượng."""
+
+    def __init__(self, segmenter: Segmenter, address: str = DEFAULT_ADDRESS, log_interval: float = 60.0):
+        """
+        Args:
+            segmenter: Segmenter đã nạp sẵn model
+            address: "host:port" hoặc "unix:/path.sock"
+            log_interval: Chu kỳ ghi log thông lượng (giây), <= 0 để tắt
+        """
+        self.segmenter = segmenter
+        # Backend + phiên bản model/từ điển đã nạp; client đưa vào fingerprint cache của pipeline
+        self.identity = (segmenter.identity() if isinstance(segmenter, Segmenter)
+                         else {"backend": getattr(segmenter, "name", type(segmenter).__name__)})
+        self.address = address
+        self.log_interval = log_interval
+        self._model_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.started_at = time.time()
+        self._stats = {"requests": 0, "texts": 0, "chars": 0, "errors": 0, "busy_seconds": 0.0,
+                       "active_clients": 0, "total_clients": 0}
+
+        family, addr = parse_address(address)
+        if family == socket.AF_UNIX:
+            if _UnixServer is None:
+                raise ValueError("Unix socket không được hỗ trợ trên hệ điều hành này, dùng host:port")
+            if os.path.exists(addr):
+                # File socket còn sót từ lần chạy trước
+                os.remove(addr)
+            self._server = _UnixServer(addr, _RequestHandler)
+        else:
+            self._server = _TCPServer(addr, _RequestHandler)
+            if addr[1] == 0:
+                # Port 0: hệ điều hành tự chọn port trống
+                self.address = "%s:%d" % self._server.server_address[:2]
+        self._server.segment_server = self
+
+    def _client_change(self, delta: int):
+        with self._stats_lock:
+            self._stats["active_clients"] += delta
+            if delta > 0:
+                self._stats["total_clients"] += delta
+
+    def _run_texts(self, op: str, texts: List[str]) -> List:
+        func = self.segmenter.annotate_text if op == "annotate" else self.segmenter.word_segment
+        start = time.perf_counter()
+        with self._model_lock:
+            result = [func(text) for text in texts]
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self._stats["texts"] += len(texts)
+            self._stats["chars"] += sum(len(text) for text in texts)
+            self._stats["busy_seconds"] += elapsed
+        return result
+
+    def handle_request(self, line: bytes) -> bytes:
+        """Xử lý 1 dòng request, trả về 1 dòng response (đã encode, kết thúc bằng '\\n')."""
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            op = request.get("op")
+            if op in ("annotate", "segment"):
+                texts = request.get("texts")
+                if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                    raise ValueError("'texts' phải là list các chuỗi")
+                result = self._run_texts(op, texts)
+            elif op == "ping":
+                result = {"backend": self.identity["backend"], "identity": self.identity}
+            elif op == "stats":
+                result = self.stats()
+            else:
+                raise ValueError(f"op không hợp lệ: {op}")
+            response = {"id": request_id, "ok": True, "result": result}
+        except Exception as e:
+            with self._stats_lock:
+                self._stats["errors"] += 1
+            response = {"id": request_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+        with self._stats_lock:
+            self._stats["requests"] += 1
+        return (json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8")
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        uptime = time.time() - self.started_at
+        busy = stats["busy_seconds"]
+        stats.update({
+            "backend": self.identity["backend"],
+            "identity": self.identity,
+            "address": self.address,
+            "uptime_seconds": round(uptime, 3),
+            "busy_seconds": round(busy, 3),
+            # Thông lượng khi model đang chạy và thông lượng trung bình từ lúc khởi động
+            "texts_per_busy_second": round(stats["texts"] / busy, 1) if busy > 0 else None,
+            "texts_per_second": round(stats["texts"] / uptime, 1) if uptime > 0 else None,
+            "utilization": round(busy / uptime, 4) if uptime > 0 else None,
+        })
+        return stats
+
+    def _log_throughput(self):
+        last_texts, last_busy = 0, 0.0
+        while not self._stop.wait(self.log_interval):
+            stats = self.stats()
+            texts, busy = stats["texts"] - last_texts, stats["busy_seconds"] - last_busy
+            if texts:
+                logging.info(f"{texts} text trong {self.log_interval:.0f}s ({texts / self.log_interval:.1f} text/s, "
+                             f"model bận {busy:.2f}s), {stats['active_clients']} client đang kết nối")
+            last_texts, last_busy = stats["texts"], stats["busy_seconds"]
+
+    def serve_forever(self):
+        logging.info(f"Segment server ({self.stats()['backend']}) đang lắng nghe tại {self.address}")
+        if self.log_interval > 0:
+            threading.Thread(target=self._log_throughput, daemon=True).start()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            family, addr = parse_address(self.address)
+            if family == socket.AF_UNIX and os.path.exists(addr):
+                os.remove(addr)
+
+    def start(self) -> "SegmentServer":
+        """Chạy server ở thread nền (dùng trong notebook / benchmark)."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def shutdown(self):
+        self._stop.set()
+        self._server.shutdown()
+
+
+class SegmentClient(Segmenter):
+    """
+    Client mỏng cho SegmentServer, dùng thay segmenter trong TextPreprocessor (Config.SEGMENTER = "server").
+    TextPreprocessor.process_batch gửi cả lô qua annotate_many / segment_many (1 round-trip mỗi lô).
+    Giữ 1 kết nối cố định; mất kết nối thì tự nối lại và gửi lại request 1 lần (request không có tác dụng phụ).
+    """
+
+    name = "server"
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, timeout: Optional[float] = 300.0):
+        """
+        Args:
+            address: Địa chỉ server ("host:port" hoặc "unix:/path.sock")
+            timeout: Thời gian chờ tối đa 1 response (giây)
+        """
+        self.address = address
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._file = None
+        self._next_id = 0
+        # Kiểm tra ngay để báo lỗi rõ ràng khi server chưa chạy
+        ping = self._call("ping")
+        self.backend = ping["backend"]
+        self.remote_identity: Dict = ping.get("identity", {"backend": self.backend})
+
+    def _connect(self):
+        family, addr = parse_address(self.address)
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(addr)
+        except OSError:
+            sock.close()
+            raise
+        if family == socket.AF_INET:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        self._file = sock.makefile("rwb")
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._file.close()
+                self._sock.close()
+            finally:
+                self._sock = self._file = None
+
+    def _call(self, op: str, texts: Optional[List[str]] = None):
+        self._next_id += 1
+        request = {"id": self._next_id, "op": op}
+        if texts is not None:
+            request["texts"] = texts
+        payload = (json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8")
+
+        for attempt in range(2):
+            try:
+                if self._sock is None:
+                    self._connect()
+                self._file.write(payload)
+                self._file.flush()
+                line = self._file.readline()
+                if not line:
+                    raise ConnectionError("server đóng kết nối")
+                break
+            except OSError as e:
+                self.close()
+                if attempt:
+                    raise ConnectionError(f"Không kết nối được segment server tại {self.address}: {e}") from e
+
+        response = json.loads(line)
+        if not response.get("ok"):
+            raise RuntimeError(f"Segment server lỗi: {response.get('error')}")
+        return response["result"]
+
+    def annotate_text(self, text: str) -> Dict:
+        return self._call("annotate", [text])[0]
+
+    def word_segment(self, text: str) -> str:
+        return self._call("segment", [text])[0]
+
+    def annotate_many(self, texts: List[str]) -> List[Dict]:
+        """Annotate nhiều văn bản trong 1 lần gửi."""
+        return self._call("annotate", list(texts))
+
+    def segment_many(self, texts: List[str]) -> List[str]:
+        return self._call("segment", list(texts))
+
+    def stats(self) -> Dict:
+        return self._call("stats")
+
+    def identity(self) -> Dict:
+        # Kết quả phụ thuộc backend/model/từ điển mà server đã nạp, không phải cấu hình local
+        return {"backend": self.name, "remote": self.remote_identity}
+
+    def __getstate__(self):
+        # Socket không pickle được: bản sao (vd gửi sang process khác) tự kết nối lại khi dùng
+        state = self.__dict__.copy()
+        state["_sock"] = state["_file"] = None
+        return state
+
+
+if __name__ == "__main__":
+    from data_preprocess import Config
+
+    parser = argparse.ArgumentParser(description="Daemon tách từ")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="Nạp model và phục vụ client")
+    serve.add_argument("--address", default=Config.SEGMENTER_ADDRESS, help='"host:port" hoặc "unix:/path.sock"')
+    # "server" là chính client này, không dùng làm backend của server được
+    serve.add_argument("--backend", choices=[name for name in SEGMENTERS if name != SegmentClient.name],
+                       default="vncorenlp")
+    serve.add_argument("--vncorenlp-dir", default=Config.VNCORENLP_DIR)
+    serve.add_argument("--dict", default=Config.SEGMENTER_DICT_FILE)
+    serve.add_argument("--log-interval", type=float, default=60.0)
+    stats = sub.add_parser("stats", help="In thống kê thông lượng của server đang chạy")
+    stats.add_argument("--address", default=Config.SEGMENTER_ADDRESS)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        start = time.perf_counter()
+        segmenter = create_segmenter(args.backend, args.vncorenlp_dir, args.dict)
+        logging.info(f"Đã nạp {args.backend} trong {time.perf_counter() - start:.1f}s")
+        server = SegmentServer(segmenter, args.address, log_interval=args.log_interval)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logging.info("Dừng segment server")
+    else:
+        print(json.dumps(SegmentClient(args.address).stats(), ensure_ascii=False, indent=2))
@@ -0,0 +1,410 @@
+"""
+Bộ tách từ cho TextPreprocessor. Mọi backend có cùng interface:
+- annotate_text(text) -> {'sentences': [[{'index': 1, 'form': 'Hà_Nội', 'posTag': 'Np'}, ...], ...]}
+- word_segment(text)  -> str, các âm tiết của 1 từ nối bằng '_' (vd: "hôm_nay trời đẹp")
+
+Backend:
+- VnCoreNLPSegmenter ("vncorenlp"): VnCoreNLP qua JVM, chính xác nhất, nạp model mất vài giây.
+- LongestMatchSegmenter ("longest_match"): tra từ điển theo âm tiết (greedy longest-match) ngay trong
+  process Python, không cần Java. posTag chỉ là ước lượng đủ cho smart lowercase (Np/Ny/M/CH/X).
+
+Chạy:
+    # So khớp 2 backend trên 1 mẫu comment (cần VnCoreNLP)
+    python segmenters.py compare --input data.csv --sample 2000 --output agreement.json
+    # Dựng từ điển từ output đã tách từ bằng VnCoreNLP (các từ có '_')
+    python segmenters.py build-dict processed.csv --column processed_text --merge
+    # Dựng từ điển từ vocab của model tách từ VnCoreNLP (src/vncorenlp/models/wordsegmenter/vi-vocab)
+    python segmenters.py build-dict --vncorenlp-vocab ../vncorenlp/models/wordsegmenter/vi-vocab --merge
+"""
+import abc
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import struct
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from preprocess_cache import PreprocessCache
+from resource_compiler import load_compiled
+from resource_watcher import dictionary_version
+from teencode_trie import TeencodeTrie
+
+# "server": client của segment_server.py (model nạp sẵn trong 1 daemon dùng chung)
+SEGMENTERS = ("vncorenlp", "longest_match", "server")
+
+
+class Segmenter(abc.ABC):
+    """Interface chung của các bộ tách từ."""
+
+    name = ""
+
+    @abc.abstractmethod
+    def annotate_text(self, text: str) -> Dict:
+        ...
+
+    @abc.abstractmethod
+    def word_segment(self, text: str) -> str:
+        ...
+
+    def identity(self) -> Dict:
+        """Backend + phiên bản model/từ điển: mọi thứ ảnh hưởng tới kết quả tách từ (dùng cho fingerprint cache)."""
+        return {"backend": self.name}
+
+
+class VnCoreNLPSegmenter(Segmenter):
+    """
+    Bọc py_vncorenlp.VnCoreNLP (import khi khởi tạo, nên chỉ cần Java/jar khi thật sự dùng backend này).
+    Output của py_vncorenlp ({0: [{'wordForm', 'posTag', ...}]} và list câu) được đưa về interface chung.
+    """
+
+    name = "vncorenlp"
+
+    def __init__(self, vncorenlp_dir: str, annotators: Optional[List[str]] = None):
+        if not os.path.exists(vncorenlp_dir):
+            raise FileNotFoundError(f"Không tìm thấy VnCoreNLP tại: {vncorenlp_dir}")
+        from py_vncorenlp import VnCoreNLP
+
+        self.vncorenlp_dir = vncorenlp_dir
+        self.model = VnCoreNLP(annotators=annotators or ["wseg", "pos"], save_dir=vncorenlp_dir)
+
+    @classmethod
+    def wrap(cls, model) -> "VnCoreNLPSegmenter":
+        """Bọc 1 đối tượng đã khởi tạo sẵn có cùng API/định dạng output với py_vncorenlp.VnCoreNLP."""
+        segmenter = cls.__new__(cls)
+        segmenter.vncorenlp_dir = None
+        segmenter.model = model
+        return segmenter
+
+    def identity(self) -> Dict:
+        if self.vncorenlp_dir is None:
+            return {"backend": self.name, "model_version": "unknown"}
+        model_version = PreprocessCache.model_version(self.vncorenlp_dir)
+        return {"backend": self.name, "model_version": hashlib.sha1(model_version.encode('utf-8')).hexdigest()[:12]}
+
+    def annotate_text(self, text: str) -> Dict:
+        output = self.model.annotate_text(text)
+        if not isinstance(output, dict) or 'sentences' in output:
+            return output
+        return {'sentences': [
+            [{'index': token.get('index', i + 1),
+              'form': token.get('form', token.get('wordForm', '')),
+              'posTag': token.get('posTag', '')}
+             for i, token in enumerate(sentence)]
+            for _, sentence in sorted(output.items())
+        ]}
+
+    def word_segment(self, text: str) -> str:
+        output = self.model.word_segment(text)
+        return output if isinstance(output, str) else ' '.join(output)
+
+
+class LongestMatchSegmenter(Segmenter):
+    """
+    Tách từ theo từ điển: văn bản được tách âm tiết/dấu câu, rồi từ trái sang phải ghép cụm âm tiết
+    dài nhất có trong từ điển thành 1 từ (nối bằng '_'). Trie dùng lại TeencodeTrie (tra không phân
+    biệt hoa/thường, chỉ bắt đầu khớp ở token chữ/số) và được lưu thành artifact <dict>.segmenter.bin.
+
+    Câu được tách sau mỗi dấu . ! ? …; câu sentinel "BATCHSEPTOKEN ." của process_batch luôn là 1 câu
+    riêng nên xử lý theo lô cho kết quả giống từng comment.
+    """
+
+    name = "longest_match"
+    ARTIFACT_KIND = "segmenter"
+    # Số có dấu phân cách (10.000, 3,5, 12/3, 10:30) giữ nguyên 1 token như VnCoreNLP
+    TOKEN_PATTERN = re.compile(r"\d+(?:[.,:/]\d+)+|\w+|[^\w\s]", re.UNICODE)
+    EOS = frozenset(('.', '!', '?', '…'))
+
+    def __init__(self, dict_path: str):
+        """
+        Args:
+            dict_path: File từ điển, mỗi dòng 1 từ (âm tiết cách nhau bằng khoảng trắng hoặc '_'),
+                       dòng bắt đầu bằng '#' là chú thích
+        """
+        self.dict_path = dict_path
+        # Phiên bản của từ điển lúc nạp (file có thể bị sửa sau đó, trie trong RAM thì không)
+        self.dict_version = dictionary_version([dict_path])
+        self.trie = load_compiled(dict_path, self.ARTIFACT_KIND, lambda: TeencodeTrie(self._load_words(dict_path)))
+
+    def identity(self) -> Dict:
+        return {"backend": self.name, "dictionary_version": self.dict_version}
+
+    @staticmethod
+    def _load_words(dict_path: str) -> Dict[str, str]:
+        if not os.path.exists(dict_path):
+            logging.warning(f"Không tìm thấy từ điển tách từ: {dict_path}, mỗi âm tiết sẽ là 1 từ")
+            return {}
+        words = {}
+        with open(dict_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                word = ' '.join(line.strip().replace('_', ' ').split())
+                # Từ 1 âm tiết không cần tra: âm tiết đứng riêng vốn đã là 1 token
+                if word and not word.startswith('#') and ' ' in word:
+                    words[word.lower()] = word
+        return words
+
+    def segment_tokens(self, tokens: List[str]) -> List[str]:
+        """Ghép các cụm âm tiết có trong từ điển, mỗi từ nhiều âm tiết thành 1 phần tử nối bằng '_'."""
+        result = []
+        last = 0
+        for start, end, _ in self.trie.iter_matches(tokens):
+            result.extend(tokens[last:start])
+            result.append('_'.join(tokens[start:end]))
+            last = end
+        result.extend(tokens[last:])
+        return result
+
+    @staticmethod
+    def _pos_tag(word: str, sentence_start: bool) -> str:
+        """Nhãn ước lượng, chỉ phân biệt những gì smart lowercase cần giữ nguyên chữ hoa."""
+        first = word[0]
+        if first.islower():
+            # Đa số từ: bắt đầu bằng chữ thường thì không thể là Np/Ny/M
+            return 'X'
+        if not first.isalnum() and first != '_':
+            return 'CH'
+        if first.isdigit():
+            return 'M'
+        syllables = word.split('_')
+        if len(word) > 1 and word.isupper() and len(syllables) == 1:
+            return 'Ny'
+        if all(s[:1].isupper() for s in syllables) and (len(syllables) > 1 or not sentence_start):
+            return 'Np'
+        return 'X'
+
+    def annotate_text(self, text: str) -> Dict:
+        sentences = []
+        current: List[str] = []
+        for word in self.segment_tokens(self.TOKEN_PATTERN.findall(text)):
+            current.append(word)
+            if word in self.EOS:
+                sentences.append(current)
+                current = []
+        if current:
+            sentences.append(current)
+        return {'sentences': [
+            [{'index': i + 1, 'form': word, 'posTag': self._pos_tag(word, i == 0)}
+             for i, word in enumerate(sentence)]
+            for sentence in sentences
+        ]}
+
+    def word_segment(self, text: str) -> str:
+        return ' '.join(self.segment_tokens(self.TOKEN_PATTERN.findall(text)))
+
+
+def create_segmenter(name: str, vncorenlp_dir: str, dict_path: str, address: Optional[str] = None) -> Segmenter:
+    """Tạo segmenter theo tên cấu hình (Config.SEGMENTER); address chỉ dùng cho "server"."""
+    if name == "vncorenlp":
+        return VnCoreNLPSegmenter(vncorenlp_dir)
+    if name == "longest_match":
+        return LongestMatchSegmenter(dict_path)
+    if name == "server":
+        from segment_server import DEFAULT_ADDRESS, SegmentClient
+        return SegmentClient(address or DEFAULT_ADDRESS)
+    raise ValueError(f"Segmenter không hợp lệ: {name} (chọn một trong {', '.join(SEGMENTERS)})")
+
+
+# --- So khớp 2 backend ---
+
+def _word_spans(segmented: str) -> Set[Tuple[int, int]]:
+    """Tập (vị trí đầu, vị trí cuối) của từng từ, tính trên chuỗi đã bỏ khoảng trắng và '_'."""
+    spans = set()
+    pos = 0
+    for word in segmented.split():
+        length = len(word.replace('_', ''))
+        spans.add((pos, pos + length))
+        pos += length
+    return spans
+
+
+def agreement_report(texts: List[str], reference, candidate, batch_size: int = 64,
+                     max_examples: int = 20) -> Dict:
+    """
+    So kết quả tách từ của 2 TextPreprocessor (khác segmenter) trên cùng 1 mẫu comment.
+
+    Args:
+        texts: Comment gốc
+        reference: TextPreprocessor dùng segmenter chuẩn (VnCoreNLP)
+        candidate: TextPreprocessor dùng segmenter cần đánh giá
+
+    Returns:
+        Dict gồm precision/recall/F1 theo từ (so ranh giới từ trên văn bản đã clean + mask emoji),
+        tỉ lệ comment tách từ giống hệt, tỉ lệ output cuối của pipeline giống hệt, tốc độ 2 backend
+        và một số ví dụ khác nhau
+    """
+    cleaned = [reference._clean(t) for t in texts if isinstance(t, str) and t.strip()]
+    masked = [reference.emoji_engine.mask(t)[0] for t in cleaned]
+
+    matched = predicted = gold = same_segmentation = skipped = 0
+    examples = []
+    for text in masked:
+        ref = reference.segmenter.word_segment(text)
+        cand = candidate.segmenter.word_segment(text)
+        ref_spans, cand_spans = _word_spans(ref), _word_spans(cand)
+        if max(ref_spans, default=(0, 0))[1] != max(cand_spans, default=(0, 0))[1]:
+            # 2 bên tách token khác nhau (chuẩn hoá ký tự, ...) => không so ranh giới được
+            skipped += 1
+            continue
+        matched += len(ref_spans & cand_spans)
+        predicted += len(cand_spans)
+        gold += len(ref_spans)
+        if ref_spans == cand_spans:
+            same_segmentation += 1
+        elif len(examples) < max_examples:
+            examples.append({"text": text, "reference": ref, "candidate": cand})
+
+    def run(preprocessor):
+        start = time.perf_counter()
+        outputs = preprocessor.process_many(texts, batch_size=batch_size)
+        return outputs, time.perf_counter() - start
+
+    ref_out, ref_sec = run(reference)
+    cand_out, cand_sec = run(candidate)
+    compared = len(masked) - skipped
+    precision = matched / predicted if predicted else 0.0
+    recall = matched / gold if gold else 0.0
+    return {
+        "reference": reference.segmenter.name,
+        "candidate": candidate.segmenter.name,
+        "comments": len(texts),
+        "compared": compared,
+        "skipped_token_mismatch": skipped,
+        "word_precision": round(precision, 4),
+        "word_recall": round(recall, 4),
+        "word_f1": round(2 * precision * recall / (precision + recall), 4) if precision + recall else 0.0,
+        "segmentation_exact_match": round(same_segmentation / compared, 4) if compared else 0.0,
+        "output_exact_match": round(sum(a == b for a, b in zip(ref_out, cand_out)) / len(texts), 4) if texts else 0.0,
+        "reference_seconds": round(ref_sec, 3),
+        "candidate_seconds": round(cand_sec, 3),
+        "speedup": round(ref_sec / cand_sec, 1) if cand_sec > 0 else None,
+        "examples": examples,
+    }
+
+
+def harvest_words(segmented_texts: Iterable, min_count: int = 2) -> Counter:
+    """Đếm các từ nhiều âm tiết (có '_') trong output đã tách từ, giữ từ xuất hiện >= min_count lần."""
+    counts = Counter()
+    for text in segmented_texts:
+        if isinstance(text, str):
+            counts.update(word.lower() for word in text.split() if '_' in word.strip('_'))
+    return Counter({word: n for word, n in counts.items() if n >= min_count})
+
+
+def read_vncorenlp_vocab(path: str) -> List[str]:
+    """
+    Đọc vocab của model tách từ VnCoreNLP (models/wordsegmenter/vi-vocab): 1 java.util.HashSet<String>
+    được Java serialize. Trả về các từ (âm tiết cách nhau bằng khoảng trắng) theo thứ tự trong file.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    # Dữ liệu của HashSet.writeObject: block data (TC_BLOCKDATA 0x77, dài 12 byte) gồm
+    # capacity (int), load factor (float), số phần tử (int); sau đó là từng phần tử String
+    pos = data.find(b'\x77\x0c')
+    if pos < 0:
+        raise ValueError(f"{path} không phải vocab HashSet<String> của VnCoreNLP")
+    _, _, size = struct.unpack_from('>ifi', data, pos + 2)
+    pos += 14
+    words = []
+    for _ in range(size):
+        tag = data[pos]
+        if tag == 0x74:    # TC_STRING: độ dài 2 byte
+            length, pos = struct.unpack_from('>H', data, pos + 1)[0], pos + 3
+        elif tag == 0x7C:  # TC_LONGSTRING: độ dài 8 byte
+            length, pos = struct.unpack_from('>q', data, pos + 1)[0], pos + 9
+        else:
+            raise ValueError(f"Phần tử không phải String (tag {tag:#x}) tại byte {pos} của {path}")
+        # Java dùng "modified UTF-8", trùng với UTF-8 cho mọi ký tự tiếng Việt (đều thuộc BMP, khác NUL)
+        words.append(data[pos:pos + length].decode('utf-8', 'surrogatepass'))
+        pos += length
+    return words
+
+
+def _read_column(path: str, column: str, encoding: str):
+    import pandas as pd
+    return pd.read_csv(path, encoding=encoding, usecols=[column])[column]
+
+
+def _cmd_compare(args):
+    from data_preprocess import Config, TextPreprocessor
+
+    texts = _read_column(args.input, args.column, args.encoding).dropna().tolist()
+    if args.sample and len(texts) > args.sample:
+        texts = random.Random(args.seed).sample(texts, args.sample)
+    reference = TextPreprocessor(args.vncorenlp_dir, Config.TEENCODE_FILE,
+                                 nlp=VnCoreNLPSegmenter(args.vncorenlp_dir))
+    candidate = TextPreprocessor(args.vncorenlp_dir, Config.TEENCODE_FILE,
+                                 nlp=LongestMatchSegmenter(args.dict))
+    report = agreement_report(texts, reference, candidate, batch_size=args.batch_size)
+    summary = {k: v for k, v in report.items() if k != "examples"}
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logging.info(f"Đã ghi báo cáo so khớp: {args.output}")
+
+
+def _cmd_build_dict(args):
+    if not args.inputs and not args.vncorenlp_vocab:
+        raise SystemExit("Cần ít nhất 1 file CSV hoặc --vncorenlp-vocab")
+    counts = Counter()
+    for path in args.inputs:
+        counts.update(harvest_words(_read_column(path, args.column, args.encoding), args.min_count))
+    words = {word.replace('_', ' ') for word in counts}
+    if args.vncorenlp_vocab:
+        vocab = read_vncorenlp_vocab(args.vncorenlp_vocab)
+        # Từ 1 âm tiết không cần cho longest-match; bỏ các mục lẫn ký tự lạ (vd "/ch đổi mới")
+        for word in vocab:
+            syllables = word.lower().replace('_', ' ').split()
+            if len(syllables) > 1 and all(syllable.isalpha() for syllable in syllables):
+                words.add(' '.join(syllables))
+        logging.info(f"{args.vncorenlp_vocab}: {len(vocab)} từ")
+    if args.merge and os.path.exists(args.output):
+        words |= set(LongestMatchSegmenter._load_words(args.output).keys())
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write("# Từ điển tách từ cho LongestMatchSegmenter: mỗi dòng 1 từ nhiều âm tiết "
+                "(âm tiết cách nhau bằng khoảng trắng)\n")
+        f.write("# Dựng bằng: python segmenters.py build-dict [processed.csv ...] "
+                "[--vncorenlp-vocab ../vncorenlp/models/wordsegmenter/vi-vocab] --merge\n")
+        for word in sorted(words):
+            f.write(word + "\n")
+    logging.info(f"Đã ghi {len(words)} từ vào {args.output}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    default_dict = os.path.join(base_dir, "vi_words.txt")
+    default_vocab = os.path.join(os.path.dirname(base_dir), "vncorenlp", "models", "wordsegmenter", "vi-vocab")
+
+    parser = argparse.ArgumentParser(description="Công cụ cho các bộ tách từ")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    compare = sub.add_parser("compare", help="So khớp LongestMatchSegmenter với VnCoreNLP trên 1 mẫu")
+    compare.add_argument("--input", required=True, help="File CSV comment gốc")
+    compare.add_argument("--column", default="text")
+    compare.add_argument("--encoding", default="utf-8")
+    compare.add_argument("--sample", type=int, default=2000)
+    compare.add_argument("--seed", type=int, default=42)
+    compare.add_argument("--vncorenlp-dir", required=True)
+    compare.add_argument("--dict", default=default_dict)
+    compare.add_argument("--batch-size", type=int, default=64)
+    compare.add_argument("--output", help="Ghi báo cáo JSON (kèm ví dụ khác nhau)")
+    compare.set_defaults(func=_cmd_compare)
+
+    build = sub.add_parser("build-dict", help="Dựng từ điển từ CSV đã tách từ / vocab của VnCoreNLP")
+    build.add_argument("inputs", nargs="*", help="CSV đã tách từ bằng VnCoreNLP")
+    build.add_argument("--vncorenlp-vocab", nargs="?", const=default_vocab,
+                       help=f"Thêm các từ nhiều âm tiết trong vocab của VnCoreNLP (mặc định: {default_vocab})")
+    build.add_argument("--column", default="processed_text")
+    build.add_argument("--encoding", default="utf-8")
+    build.add_argument("--min-count", type=int, default=2)
+    build.add_argument("--merge", action="store_true", help="Giữ các từ đã có trong file output")
+    build.add_argument("-o", "--output", default=default_dict)
+    build.set_defaults(func=_cmd_build_dict)
+
+    args = parser.parse_args()
+    args.func(args)
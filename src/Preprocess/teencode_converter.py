@@ -1,13 +1,47 @@
 import json
 import os
 
+from resource_compiler import load_compiled
+from resource_watcher import ResourceWatcher
+from teencode_trie import TeencodeTrie
+
 class TeencodeConverter:
+    ARTIFACT_KIND = "converter"
+
     def __init__(self, json_path="teencode.json"):
         """
         Khởi tạo converter.
         :param json_path: Đường dẫn đến file teencode.json
         """
-        self.teencode_dict = self._load_and_flip_dictionary(json_path)
+        self.json_path = json_path
+        try:
+            self.reload()
+        except Exception as e:
+            print(f"Lỗi khi đọc file teencode: {e}")
+            self.teencode_dict, self.trie = {}, TeencodeTrie({})
+
+    def reload(self):
+        """
+        Nạp lại từ điển từ file (khi file được cập nhật), an toàn khi gọi từ thread khác:
+        replace() chỉ đọc self.trie 1 lần nên luôn dùng trọn 1 phiên bản.
+        JSON ghi dở/sai cú pháp -> ném lỗi và giữ nguyên bảng cũ (không ghi artifact).
+        """
+        # Bảng đã đảo + trie được lưu sẵn thành artifact nhị phân cạnh file JSON
+        teencode_dict, trie = load_compiled(self.json_path, self.ARTIFACT_KIND,
+                                            lambda: self._compile(self.json_path))
+        self.teencode_dict = teencode_dict
+        self.trie = trie
+
+    def watch(self, interval=5.0):
+        """
+        Tự động reload() khi file JSON thay đổi (watcher chạy trên thread nền).
+        :return: ResourceWatcher đã start (gọi .stop() để dừng)
+        """
+        return ResourceWatcher([self.json_path], lambda _: self.reload(), interval).start()
+
+    def _compile(self, json_path):
+        flipped_dict = self._load_and_flip_dictionary(json_path)
+        return flipped_dict, TeencodeTrie(flipped_dict)
 
     def _load_and_flip_dictionary(self, json_path):
         """
@@ -18,32 +52,29 @@ class TeencodeConverter:
             print(f"Cảnh báo: Không tìm thấy file {json_path}.")
             return {}
 
-        try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                raw_data = json.load(f)
-            
-            flipped_dict = {}
-            for standard_word, variants in raw_data.items():
-                for variant in variants:
-                    # Chuyển về chữ thường để đảm bảo đồng nhất
-                    flipped_dict[variant.lower()] = standard_word.lower()
-            
-            return flipped_dict
-        except Exception as e:
-            print(f"Lỗi khi đọc file teencode: {e}")
-            return {}
+        # Lỗi đọc/parse được ném ra ngoài: load_compiled không lưu artifact, reload() giữ bảng cũ
+        with open(json_path, 'r', encoding='utf-8') as f:
+            raw_data = json.load(f)
+        
+        flipped_dict = {}
+        for standard_word, variants in raw_data.items():
+            for variant in variants:
+                # Chuyển về chữ thường để đảm bảo đồng nhất
+                flipped_dict[variant.lower()] = standard_word.lower()
+        
+        return flipped_dict
 
     def replace(self, text):
         """
         Thay thế các từ teencode trong văn bản bằng từ chuẩn.
+        Hỗ trợ variant nhiều từ (vd: "chài ai") và từ dính dấu câu (vd: "hnay,"),
+        không phân biệt hoa/thường.
         """
         if not text:
             return ""
         
-        words = text.split()
-        # Tra cứu trong dictionary, nếu không có thì giữ nguyên từ gốc
-        normalized_words = [self.teencode_dict.get(word, word) for word in words]
-        return ' '.join(normalized_words)
+        # Chuẩn hoá khoảng trắng như trước, sau đó thay theo cụm dài nhất trên trie
+        return self.trie.replace_text(' '.join(text.split()))
 
 # Ví dụ cách dùng (nếu chạy file này trực tiếp)
 if __name__ == "__main__":
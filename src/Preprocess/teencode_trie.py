@@ -0,0 +1,108 @@
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class TeencodeTrie:
+    """
+    Trie theo token cho từ điển teencode (Variant -> Standard).
+    - Variant nhiều từ ("k bt", "chài ai", "v.c.l") được tách token giống văn bản rồi nạp vào trie,
+      nên từ đơn và cụm từ được thay cùng lúc trong 1 lượt duyệt trái -> phải (greedy longest-match).
+    - Tra cứu không phân biệt hoa/thường: mỗi token khác nhau chỉ lower() 1 lần (có memo).
+    - Chỉ bắt đầu khớp tại token chữ/số, dấu câu đứng riêng không bao giờ bị thay.
+    """
+
+    TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+    _FOLD_CACHE_LIMIT = 500_000  # Giới hạn memo lower() để không phình bộ nhớ với corpus lớn
+
+    def __init__(self, mapping: Dict[str, str]):
+        """
+        Args:
+            mapping: Dict variant -> từ chuẩn (variant có thể chứa khoảng trắng/dấu câu)
+        """
+        self.root: Dict = {}
+        self.size = 0
+        self._fold: Dict[str, str] = {}
+        for variant, standard in mapping.items():
+            tokens = [token.lower() for token in self.TOKEN_PATTERN.findall(variant)]
+            if not tokens:
+                continue
+            node = self.root
+            for token in tokens:
+                node = node.setdefault(token, {})
+            if None not in node:
+                self.size += 1
+            # Key None đánh dấu nút kết thúc 1 variant (token luôn là str nên không trùng)
+            node[None] = standard
+
+    def __len__(self) -> int:
+        return self.size
+
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        """Tách chữ/số và từng dấu câu, vd: "hnay," -> ["hnay", ","]"""
+        return cls.TOKEN_PATTERN.findall(text)
+
+    def _fold_token(self, token: str) -> str:
+        folded = self._fold.get(token)
+        if folded is None:
+            folded = token.lower()
+            if len(self._fold) < self._FOLD_CACHE_LIMIT:
+                self._fold[token] = folded
+        return folded
+
+    def match_at(self, tokens: List[str], start: int) -> Optional[Tuple[int, str]]:
+        """
+        Tìm variant dài nhất bắt đầu tại tokens[start].
+
+        Returns:
+            (vị trí token ngay sau cụm khớp, từ chuẩn) hoặc None nếu không khớp
+        """
+        node = self.root
+        best = None
+        pos = start
+        while pos < len(tokens):
+            node = node.get(self._fold_token(tokens[pos]))
+            if node is None:
+                break
+            pos += 1
+            if None in node:
+                best = (pos, node[None])
+        return best
+
+    def iter_matches(self, tokens: List[str]) -> Iterator[Tuple[int, int, str]]:
+        """Duyệt 1 lượt, sinh ra (token bắt đầu, token kết thúc (không gồm), từ chuẩn) không chồng lấn."""
+        root = self.root
+        pos = 0
+        while pos < len(tokens):
+            token = tokens[pos]
+            if self._fold_token(token) in root and token.isalnum():
+                hit = self.match_at(tokens, pos)
+                if hit is not None:
+                    yield pos, hit[0], hit[1]
+                    pos = hit[0]
+                    continue
+            pos += 1
+
+    def replace_tokens(self, tokens: List[str]) -> List[str]:
+        """Thay teencode trên list token; mỗi cụm khớp thành 1 phần tử từ chuẩn."""
+        result = []
+        last = 0
+        for start, end, standard in self.iter_matches(tokens):
+            result.extend(tokens[last:start])
+            result.append(standard)
+            last = end
+        result.extend(tokens[last:])
+        return result
+
+    def replace_text(self, text: str) -> str:
+        """Thay teencode trực tiếp trên văn bản, giữ nguyên khoảng trắng/dấu câu xung quanh cụm khớp."""
+        spans = [(m.start(), m.end()) for m in self.TOKEN_PATTERN.finditer(text)]
+        tokens = [text[s:e] for s, e in spans]
+        parts = []
+        last = 0
+        for start, end, standard in self.iter_matches(tokens):
+            parts.append(text[last:spans[start][0]])
+            parts.append(standard)
+            last = spans[end - 1][1]
+        parts.append(text[last:])
+        return ''.join(parts)
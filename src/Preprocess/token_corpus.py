@@ -0,0 +1,234 @@
+"""
+Corpus token đã mã hoá số nguyên, đọc bằng memory-map (numpy .npy) thay cho CSV chuỗi processed_text.
+
+Thư mục corpus:
+    tokens.npy   uint32, id của mọi token nối liền (comment này tiếp comment kia)
+    offsets.npy  int64, n+1 phần tử: token của comment i là tokens[offsets[i]:offsets[i+1]]
+    index.npy    int64, index gốc của từng comment (khớp cột index của file output)
+    counts.npy   int64, tần suất của từng id
+    vocab.txt    token theo thứ tự id, mỗi dòng 1 token
+    meta.json    số comment/token, kích thước từ điển, file nguồn
+
+Id 0 = <pad>, 1 = <unk>; token thật được đánh id từ 2 theo tần suất giảm dần, nên lọc từ hiếm
+(min_freq) chỉ là cắt ở 1 ngưỡng id: id >= vocab_size => <unk>, không cần ghi lại corpus.
+
+Chạy:
+    python token_corpus.py build --input IzSYlr3VI1A_preprocess.csv --output corpus/
+    python token_corpus.py info corpus/ --min-freq 5
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from columnar_io import detect_format, iter_table
+from encoding_detector import detect_encoding
+
+PAD, UNK = "<pad>", "<unk>"
+PAD_ID, UNK_ID = 0, 1
+N_SPECIAL = 2
+# Số token remap mỗi lần khi sắp xếp lại id theo tần suất (giới hạn RAM lúc finalize)
+_REMAP_BLOCK = 1 << 24
+
+
+class TokenCorpusWriter:
+    """
+    Dựng corpus theo từng chunk processed_text (tách theo khoảng trắng, token ghép của
+    word segmentation giữ dấu '_'). Id tạm theo thứ tự xuất hiện được ghi nối ra file tạm;
+    `close()` sắp xếp lại id theo tần suất và ghi các file .npy.
+    """
+
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+        os.makedirs(out_dir, exist_ok=True)
+        self._vocab: Dict[str, int] = {}
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._lengths: List[np.ndarray] = []
+        self._index: List[np.ndarray] = []
+        self._tmp = tempfile.NamedTemporaryFile(dir=out_dir, suffix=".ids.tmp", delete=False)
+        self.n_tokens = 0
+
+    def add(self, texts: pd.Series):
+        """Thêm 1 chunk comment (Series processed_text, index = index gốc)."""
+        split = texts.fillna("").astype(str).str.split()
+        lengths = split.str.len().to_numpy(dtype=np.int64)
+        flat = split.explode().dropna()
+        # factorize theo chunk: chỉ tra dict cho các token khác nhau, không phải mọi token
+        codes, uniques = pd.factorize(flat, sort=False)
+        vocab = self._vocab
+        local_to_global = np.fromiter((vocab.setdefault(token, len(vocab)) for token in uniques),
+                                      dtype=np.int64, count=len(uniques))
+        ids = local_to_global[codes] if len(codes) else np.zeros(0, dtype=np.int64)
+
+        counts = np.bincount(ids, minlength=len(vocab))
+        counts[:len(self._counts)] += self._counts
+        self._counts = counts
+        ids.astype(np.uint32).tofile(self._tmp)
+        self._lengths.append(lengths)
+        self._index.append(texts.index.to_numpy(dtype=np.int64))
+        self.n_tokens += len(ids)
+
+    def close(self, source: Optional[str] = None) -> Dict:
+        """Sắp xếp id theo tần suất, ghi tokens/offsets/index/counts/vocab/meta. Trả về meta."""
+        self._tmp.close()
+        try:
+            order = np.argsort(-self._counts, kind="stable")    # cùng tần suất: giữ thứ tự xuất hiện
+            remap = np.empty(len(order), dtype=np.uint32)
+            remap[order] = np.arange(N_SPECIAL, N_SPECIAL + len(order), dtype=np.uint32)
+
+            raw = np.memmap(self._tmp.name, dtype=np.uint32, mode="r") if self.n_tokens else np.zeros(0, np.uint32)
+            tokens = np.lib.format.open_memmap(os.path.join(self.out_dir, "tokens.npy"), mode="w+",
+                                               dtype=np.uint32, shape=(self.n_tokens,))
+            for start in range(0, self.n_tokens, _REMAP_BLOCK):
+                tokens[start:start + _REMAP_BLOCK] = remap[raw[start:start + _REMAP_BLOCK]]
+            tokens.flush()
+            del tokens, raw
+        finally:
+            os.remove(self._tmp.name)
+
+        lengths = np.concatenate(self._lengths) if self._lengths else np.zeros(0, dtype=np.int64)
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        index = np.concatenate(self._index) if self._index else np.zeros(0, dtype=np.int64)
+        counts = np.concatenate([np.zeros(N_SPECIAL, dtype=np.int64), self._counts[order]])
+        words = list(self._vocab)
+        np.save(os.path.join(self.out_dir, "offsets.npy"), offsets)
+        np.save(os.path.join(self.out_dir, "index.npy"), index)
+        np.save(os.path.join(self.out_dir, "counts.npy"), counts)
+        with open(os.path.join(self.out_dir, "vocab.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join([PAD, UNK] + [words[i] for i in order]))
+            f.write("\n")
+        meta = {"n_docs": len(lengths), "n_tokens": int(self.n_tokens), "vocab_size": len(counts),
+                "source": source}
+        with open(os.path.join(self.out_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        return meta
+
+
+def iter_processed_text(path: str, chunksize: int) -> Iterator[pd.Series]:
+    """Đọc cột processed_text (kèm index gốc) của file output CSV / Parquet / Arrow theo chunk."""
+    fmt = detect_format(path)
+    if fmt != "csv":
+        for chunk in iter_table(path, chunksize, columns=["processed_text"], fmt=fmt):
+            yield chunk["processed_text"]
+        return
+    encoding = detect_encoding(path).encoding
+    with pd.read_csv(path, encoding=encoding, index_col=0, chunksize=chunksize,
+                     dtype={"processed_text": str}, keep_default_na=False) as reader:
+        for chunk in reader:
+            yield chunk["processed_text"]
+
+
+def build_token_corpus(source: str, out_dir: str, chunksize: int = 100000) -> Dict:
+    """Dựng corpus từ file output của DataPipeline. Trả về meta."""
+    start = time.perf_counter()
+    writer = TokenCorpusWriter(out_dir)
+    for texts in iter_processed_text(source, chunksize):
+        writer.add(texts)
+    meta = writer.close(source=source)
+    logging.info(f"Đã xuất corpus token: {meta['n_docs']} comment, {meta['n_tokens']} token, "
+                 f"{meta['vocab_size']} từ vựng -> {out_dir} ({time.perf_counter() - start:.1f}s)")
+    return meta
+
+
+class TokenCorpus:
+    """
+    Đọc corpus bằng memory-map: mở gần như tức thì, RAM chỉ dùng cho các trang thực sự được đọc.
+
+    `corpus[i]` trả về view (không copy) mảng id token của comment i. Với min_freq > 1, token có tần suất
+    < min_freq được coi là <unk>: id của chúng >= vocab_size nên chỉ comment chứa từ hiếm mới bị copy.
+    """
+
+    def __init__(self, path: str, min_freq: int = 1):
+        self.path = path
+        self.tokens = np.load(os.path.join(path, "tokens.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.index = np.load(os.path.join(path, "index.npy"), mmap_mode="r")
+        self.counts = np.load(os.path.join(path, "counts.npy"), mmap_mode="r")
+        self.min_freq = min_freq
+        # counts của token thật giảm dần => số từ giữ lại = vị trí đầu tiên có tần suất < min_freq
+        real = self.counts[N_SPECIAL:]
+        self.vocab_size = N_SPECIAL + int(np.searchsorted(-real, -min_freq, side="right"))
+        self._vocab: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def n_tokens(self) -> int:
+        return len(self.tokens)
+
+    @property
+    def vocab(self) -> List[str]:
+        """Danh sách token theo id (đã cắt theo min_freq); chỉ đọc vocab.txt khi cần."""
+        if self._vocab is None:
+            with open(os.path.join(self.path, "vocab.txt"), "r", encoding="utf-8") as f:
+                self._vocab = f.read().split("\n")[:self.vocab_size]
+        return self._vocab
+
+    def _prune(self, ids: np.ndarray) -> np.ndarray:
+        if self.vocab_size >= len(self.counts) or not len(ids) or ids.max() < self.vocab_size:
+            return ids
+        return np.where(ids < self.vocab_size, ids, np.uint32(UNK_ID))
+
+    def __getitem__(self, i: int) -> np.ndarray:
+        return self._prune(self.tokens[self.offsets[i]:self.offsets[i + 1]])
+
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def batch(self, start: int, stop: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(id token nối liền, offsets tính từ 0) của các comment [start, stop), dùng cho xử lý theo lô."""
+        offsets = np.asarray(self.offsets[start:stop + 1])
+        return self._prune(self.tokens[offsets[0]:offsets[-1]]), offsets - offsets[0]
+
+    def iter_batches(self, batch_size: int) -> Iterable[Tuple[np.ndarray, np.ndarray]]:
+        for start in range(0, len(self), batch_size):
+            yield self.batch(start, min(start + batch_size, len(self)))
+
+    def decode(self, i: int) -> str:
+        vocab = self.vocab
+        return " ".join(vocab[t] for t in self[i])
+
+
+def _cmd_build(args):
+    meta = build_token_corpus(args.input, args.output, args.chunksize)
+    print(json.dumps(meta, ensure_ascii=False, indent=2))
+
+
+def _cmd_info(args):
+    start = time.perf_counter()
+    corpus = TokenCorpus(args.corpus, min_freq=args.min_freq)
+    opened = time.perf_counter() - start
+    print(f"{len(corpus)} comment, {corpus.n_tokens} token, từ vựng {corpus.vocab_size} "
+          f"(min_freq={args.min_freq}, tổng {len(corpus.counts)}), mở trong {opened * 1000:.2f} ms")
+    for i in range(min(args.show, len(corpus))):
+        print(f"  [{int(corpus.index[i])}] {corpus.decode(i)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Corpus token memory-map")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Dựng corpus từ file output (CSV/Parquet/Arrow)")
+    build.add_argument("--input", required=True)
+    build.add_argument("--output", required=True)
+    build.add_argument("--chunksize", type=int, default=100000)
+    build.set_defaults(func=_cmd_build)
+    info = sub.add_parser("info", help="Thông tin corpus + vài comment đầu")
+    info.add_argument("corpus")
+    info.add_argument("--min-freq", type=int, default=1)
+    info.add_argument("--show", type=int, default=5)
+    info.set_defaults(func=_cmd_info)
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()